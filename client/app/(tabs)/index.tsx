@@ -52,6 +52,7 @@ const MESSAGES_EXPANDED_HEIGHT = 500; // Fixed height when expanded
 const BREATHE_OFFSET_COMPACT = -100; // Breathe offset when messages are compact
 const BREATHE_OFFSET_EXPANDED = -280; // Breathe offset when messages are expanded
 const BREATHE_SIZE_REDUCTION = 0.7; // Scale factor for Breathe when expanded (70% of original size)
+const PREFETCH_INTERVAL_MS = 400; // Minimum gap between interim-transcript prefetch requests
 
 export default function BreathePage() {
   const wind = Dimensions.get("window");
@@ -109,7 +110,11 @@ export default function BreathePage() {
     onVadEnded,
   } = useStreamingAudioService();
 
-  const { chatWithAI } = useOpenAI();
+  const { chatWithAI, prefetchChat } = useOpenAI();
+  const lastPrefetchRef = useRef<{ text: string; at: number }>({
+    text: "",
+    at: 0,
+  });
 
   const { speakText, stopSpeaking } = usePollyTTS();
 
@@ -261,6 +266,28 @@ export default function BreathePage() {
     console.log("Added dummy message:", dummyMessage.id);
   };
 
+  // 말하는 도중의 중간 전사문으로 RAG 검색을 미리 시작 (VAD 종료 대기 시간 동안 검색 완료)
+  useEffect(() => {
+    if (sttDatas.length === 0) return;
+    if (conversationState !== "LISTENING" || !isRecording) return;
+
+    const textByResult = new Map<string, string>();
+    sttDatas.forEach((data) => textByResult.set(data.resultId, data.text));
+    const partialText = Array.from(textByResult.values()).join(" ").trim();
+
+    const now = Date.now();
+    const last = lastPrefetchRef.current;
+    if (partialText === last.text || now - last.at < PREFETCH_INTERVAL_MS) {
+      return;
+    }
+    lastPrefetchRef.current = { text: partialText, at: now };
+    prefetchChat({
+      partialText,
+      sessionId: chatSessionId,
+      gameKey: selectedGameKey || undefined,
+    });
+  }, [sttDatas, conversationState, isRecording]);
+
   // STT 데이터를 실시간으로 메시지에 반영
   useEffect(() => {
     if (sttDatas.length === 0) return;
@@ -322,6 +349,7 @@ export default function BreathePage() {
 
       // Clear previous data before starting new recording
       userTranscriptRef.current = "";
+      lastPrefetchRef.current = { text: "", at: 0 };
       resetSttDatas();
       currentlyAddingMessageRef.current = false;
 
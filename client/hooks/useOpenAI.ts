@@ -3,6 +3,7 @@ import {
   CHAT_WITH_AI,
   CREATE_CHAT_SESSION,
   GET_CHAT_SESSION,
+  PREFETCH_CHAT,
 } from "@/services/apolloClient";
 
 interface ChatInput {
@@ -11,6 +12,12 @@ interface ChatInput {
   gameKey?: string;
 }
 
+interface PrefetchInput {
+  partialText: string;
+  sessionId: string;
+  gameKey?: string;
+}
+
 interface ChatResponse {
   message: string;
   sessionId: string;
@@ -44,6 +51,10 @@ export const useOpenAI = () => {
   const [chatWithAIMutation, { loading: chatLoading, error: chatError }] =
     useMutation<{ chat: ChatResponse }>(CHAT_WITH_AI);
 
+  const [prefetchChatMutation] = useMutation<{ prefetchChat: boolean }>(
+    PREFETCH_CHAT
+  );
+
   const loading = createSessionLoading || chatLoading;
   const error = createSessionError || chatError;
 
@@ -77,11 +88,22 @@ export const useOpenAI = () => {
     }
   };
 
+  // 말하는 중인 질문으로 RAG 검색 미리 시작 (결과는 이후 chatWithAI에서 재사용)
+  const prefetchChat = async (input: PrefetchInput): Promise<void> => {
+    try {
+      await prefetchChatMutation({ variables: { input } });
+    } catch (err) {
+      // Prefetch is best-effort; the final chat request retrieves normally
+      console.warn("Prefetch chat error:", err);
+    }
+  };
+
   return {
     loading,
     error: error?.message || null,
     createChatSession,
     chatWithAI,
+    prefetchChat,
   };
 };
 
@@ -153,6 +153,12 @@ export const CHAT_WITH_AI = gql`
   }
 `;
 
+export const PREFETCH_CHAT = gql`
+  mutation PrefetchChat($input: PrefetchInput!) {
+    prefetchChat(input: $input)
+  }
+`;
+
 export const CREATE_CHAT_SESSION = gql`
   mutation CreateChatSession($sessionId: String!) {
     createChatSession(sessionId: $sessionId) {
@@ -0,0 +1,164 @@
+"""File-based game catalog with versioned index directories.
+
+The catalog is a JSON file written next to the indexes by the vector DB
+generator:
+
+    {"games": {"rummikub": {"name": "루미큐브", "db_path": "rummikub",
+                            "collection": "rummikub_rulebook"}}}
+
+Relative `db_path`s are resolved against the catalog's directory. A game
+directory may contain versioned index directories plus a `CURRENT` file
+naming the active one (`chroma_db/rummikub/20250101T000000Z/` +
+`chroma_db/rummikub/CURRENT`); without `CURRENT` the directory itself is the
+index (legacy layout).
+
+Games built into the consolidated multi-game index carry `"shared": true`;
+they all point at the same index directory and collection, and the server
+filters chunks by their `game_key` metadata (see app.core.multi_index).
+
+A watcher thread polls the catalog and `CURRENT` files. On change it builds a
+new immutable snapshot, swaps it in with a single assignment (readers never
+see a half-updated catalog) and notifies listeners with the changed keys.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Iterator, NotRequired, Optional, TypedDict
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = "CURRENT"
+
+
+class GameConfig(TypedDict):
+    """게임 설정 타입"""
+    name: str
+    db_path: str
+    collection: str
+    version: NotRequired[str]
+    # One collection for several games, filtered by the chunk's game_key
+    shared: NotRequired[bool]
+
+
+def resolve_index_dir(db_path: str) -> tuple[str, str]:
+    """
+    게임 디렉터리에서 현재 활성 인덱스 경로와 버전 확인
+
+    Args:
+        db_path: 게임 인덱스 디렉터리
+
+    Returns:
+        tuple[str, str]: (실제 인덱스 경로, 버전 이름; CURRENT가 없으면 "")
+    """
+    try:
+        with open(os.path.join(db_path, CURRENT_POINTER), encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return db_path, ""
+    if not version:
+        return db_path, ""
+    return os.path.join(db_path, version), version
+
+
+class GameCatalog(Mapping[str, GameConfig]):
+    """Read-only mapping of game key -> config backed by an atomically swapped snapshot."""
+
+    def __init__(self, path: str, defaults: Mapping[str, GameConfig], poll_seconds: int = 5):
+        self.path = path
+        self.defaults = dict(defaults)
+        self.poll_seconds = poll_seconds
+        self._listeners: list[Callable[[set[str]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Mapping[str, GameConfig] = self._build()
+
+    # Mapping interface: each call reads the current snapshot once
+    def __getitem__(self, game_key: str) -> GameConfig:
+        return self._snapshot[game_key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def snapshot(self) -> Mapping[str, GameConfig]:
+        """Return the current immutable snapshot (consistent across several lookups)."""
+        return self._snapshot
+
+    def subscribe(self, listener: Callable[[set[str]], None]) -> None:
+        """Call `listener(changed_game_keys)` after every snapshot swap."""
+        self._listeners.append(listener)
+
+    def _read_entries(self) -> dict[str, GameConfig]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return dict(self.defaults)
+        base_dir = os.path.dirname(os.path.abspath(self.path))
+        entries = {}
+        for game_key, config in data.get("games", {}).items():
+            db_path = config.get("db_path", game_key)
+            if not os.path.isabs(db_path):
+                db_path = os.path.join(base_dir, db_path)
+            entries[game_key] = {
+                "name": config.get("name", game_key),
+                "db_path": db_path,
+                "collection": config.get("collection", f"{game_key}_rulebook"),
+            }
+            if config.get("shared"):
+                entries[game_key]["shared"] = True
+        return entries
+
+    def _build(self) -> Mapping[str, GameConfig]:
+        snapshot = {}
+        for game_key, config in self._read_entries().items():
+            index_dir, version = resolve_index_dir(config["db_path"])
+            snapshot[game_key] = MappingProxyType({**config, "db_path": index_dir, "version": version})
+        return MappingProxyType(snapshot)
+
+    def reload(self) -> set[str]:
+        """
+        카탈로그와 CURRENT 포인터를 다시 읽고, 바뀐 게임이 있으면 스냅샷 교체
+
+        Returns:
+            set[str]: 추가/삭제/변경된 게임 키
+        """
+        try:
+            new = self._build()
+        except (OSError, ValueError) as e:
+            # Half-written or invalid catalog: keep serving the previous snapshot
+            logger.warning(f"game catalog reload failed, keeping previous: {e}")
+            return set()
+        old = self._snapshot
+        changed = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+        if not changed:
+            return changed
+        self._snapshot = new
+        logger.info(f"game catalog updated: {sorted(changed)}")
+        for listener in self._listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.warning(f"game catalog listener failed: {e}")
+        return changed
+
+    def start_watching(self) -> None:
+        """Start the background poller (no-op when polling is disabled or running)."""
+        if self.poll_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="game-catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.reload()
@@ -1,16 +1,11 @@
 """Game configurations for available board games."""
 
-from typing import TypedDict
+from app.config.catalog import GameCatalog, GameConfig
+from app.config.settings import CATALOG_POLL_SECONDS, GAME_CATALOG_PATH
 
 
-class GameConfig(TypedDict):
-    """게임 설정 타입"""
-    name: str
-    db_path: str
-    collection: str
-
-
-AVAILABLE_GAMES: dict[str, GameConfig] = {
+# Used when no catalog file exists (e.g. a chroma_db built before the catalog)
+DEFAULT_GAMES: dict[str, GameConfig] = {
     "sabotage": {
         "name": "사보타지",
         "db_path": "./chroma_db/sabotage",
@@ -27,3 +22,6 @@ AVAILABLE_GAMES: dict[str, GameConfig] = {
         "collection": "halligalli_rulebook"
     },
 }
+
+# Watched catalog; reads always see one consistent snapshot
+AVAILABLE_GAMES = GameCatalog(GAME_CATALOG_PATH, DEFAULT_GAMES, poll_seconds=CATALOG_POLL_SECONDS)
@@ -1,5 +1,11 @@
 """Prompt templates for RAG chatbot."""
 
+import re
+
+_TERM_STEP = re.compile(r"^ *2\) \*\*TERM NORMALIZATION\*\*.*\n", re.MULTILINE)
+_LATER_STEP = re.compile(r"^( *)([3-9])\) ", re.MULTILINE)
+
+
 class PromptTemplate:
     system_template = """
     You are the rulebook-based assistant for the "{game_title}" game.
@@ -13,7 +19,7 @@ class PromptTemplate:
     3) **QA MATCH CHECK**: Check if the Context contains a "Q: ... A: ..." pair that is semantically similar to the user's question.
        - If found, use the provided 'A' (Answer) text directly as the description.
        - Set answer_type based on the nature of that answer (YES/NO/EXPLAIN).
-       - Use the text labeled "Source:" in the context header as the source.
+       - Use the text on the "Source:" line of that context block as the source.
     4) **RULEBOOK CHECK**: If no QA match, check if the rulebook content in the Context provides a clear answer.
     5) **INSUFFICIENT EVIDENCE**: If the provided Context (QA or rulebook) does NOT contain sufficient information to answer the question:
        - You **MUST** set answer_type to CANNOT_ANSWER.
@@ -34,13 +40,13 @@ class PromptTemplate:
       * For binary, start with "예" or "아니오".
       * The description should contain ONLY the direct answer/conclusion, NOT the source reference.
     - source: Extract the specific sentence(s) from the "Source:" field that directly supports your answer.
-      * The Context format is "[Type: ..., Source: <TEXT>]". You must extract ONLY the <TEXT> part.
-      * CRITICAL: Do NOT use the 'A:' (Answer) text from a QA pair as the source. The source must come from the '[... Source: ...]' header.
-      * Do NOT include the metadata tags like "[Type: ...]" or "Source:".
+      * Each Context block starts with a header "[n] <type> | p.<page> | <section>" followed by a line "Source: <TEXT>". You must extract ONLY the <TEXT> part.
+      * CRITICAL: Do NOT use the 'A:' (Answer) text from a QA pair as the source. The source must come from the "Source:" line.
+      * Do NOT include the block header like "[1] QA | ..." or the "Source:" label.
       * Do not copy the entire paragraph if only one sentence is relevant.
       * Keep the text exact as it appears in the Source.
       * If no source is available, set to "".
-    - page: Extract the "Page:" field value from the Context metadata as an integer, or null if unavailable.
+    - page: Extract the page number from the "p.<page>" part of the block header as an integer, or null if unavailable.
 
     Notes:
     - Keep answers concise and in Korean.
@@ -57,4 +63,120 @@ class PromptTemplate:
 
     #Question:
     {question}
-    """.strip()
\ No newline at end of file
+    """.strip()
+
+    # Native structured output: the schema is sent as response_format, not in the prompt
+    structured_user_template = """
+    #Context:
+    {context}
+
+    #Question:
+    {question}
+    """.strip()
+
+    # Reference output (RAG_SOURCE_EXTRACTION=1): the model only cites the number
+    # of the supporting context block; the server extracts the source sentence
+    # and page from that block itself, so no rulebook text is copied into the output
+    reference_output_template = """
+    Output format (use exactly these fields and order):
+    - answer_type: YES / NO / EXPLAIN / CANNOT_ANSWER
+    - description: concise conclusion (1-3 sentences).
+      * For binary, start with "예" or "아니오".
+      * The description should contain ONLY the direct answer/conclusion, NOT the source reference.
+    - ref: the number n of the Context block "[n] ..." whose "Source:" line supports your answer, as an integer.
+      * Cite the block whose Source supports the answer, even when the answer came from its QA pair.
+      * If no source is available, set to null.
+
+    Notes:
+    - Keep answers concise and in Korean.
+    - Separate facts (description) from evidence (ref). Do not mix them.
+    """.strip()
+
+    reference_system_template = (
+        system_template
+        .replace('Set source="" and page=null.', "Set ref=null.")
+        .replace(
+            'Use the text on the "Source:" line of that context block as the source.',
+            "Use the number of that context block as ref.",
+        )
+        .split("Output format")[0]
+        + reference_output_template
+    )
+
+    # Worked examples for the prefix layout. Besides showing the expected
+    # output, they take the static instructions past OpenAI's 1024-token prompt
+    # caching minimum (the response_format schema does not count toward it);
+    # without them the system message alone is ~620-820 tokens and never cached.
+    examples_template = """
+    Worked examples (illustrative only: they are not Context and never evidence):
+    - Context has block [1] "QA | p.3 | 준비" whose Source is "각 플레이어는 카드 5장을 받고 시작합니다." with the pair Q "처음에 카드를 몇 장 받나요?" / A "각자 5장씩 받습니다."
+      Question: "시작할 때 카드 몇 장씩 가져가?"
+      Answer: {{"answer_type": "EXPLAIN", "description": "각자 5장씩 받습니다.", "source": "각 플레이어는 카드 5장을 받고 시작합니다.", "page": 3}}
+    - Context has block [2] "rulebook | p.7 | 진행" whose Source is "자기 차례에는 카드를 한 장 내거나 한 장 버려야 합니다."
+      Question: "내 차례에 아무것도 안 하고 넘겨도 돼?"
+      Answer: {{"answer_type": "NO", "description": "아니오, 자기 차례에는 카드를 한 장 내거나 버려야 합니다.", "source": "자기 차례에는 카드를 한 장 내거나 한 장 버려야 합니다.", "page": 7}}
+    - Context has block [1] "rulebook | p.9 | 특수 카드" whose Source is "조커는 어떤 숫자나 색으로도 사용할 수 있습니다."
+      Question: "조커를 빨간 5 대신 써도 돼?"
+      Answer: {{"answer_type": "YES", "description": "예, 조커는 어떤 숫자나 색으로도 쓸 수 있으므로 빨간 5 대신 사용할 수 있습니다.", "source": "조커는 어떤 숫자나 색으로도 사용할 수 있습니다.", "page": 9}}
+    - Context has block [3] "QA+rulebook | p.5 | 점수 계산" whose Source is "라운드가 끝나면 손에 남은 카드의 숫자 합만큼 감점됩니다." with the pair Q "라운드가 끝나면 남은 카드는 어떻게 되나요?" / A "남은 카드 숫자의 합만큼 점수를 잃습니다."
+      Question: "판 끝났을 때 손에 카드가 남아 있으면 손해야?"
+      Answer: {{"answer_type": "YES", "description": "예, 라운드가 끝날 때 손에 남은 카드 숫자의 합만큼 점수를 잃습니다.", "source": "라운드가 끝나면 손에 남은 카드의 숫자 합만큼 감점됩니다.", "page": 5}}
+    - Context has block [2] "rulebook | p.4 | 준비" whose Source is "가장 최근에 여행을 다녀온 사람이 먼저 시작하고, 이후 시계 방향으로 진행합니다."
+      Question: "누가 먼저 하고 순서는 어느 쪽으로 돌아?"
+      Answer: {{"answer_type": "EXPLAIN", "description": "가장 최근에 여행을 다녀온 사람이 먼저 시작하고, 이후 시계 방향으로 진행합니다.", "source": "가장 최근에 여행을 다녀온 사람이 먼저 시작하고, 이후 시계 방향으로 진행합니다.", "page": 4}}
+    - Context only covers setup and scoring, and the question asks about a tournament time limit.
+      Answer: {{"answer_type": "CANNOT_ANSWER", "description": "관련 규칙을 찾을 수 없습니다.", "source": "", "page": null}}
+    - Question: "고마워, 덕분에 잘 배웠어!"
+      Answer: {{"answer_type": "EXPLAIN", "description": "도움이 되어 기뻐요! 궁금한 규칙이 있으면 언제든 물어보세요.", "source": "", "page": null}}
+    """.strip()
+
+    # Reference output: the same examples citing the block number
+    reference_examples_template = (
+        examples_template
+        .replace(', "source": "각 플레이어는 카드 5장을 받고 시작합니다.", "page": 3', ', "ref": 1')
+        .replace(', "source": "자기 차례에는 카드를 한 장 내거나 한 장 버려야 합니다.", "page": 7', ', "ref": 2')
+        .replace(', "source": "조커는 어떤 숫자나 색으로도 사용할 수 있습니다.", "page": 9', ', "ref": 1')
+        .replace(', "source": "라운드가 끝나면 손에 남은 카드의 숫자 합만큼 감점됩니다.", "page": 5', ', "ref": 3')
+        .replace(
+            ', "source": "가장 최근에 여행을 다녀온 사람이 먼저 시작하고, 이후 시계 방향으로 진행합니다.", "page": 4',
+            ', "ref": 2',
+        )
+        .replace(', "source": "", "page": null', ', "ref": null')
+    )
+
+    # Prefix-cache layout (RAG_PROMPT_LAYOUT=prefix): messages go from most to
+    # least static so provider-side prompt caching can reuse the longest prefix.
+    # The instructions, examples (and format) are identical for every game and
+    # request; the game, history, context and question follow in that order.
+    prefix_system_template = system_template.replace(
+        'for the "{game_title}" game.', 'for the board game named in the "#Game" message.'
+    ) + "\n\n    " + examples_template
+    prefix_reference_system_template = reference_system_template.replace(
+        'for the "{game_title}" game.', 'for the board game named in the "#Game" message.'
+    ) + "\n\n    " + reference_examples_template
+
+    format_template = """
+    #Format:
+    {format_instructions}
+    """.strip()
+
+    game_template = """
+    #Game:
+    {game_title}
+    """.strip()
+
+    prefix_user_template = structured_user_template
+
+    @staticmethod
+    def without_term_normalization(template: str) -> str:
+        """
+        용어 정규화 단계를 뺀 시스템 프롬프트 (질문이 이미 룰북 용어로 치환된 게임용)
+
+        Args:
+            template: 용어 정규화 단계가 있는 시스템 프롬프트
+
+        Returns:
+            str: 해당 단계를 지우고 이후 단계 번호를 하나씩 당긴 프롬프트
+        """
+        trimmed = _TERM_STEP.sub("", template, count=1)
+        return _LATER_STEP.sub(lambda m: f"{m.group(1)}{int(m.group(2)) - 1}) ", trimmed)
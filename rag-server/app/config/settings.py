@@ -0,0 +1,152 @@
+"""Runtime settings for the RAG server.
+
+All values are read from environment variables (optionally via `.env`) with
+safe, non-sensitive defaults. Keep secrets out of this module.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer env var, falling back to the default on empty/invalid values."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float env var, falling back to the default on empty/invalid values."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def _env_list(name: str) -> list[str]:
+    """Read a comma-separated env var into a list of non-empty, stripped items."""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+# Context assembly: upper bound of tokens spent on retrieved context per request
+CONTEXT_MAX_TOKENS = _env_int("RAG_CONTEXT_MAX_TOKENS", 1200)
+
+# Number of chunks fetched from the vectorstore before dedup/budgeting
+# (3 shortens the prompt but loses recall on reworded questions; see the benchmark's paraphrased hit@k)
+RETRIEVE_K = _env_int("RAG_RETRIEVE_K", 5)
+
+# Hybrid retrieval: BM25 over character n-grams fused with vector search
+# (0 disables), and how much of the question's n-gram weight (0-100) the best
+# lexical hit must cover to answer without the embedding call (0 always embeds)
+HYBRID_LEXICAL = _env_int("RAG_HYBRID_LEXICAL", 1)
+LEXICAL_SHORTCUT_COVERAGE = _env_int("RAG_LEXICAL_SHORTCUT_COVERAGE", 90)
+
+# Model name used for both the LLM and the local tokenizer
+LLM_MODEL_NAME = os.getenv("RAG_LLM_MODEL", "gpt-4o-mini")
+
+# Token accounting: LLM prices in USD per 1M tokens (defaults: gpt-4o-mini) for
+# the cost estimate, and how many sessions the usage ledger tracks (LRU)
+LLM_INPUT_PRICE_PER_MTOK = _env_float("RAG_LLM_INPUT_PRICE_PER_MTOK", 0.15)
+LLM_CACHED_INPUT_PRICE_PER_MTOK = _env_float("RAG_LLM_CACHED_INPUT_PRICE_PER_MTOK", 0.075)
+LLM_OUTPUT_PRICE_PER_MTOK = _env_float("RAG_LLM_OUTPUT_PRICE_PER_MTOK", 0.60)
+USAGE_MAX_SESSIONS = _env_int("RAG_USAGE_MAX_SESSIONS", 10000)
+
+# Chat history: per-worker LRU in front of DynamoDB with write-behind flushing.
+# The TTL bounds how long a worker may answer from a history another worker
+# (or a delete) has changed; writes are versioned regardless
+HISTORY_CACHE_SIZE = _env_int("RAG_HISTORY_CACHE_SIZE", 2048)
+HISTORY_CACHE_TTL_SECONDS = _env_int("RAG_HISTORY_CACHE_TTL_SECONDS", 5)
+HISTORY_FLUSH_INTERVAL_MS = _env_int("RAG_HISTORY_FLUSH_INTERVAL_MS", 500)
+
+# Batch chat endpoint: maximum questions per request and concurrent LLM calls
+BATCH_MAX_ITEMS = _env_int("RAG_BATCH_MAX_ITEMS", 500)
+BATCH_MAX_CONCURRENCY = _env_int("RAG_BATCH_MAX_CONCURRENCY", 8)
+
+# LLM client: per-attempt deadline, SDK retries and shared HTTP connection pool
+LLM_TIMEOUT_SECONDS = _env_int("RAG_LLM_TIMEOUT_SECONDS", 20)
+LLM_MAX_RETRIES = _env_int("RAG_LLM_MAX_RETRIES", 1)
+LLM_POOL_SIZE = _env_int("RAG_LLM_POOL_SIZE", 32)
+LLM_PREWARM_CONNECTIONS = _env_int("RAG_LLM_PREWARM_CONNECTIONS", 2)
+
+# Hedged LLM requests: fire a second attempt when the first has no token after
+# this percentile of recent time-to-first-token (0 disables hedging)
+LLM_HEDGE_PERCENTILE = _env_int("RAG_LLM_HEDGE_PERCENTILE", 95)
+LLM_HEDGE_MIN_DELAY_MS = _env_int("RAG_LLM_HEDGE_MIN_DELAY_MS", 300)
+
+# LLM output mode: "structured" (native JSON-schema output validated into the
+# Pydantic schema) or "json" (format instructions in the prompt + JsonOutputParser)
+OUTPUT_MODE = os.getenv("RAG_OUTPUT_MODE", "structured")
+
+# Prompt message order: "prefix" (static instructions/format -> game -> history
+# -> context -> question, so provider-side prompt caching reuses the prefix) or
+# "legacy" (game title inside the system prompt, format after the context)
+PROMPT_LAYOUT = os.getenv("RAG_PROMPT_LAYOUT", "prefix")
+
+# The LLM cites the supporting context block by number and the server extracts
+# the source sentence/page from it, instead of the LLM copying rulebook text
+# into `source` (0 = LLM copies the source as before)
+SOURCE_EXTRACTION = _env_int("RAG_SOURCE_EXTRACTION", 1)
+
+# Per-request latency budget for /chat (0 = none). Embedding is skipped
+# (lexical-only retrieval) and the LLM is not called (answer built from the top
+# retrieved chunk) when less than their minimum budget is left; a running LLM
+# call is cut off at the deadline the same way
+CHAT_DEADLINE_MS = _env_int("RAG_CHAT_DEADLINE_MS", 3000)
+EMBED_MIN_BUDGET_MS = _env_int("RAG_EMBED_MIN_BUDGET_MS", 300)
+LLM_MIN_BUDGET_MS = _env_int("RAG_LLM_MIN_BUDGET_MS", 800)
+
+# Circuit breakers per upstream (embedding, LLM): consecutive failures before
+# calls are skipped (0 disables), and how long before a probe call is allowed
+BREAKER_FAILURE_THRESHOLD = _env_int("RAG_BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_SECONDS = _env_int("RAG_BREAKER_RESET_SECONDS", 30)
+
+# /chat admission control: concurrent chain executions (0 disables, shared with
+# /chat/batch items), bounded fair wait queue and the longest a request may wait
+# for a slot. /chat waits at most its remaining deadline minus LLM_MIN_BUDGET_MS,
+# so overload is answered with 429 + Retry-After rather than a degraded answer
+CHAT_MAX_CONCURRENCY = _env_int("RAG_CHAT_MAX_CONCURRENCY", 16)
+CHAT_MAX_QUEUE = _env_int("RAG_CHAT_MAX_QUEUE", 64)
+CHAT_QUEUE_TIMEOUT_SECONDS = _env_int("RAG_CHAT_QUEUE_TIMEOUT_SECONDS", 10)
+
+# Per-game vectorstore cache: approximate memory budget (0 = unlimited) and
+# comma-separated game keys that are preloaded and never evicted
+VECTORSTORE_CACHE_MB = _env_int("RAG_VECTORSTORE_CACHE_MB", 1024)
+VECTORSTORE_PINNED = _env_list("RAG_VECTORSTORE_PINNED")
+
+# Game catalog JSON (written by the vector DB generator) and how often it and
+# the per-game CURRENT index pointers are polled for changes (0 disables)
+GAME_CATALOG_PATH = os.getenv("RAG_GAME_CATALOG_PATH", "./chroma_db/catalog.json")
+CATALOG_POLL_SECONDS = _env_int("RAG_CATALOG_POLL_SECONDS", 5)
+
+# Pre-fork serving mode (python -m app.prefork): number of forked uvicorn
+# workers; all catalog games are preloaded and shared copy-on-write
+PREFORK_WORKERS = _env_int("RAG_PREFORK_WORKERS", 2)
+
+# Speculative retrieval from interim transcripts (/prefetch): how long a
+# prefetch stays reusable and how similar (0-100, normalized text) the final
+# question must be to reuse it
+PREFETCH_TTL_SECONDS = _env_int("RAG_PREFETCH_TTL_SECONDS", 30)
+PREFETCH_MIN_SIMILARITY = _env_int("RAG_PREFETCH_MIN_SIMILARITY", 85)
+
+# Local greeting/small-talk classifier in front of the chain: minimum n-gram
+# similarity (0-100) for a template answer (0 disables the shortcut)
+INTENT_MIN_SCORE = _env_int("RAG_INTENT_MIN_SCORE", 60)
+
+# Rewrite player aliases to rulebook terms (terms.json from the generator)
+# before embedding, caching and the LLM call (0 disables)
+TERM_NORMALIZATION = _env_int("RAG_TERM_NORMALIZATION", 1)
+
+# Admin profiling endpoints (/admin/profile/*): token expected in the
+# X-Admin-Token header (endpoints are disabled while unset) and the longest
+# CPU profile one request may run
+ADMIN_TOKEN = os.getenv("RAG_ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = _env_int("RAG_PROFILE_MAX_SECONDS", 60)
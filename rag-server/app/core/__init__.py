@@ -1,7 +1,26 @@
-"""Core RAG functionality."""
+"""Core RAG functionality.
 
-from .vectorstore import load_vectorstore
-from .chain import create_rag_chain
-from .memory import get_session_history, delete_session_history
+Exports are resolved on first access so importing a light submodule (metrics,
+tracing, admission) does not pull in LangChain and its providers.
+"""
 
-__all__ = ["load_vectorstore", "create_rag_chain", "get_session_history", "delete_session_history"]
+import importlib
+
+_EXPORTS = {
+    "load_vectorstore": ".vectorstore",
+    "create_rag_chain": ".chain",
+    "get_session_history": ".memory",
+    "delete_session_history": ".memory",
+    "flush_session_histories": ".memory",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,183 @@
+"""Admission control with fair queuing for chain executions.
+
+At most `max_concurrency` executions run at once per worker. Excess requests
+wait in a bounded queue that is served round-robin across games, then across
+sessions within a game, so one busy table cannot starve the others. When the
+queue is full (or a request waits too long) the caller is rejected with a
+Retry-After estimate, which the router turns into HTTP 429. Callers with a
+latency budget pass the time they can still afford to wait (`max_wait`), so
+under overload they are rejected while a retry is still useful rather than
+admitted too late to answer.
+
+Queue wait and service time are exported as separate histograms.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.tracing import record_stage
+
+ADMISSION_WAIT = Histogram(
+    "rag_admission_wait_seconds", "Time spent waiting for an execution slot", ("game",)
+)
+ADMISSION_SERVICE = Histogram(
+    "rag_admission_service_seconds", "Time spent holding an execution slot", ("game",)
+)
+ADMISSION_REJECTED = Counter(
+    "rag_admission_rejected_total", "Requests rejected by admission control", ("pool", "reason")
+)
+
+_controllers: list["AdmissionController"] = []
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "rag_admission_in_flight", "Executions holding a slot", ("pool",),
+    callback=lambda: {(c.name,): c.active for c in _controllers},
+)
+ADMISSION_QUEUED = Gauge(
+    "rag_admission_queued", "Requests waiting for a slot", ("pool",),
+    callback=lambda: {(c.name,): c.queued for c in _controllers},
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; `retry_after` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, game/session fair wait queue."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        # game -> session -> waiters; both levels are rotated for round-robin
+        self._waiters: OrderedDict[str, OrderedDict[str, deque[asyncio.Future]]] = OrderedDict()
+        # Smoothed service time, used for Retry-After estimates
+        self._avg_service = 1.0
+        _controllers.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    def retry_after(self) -> int:
+        """Estimated seconds until a new request could be served."""
+        backlog = (self.queued + self.active) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(backlog * self._avg_service))
+
+    def ensure_capacity(self) -> None:
+        """
+        대기열이 이미 가득 찼으면 바로 거절 (응답을 시작한 뒤에는 429를 보낼 수 없는 호출용)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 참
+        """
+        if self.enabled and self.queued >= self.max_queue:
+            ADMISSION_REJECTED.inc(pool=self.name, reason="queue_full")
+            raise AdmissionRejected("queue full", self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, game: str, session: str, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        실행 슬롯을 얻은 동안 블록 실행 (대기열이 가득 차면 AdmissionRejected)
+
+        Args:
+            game: 게임 식별자 (공정 대기열 1단계 키)
+            session: 세션 식별자 (공정 대기열 2단계 키)
+            max_wait: 호출자가 기다릴 수 있는 최대 시간 (초, queue_timeout보다 짧을 때만 적용;
+                0 이하면 대기 없이 바로 실행되지 않으면 거절)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간 초과
+        """
+        if not self.enabled:
+            yield
+            return
+
+        wait_start = time.perf_counter()
+        await self._acquire(game, session, max_wait)
+        start = time.perf_counter()
+        ADMISSION_WAIT.observe(start - wait_start, game=game)
+        record_stage("queue", wait_start, start)
+        try:
+            yield
+        finally:
+            service = time.perf_counter() - start
+            ADMISSION_SERVICE.observe(service, game=game)
+            self._avg_service += 0.1 * (service - self._avg_service)
+            self._release()
+
+    async def _acquire(self, game: str, session: str, max_wait: Optional[float]) -> None:
+        if self.active < self.max_concurrency and self.queued == 0:
+            self.active += 1
+            return
+        if self.queued >= self.max_queue:
+            ADMISSION_REJECTED.inc(pool=self.name, reason="queue_full")
+            raise AdmissionRejected("queue full", self.retry_after())
+        timeout = self.queue_timeout if max_wait is None else min(self.queue_timeout, max_wait)
+        if timeout <= 0:
+            ADMISSION_REJECTED.inc(pool=self.name, reason="deadline")
+            raise AdmissionRejected("no budget left to wait", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(game, OrderedDict()).setdefault(session, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as we gave up: pass it on
+                self._release()
+            else:
+                waiter.cancel()
+                self._remove(game, session, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REJECTED.inc(pool=self.name, reason="timeout")
+                raise AdmissionRejected("queue timeout", self.retry_after()) from None
+            raise
+
+    def _remove(self, game: str, session: str, waiter: asyncio.Future) -> None:
+        sessions = self._waiters.get(game)
+        queue = sessions.get(session) if sessions else None
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self.queued -= 1
+        if not queue:
+            del sessions[session]
+        if not sessions:
+            del self._waiters[game]
+
+    def _release(self) -> None:
+        # Hand the slot to the next waiter: first game, first session, then rotate both
+        while self._waiters:
+            game, sessions = next(iter(self._waiters.items()))
+            session, queue = next(iter(sessions.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                sessions.move_to_end(session)
+            else:
+                del sessions[session]
+            if sessions:
+                self._waiters.move_to_end(game)
+            else:
+                del self._waiters[game]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
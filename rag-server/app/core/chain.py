@@ -1,117 +1,466 @@
 """RAG chain construction."""
 
-from langchain_openai import ChatOpenAI
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_chroma import Chroma
+from langchain_core.prompt_values import PromptValue
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser, JsonOutputParser
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda, RunnablePassthrough
+from langchain_core.utils.json import parse_json_markdown
+from pydantic import BaseModel, ValidationError
+
+from app.config.settings import (
+    CONTEXT_MAX_TOKENS,
+    LLM_MIN_BUDGET_MS,
+    OUTPUT_MODE,
+    PROMPT_LAYOUT,
+    RETRIEVE_K,
+)
+from app.core.citation import fallback_response, resolve_reference
+from app.core.context import AssembledContext, assemble_context
+from app.core.llm import get_chat_model
+from app.core.metrics import Counter
+from app.core.resilience import (
+    DEGRADED,
+    LLM_BREAKER,
+    UpstreamUnavailable,
+    deadline_exceeded,
+    remaining_budget,
+)
+from app.core.tokenizer import count_tokens
+from app.core.usage import USAGE_LEDGER, usage_from_message
+from app.core.tracing import LLMTracingHandler, annotate, span, traced_history_factory
+from app.core.vectorstore import hybrid_search
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+logger = logging.getLogger(__name__)
+
+PARSE_FAILURES = Counter(
+    "rag_output_parse_failures_total", "LLM outputs that could not be parsed", ("mode",)
+)
+LLM_PROMPT_TOKENS = Counter(
+    "rag_llm_prompt_tokens_total", "Prompt tokens billed by the LLM API", ("cache",)
+)
+
+
+class SchemaOutputParser(BaseOutputParser[dict]):
+    """Validates native structured output directly into the output schema."""
+
+    pydantic_object: type[BaseModel]
+
+    @property
+    def _type(self) -> str:
+        return "schema_output_parser"
+
+    def parse(self, text: str) -> dict:
+        try:
+            return self.pydantic_object.model_validate_json(text).model_dump()
+        except ValidationError:
+            pass
+        # Models without native structured output may still wrap the JSON in markdown
+        try:
+            return self.pydantic_object.model_validate(parse_json_markdown(text)).model_dump()
+        except (ValueError, ValidationError) as e:
+            raise OutputParserException(f"Invalid structured output: {e}", llm_output=text) from e
+
+
+def _response_format(output_structure: type[BaseModel]) -> dict:
+    """OpenAI strict JSON-schema response format for the output schema."""
+    schema = output_structure.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": output_structure.__name__, "schema": schema, "strict": True},
+    }
+
+
+def _log_prompt_tokens(prompt_value: PromptValue) -> PromptValue:
+    """Log the number of prompt tokens sent to the LLM and pass the prompt through."""
+    messages = prompt_value.to_messages()
+    # ~3 tokens of chat-format overhead per message
+    total = sum(count_tokens(str(m.content)) + 3 for m in messages)
+    logger.info(f"prompt tokens: {total} ({len(messages)} messages)")
+    annotate("prompt_tokens", total)
+    return prompt_value
+
+
+def _record_usage(message: AIMessage) -> AIMessage:
+    """Record billed prompt/output tokens and the share served from the provider's prompt cache."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return message
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    uncached = max(usage.get("input_tokens", 0) - cached, 0)
+    LLM_PROMPT_TOKENS.inc(cached, cache="hit")
+    LLM_PROMPT_TOKENS.inc(uncached, cache="miss")
+    annotate("llm_input_tokens", cached + uncached)
+    annotate("llm_cached_tokens", cached)
+    annotate("llm_output_tokens", usage.get("output_tokens", 0))
+    return message
+
+
+def _build_prompt(
+    prompt_template_class,
+    structured: bool,
+    layout: str,
+    reference: bool = False,
+    terms_normalized: bool = False,
+) -> ChatPromptTemplate:
+    """Assemble the chat prompt in the given message layout ("prefix" or "legacy")."""
+    def trim(system: str) -> str:
+        # The in-prompt term step is only dropped once the question was rewritten with a term index
+        if terms_normalized and hasattr(prompt_template_class, "without_term_normalization"):
+            return prompt_template_class.without_term_normalization(system)
+        return system
+
+    if layout == "prefix":
+        system = trim(
+            prompt_template_class.prefix_reference_system_template
+            if reference else prompt_template_class.prefix_system_template
+        )
+        if not structured:
+            # Format instructions are the same for every request: part of the cached prefix
+            system = f"{system}\n\n{prompt_template_class.format_template}"
+        return ChatPromptTemplate.from_messages([
+            ("system", system),
+            ("system", prompt_template_class.game_template),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("user", prompt_template_class.prefix_user_template),
+        ])
+
+    if structured:
+        # The schema travels as response_format; no format instructions in the prompt
+        user_template = getattr(
+            prompt_template_class, "structured_user_template", prompt_template_class.user_template
+        )
+    else:
+        user_template = prompt_template_class.user_template
+    system = trim(
+        prompt_template_class.reference_system_template
+        if reference else prompt_template_class.system_template
+    )
+    return ChatPromptTemplate.from_messages([
+        ("system", system),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("user", user_template),
+    ])
+
+
+def _guard_llm(llm: Runnable) -> Runnable:
+    """Call the LLM through its circuit breaker, cut off at the request's remaining budget."""
+    def admit():
+        remaining = remaining_budget()
+        if remaining is not None and remaining < LLM_MIN_BUDGET_MS / 1000:
+            raise UpstreamUnavailable("llm", "budget")
+        if not LLM_BREAKER.allow():
+            raise UpstreamUnavailable("llm", "breaker_open")
+        return remaining
+
+    def invoke(prompt_value: PromptValue, config: RunnableConfig):
+        # Sync callers (benchmarks, scripts) only get the pre-checks; the HTTP timeout still applies
+        admit()
+        try:
+            message = llm.invoke(prompt_value, config)
+        except Exception as e:
+            LLM_BREAKER.record_failure()
+            raise UpstreamUnavailable("llm", "error") from e
+        LLM_BREAKER.record_success()
+        return message
+
+    async def ainvoke(prompt_value: PromptValue, config: RunnableConfig):
+        remaining = admit()
+        try:
+            message = await asyncio.wait_for(llm.ainvoke(prompt_value, config), remaining)
+        except asyncio.TimeoutError as e:
+            if deadline_exceeded():
+                # Cut off by the request's own budget: a slow but healthy LLM must not trip the breaker
+                LLM_BREAKER.release()
+                raise UpstreamUnavailable("llm", "deadline") from e
+            LLM_BREAKER.record_failure()
+            raise UpstreamUnavailable("llm", "timeout") from e
+        except asyncio.CancelledError:
+            LLM_BREAKER.release()
+            raise
+        except Exception as e:
+            LLM_BREAKER.record_failure()
+            raise UpstreamUnavailable("llm", "error") from e
+        LLM_BREAKER.record_success()
+        return message
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="guarded_llm")
+
+
+def _degraded_answer(reference: bool):
+    """Fallback for an unavailable LLM: answer from the top context block, in the LLM's output shape."""
+    def answer(inputs: dict) -> AIMessage:
+        error: UpstreamUnavailable = inputs["error"]
+        logger.warning(f"answering without the LLM: {error}")
+        DEGRADED.inc(upstream="llm", reason=error.reason)
+        annotate("degraded", error.reason)
+        blocks = inputs["assembled"].blocks
+        response = fallback_response(blocks, inputs["question"])
+        if reference:
+            # Goes through resolve_reference like a model answer citing block [1]
+            response = {
+                "answer_type": response["answer_type"],
+                "description": response["description"],
+                "ref": 1 if blocks else None,
+            }
+        return AIMessage(
+            content=json.dumps(response, ensure_ascii=False),
+            response_metadata={"degraded": error.reason},
+        )
+
+    return RunnableLambda(answer, name="degraded_answer")
+
+
+def _timed(stage: str, runnable: Runnable) -> Runnable:
+    """Record the wall-clock time of a runnable (sync and async) as one stage."""
+    def invoke(inputs: dict, config: RunnableConfig):
+        with span(stage):
+            return runnable.invoke(inputs, config)
+
+    async def ainvoke(inputs: dict, config: RunnableConfig):
+        with span(stage):
+            return await runnable.ainvoke(inputs, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=stage)
 
 
 def create_rag_chain(
-    vectorstore: Chroma,
+    vectorstore: "Chroma",
     output_structure,
     prompt_template_class,
-    get_session_history_func
+    get_session_history_func,
+    model: BaseChatModel | None = None,
+    output_mode: str | None = None,
+    prompt_layout: str | None = None,
+    terms_normalized: bool = False,
 ):
     """
     RAG 체인 생성
     
     Args:
         vectorstore: ChromaDB 벡터스토어
-        output_structure: Pydantic 출력 스키마 클래스
+        output_structure: Pydantic 출력 스키마 클래스 (ref 필드가 있으면 블록 번호로 인용하고
+            출처 문장은 서버에서 추출)
         prompt_template_class: 프롬프트 템플릿 클래스
         get_session_history_func: 세션 히스토리 관리 함수
+        model: 사용할 채팅 모델 (None이면 공유 LLM 클라이언트, 벤치마크/테스트용 대체 가능)
+        output_mode: "structured"(네이티브 구조화 출력) 또는 "json"(프롬프트 포맷 지시), None이면 RAG_OUTPUT_MODE
+        prompt_layout: "prefix"(고정 지시문 → 게임 → 기록 → 컨텍스트 → 질문) 또는 "legacy", None이면 RAG_PROMPT_LAYOUT
+        terms_normalized: 질문이 게임의 용어 사전(terms.json)으로 이미 치환됐으면 True
+            (시스템 프롬프트의 용어 정규화 단계를 뺌)
         
     Returns:
         tuple: (chain_with_history, parser)
             - chain_with_history: 대화 기록을 포함한 RAG 체인
-            - parser: JSON 출력 파서
+              (config의 configurable.session_id로 기록을 읽고/저장, 기록 로드와 검색은 동시 실행,
+              출력은 {"message": AIMessage, "blocks": 프롬프트에 들어간 컨텍스트 블록,
+              "context_tokens": 컨텍스트 토큰 수})
+            - parser: 출력 파서 (parse 결과는 dict)
     """
-    # Parser 설정
-    parser = JsonOutputParser(pydantic_object=output_structure)
+    output_mode = output_mode or OUTPUT_MODE
+    prompt_layout = prompt_layout or PROMPT_LAYOUT
+    structured = output_mode == "structured"
+    reference = "ref" in output_structure.model_fields
     
-    # 프롬프트 템플릿 구성
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", prompt_template_class.system_template),
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("user", prompt_template_class.user_template),
-    ])
+    # LLM 설정 (워커 공유 클라이언트: 연결 풀 + 헤징)
+    if model is None:
+        model = get_chat_model()
     
-    # format_instructions는 고정
-    prompt_template = prompt_template.partial(
-        format_instructions=parser.get_format_instructions()
-    )
+    if structured:
+        parser = SchemaOutputParser(pydantic_object=output_structure)
+        llm = model.bind(response_format=_response_format(output_structure))
+    else:
+        parser = JsonOutputParser(pydantic_object=output_structure)
+        llm = model
     
-    # LLM 설정
-    model = ChatOpenAI(
-        temperature=0.3,
-        model_name="gpt-4o-mini",
+    # 프롬프트 템플릿 구성
+    prompt_template = _build_prompt(
+        prompt_template_class, structured, prompt_layout, reference, terms_normalized
     )
     
-    def retrieve_context(inputs):
-        """질문과 관련된 문서를 검색하여 컨텍스트로 반환"""
-        question = inputs["question"]
-        docs = vectorstore.similarity_search(question, k=5)
-        
-        # 메타데이터를 포함하여 컨텍스트 구성
-        context_parts = []
-        for doc in docs:
-            meta = doc.metadata
-            doc_type = meta.get('type', 'unknown')
-            section = meta.get('section_title', 'N/A')
-            page = meta.get('page', 'N/A')
-            source_content = meta.get('content', 'N/A')
-            
-            # 공통: type, section, page, 출처(content) 모두 포함
-            source_info = f"[Type: {doc_type}, Section: {section}, Page: {page}, Source: {source_content}]"
-            
-            content = f"{source_info}\n{doc.page_content}"
-            context_parts.append(content)
-            
-        return "\n\n---\n\n".join(context_parts)
+    # format_instructions는 고정
+    if "format_instructions" in prompt_template.input_variables:
+        prompt_template = prompt_template.partial(
+            format_instructions=JsonOutputParser(
+                pydantic_object=output_structure
+            ).get_format_instructions()
+        )
     
-    # 체인 구성: 컨텍스트 검색 → 프롬프트 → LLM
-    chain_without_parser = (
-        RunnablePassthrough.assign(context=retrieve_context)
-        | prompt_template 
-        | model
+    def retrieve_context(inputs) -> AssembledContext:
+        """질문과 관련된 문서를 검색하여 중복 제거된 컨텍스트로 반환"""
+        # Pre-retrieved documents (e.g. from a batched search) skip the vectorstore
+        docs = inputs.get("documents")
+        if docs is None:
+            docs = hybrid_search(vectorstore, [inputs["question"]], RETRIEVE_K)[0]
+
+        assembled = assemble_context(docs, CONTEXT_MAX_TOKENS)
+        logger.info(
+            f"context: {len(assembled.blocks)} blocks from {assembled.retrieved} hits, "
+            f"{assembled.tokens} tokens"
+        )
+        annotate("context_tokens", assembled.tokens)
+        return assembled
+
+    # 히스토리 로드/저장 시간 추적
+    history_factory = traced_history_factory(get_session_history_func)
+
+    def open_history(inputs, config: RunnableConfig):
+        """configurable.session_id의 대화 기록 객체 (아직 읽지 않음)"""
+        return history_factory(config["configurable"]["session_id"])
+
+    def load_history(inputs):
+        return inputs["history"].messages
+
+    def save_history(inputs):
+        """질문과 LLM 응답을 대화 기록에 저장하고 응답 메시지 + 컨텍스트 블록/토큰 수 반환"""
+        answer: AIMessage = inputs["answer"]
+        inputs["history"].add_messages([HumanMessage(content=inputs["question"]), answer])
+        return {
+            "message": answer,
+            "blocks": inputs["assembled"].blocks,
+            "context_tokens": inputs["assembled"].tokens,
+        }
+
+    # 히스토리 로드와 임베딩/검색은 서로 독립적인 네트워크 I/O라 동시에 실행
+    # (prepare = 둘 중 느린 쪽의 시간)
+    prepare = _timed(
+        "prepare",
+        RunnablePassthrough.assign(chat_history=load_history, assembled=retrieve_context)
+        | RunnablePassthrough.assign(context=lambda inputs: inputs["assembled"].text),
     )
-    
-    # 대화 기록을 포함한 체인
-    chain_with_history = RunnableWithMessageHistory(
-        chain_without_parser,
-        get_session_history_func,
-        input_messages_key="question",
-        history_messages_key="chat_history",
+
+    # 체인 구성: (히스토리 로드 ∥ 컨텍스트 검색) → 프롬프트 → (토큰 로깅) → LLM → (캐시 토큰 기록) → 히스토리 저장
+    # (LLM을 쓸 수 없으면 - 예산 부족/브레이커 open/타임아웃/오류 - 1위 블록으로 만든 답변으로 대체)
+    chain_with_history = (
+        RunnablePassthrough.assign(history=open_history)
+        | prepare
+        | RunnablePassthrough.assign(
+            answer=(
+                prompt_template
+                | RunnableLambda(_log_prompt_tokens)
+                | _guard_llm(llm.with_config(callbacks=[LLMTracingHandler()]))
+                | RunnableLambda(_record_usage)
+            ).with_fallbacks(
+                [_degraded_answer(reference)],
+                exceptions_to_handle=(UpstreamUnavailable,),
+                exception_key="error",
+            )
+        )
+        | RunnableLambda(save_history)
     )
-    
+
     return chain_with_history, parser
 
 
+def _parse(parser: BaseOutputParser, output: dict, question: str) -> dict:
+    """Parse the LLM output (counting failures per mode), resolve block references, flag degraded answers."""
+    with span("parse"):
+        try:
+            response = parser.parse(output["message"].content)
+        except OutputParserException:
+            mode = "structured" if isinstance(parser, SchemaOutputParser) else "json"
+            PARSE_FAILURES.inc(mode=mode)
+            raise
+        if "ref" in response:
+            # Cited by context block number: pick the source sentence locally
+            response = resolve_reference(response, output["blocks"], question)
+        if output["message"].response_metadata.get("degraded"):
+            response["degraded"] = True
+        return response
+
+
+# Chain config id for runs without a session (their history factory ignores it)
+_NO_SESSION = "no-session"
+
+
+def _record_ledger(output: dict, game: str, session_id: str | None) -> None:
+    """Add the run's billed LLM tokens and context tokens to the usage ledger."""
+    USAGE_LEDGER.record(
+        game, session_id, usage_from_message(output["message"], output.get("context_tokens", 0))
+    )
+
+
+def _build_inputs(question: str, game_title: str, documents: list[Document] | None) -> dict:
+    """Build chain inputs, attaching pre-retrieved documents when given."""
+    inputs = {"question": question, "game_title": game_title}
+    if documents is not None:
+        inputs["documents"] = documents
+    return inputs
+
+
 def ask_question(
     chain_with_history,
-    parser: JsonOutputParser,
+    parser: BaseOutputParser,
     question: str,
     game_title: str,
-    session_id: str = "default"
+    session_id: str | None = "default",
+    documents: list[Document] | None = None,
+    game_key: str | None = None,
 ) -> dict:
     """
     질문하고 구조화된 응답 받기
     
     Args:
         chain_with_history: 대화 기록이 포함된 RAG 체인
-        parser: JSON 출력 파서
+        parser: 출력 파서 (create_rag_chain 반환값)
         question: 사용자 질문
         game_title: 게임 타이틀
-        session_id: 세션 식별자 (기본값: "default")
+        session_id: 세션 식별자 (기본값: "default", None이면 저장하지 않는 히스토리 체인 전용이고 사용량은 게임 합계에만 기록)
+        documents: 미리 검색된 문서 (None이면 체인에서 검색)
+        game_key: 사용량 장부에 기록할 게임 키 (None이면 game_title)
         
     Returns:
-        dict: 구조화된 JSON 응답
+        dict: 구조화된 JSON 응답 (LLM 없이 만든 답변이면 degraded=True 포함)
     """
-    ai_message = chain_with_history.invoke(
-        {"question": question, "game_title": game_title},
-        config={"configurable": {"session_id": session_id}}
+    output = chain_with_history.invoke(
+        _build_inputs(question, game_title, documents),
+        config={"configurable": {"session_id": session_id or _NO_SESSION}}
     )
+    _record_ledger(output, game_key or game_title, session_id)
     
-    return parser.parse(ai_message.content)
+    return _parse(parser, output, question)
+
+
+async def aask_question(
+    chain_with_history,
+    parser: BaseOutputParser,
+    question: str,
+    game_title: str,
+    session_id: str | None = "default",
+    documents: list[Document] | None = None,
+    game_key: str | None = None,
+) -> dict:
+    """
+    ask_question의 비동기 버전 (이벤트 루프를 막지 않음)
+
+    Args:
+        chain_with_history: 대화 기록이 포함된 RAG 체인
+        parser: 출력 파서 (create_rag_chain 반환값)
+        question: 사용자 질문
+        game_title: 게임 타이틀
+        session_id: 세션 식별자 (기본값: "default", None이면 저장하지 않는 히스토리 체인 전용이고 사용량은 게임 합계에만 기록)
+        documents: 미리 검색된 문서 (None이면 체인에서 검색)
+        game_key: 사용량 장부에 기록할 게임 키 (None이면 game_title)
+
+    Returns:
+        dict: 구조화된 JSON 응답 (LLM 없이 만든 답변이면 degraded=True 포함)
+    """
+    output = await chain_with_history.ainvoke(
+        _build_inputs(question, game_title, documents),
+        config={"configurable": {"session_id": session_id or _NO_SESSION}}
+    )
+    _record_ledger(output, game_key or game_title, session_id)
+
+    return _parse(parser, output, question)
@@ -0,0 +1,161 @@
+"""Local source-sentence extraction for referenced answers.
+
+Copying rulebook sentences verbatim into the answer is the longest part of
+the LLM output. In reference mode (`RAG_SOURCE_EXTRACTION=1`) the model only
+returns the number of the supporting context block (`ref`); this module
+splits that block's source text into sentences, scores them against the
+answer and question with character n-gram similarity, and fills in `source`
+and `page` from the block. The response keeps the regular
+answer_type/description/source/page shape.
+
+The same extraction builds the degraded answer used when the LLM is skipped
+(see app.core.resilience): the top block's QA answer, or its best-matching
+rulebook sentence, without a model call.
+"""
+
+import re
+
+from app.core.context import ContextBlock
+from app.core.lexical import char_ngrams
+from app.core.metrics import Counter
+
+SOURCE_EXTRACTIONS = Counter(
+    "rag_source_extractions_total", "Source sentences extracted from cited context blocks", ("result",)
+)
+
+# Sentence ends: Korean/Latin terminal punctuation followed by space, or a line break
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?。])\s+|\s*\n+\s*")
+
+# A second sentence is kept only when it scores close to the best one
+_RUNNER_UP_RATIO = 0.75
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    출처 본문을 문장 단위로 분리
+
+    Args:
+        text: 룰북 원문
+
+    Returns:
+        list[str]: 공백을 정리한 문장 목록 (빈 문장 제외)
+    """
+    sentences = []
+    for part in _SENTENCE_BREAK.split(text):
+        sentence = " ".join(part.split())
+        # Bullet markers are layout, not part of the sentence
+        sentence = sentence.lstrip("-•* ").strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _dice(a, b) -> float:
+    total = sum(a.values()) + sum(b.values())
+    if not total:
+        return 0.0
+    return 2 * sum((a & b).values()) / total
+
+
+def extract_source(text: str, query: str, max_sentences: int = 2) -> str:
+    """
+    답변/질문과 가장 잘 맞는 근거 문장 선택
+
+    Args:
+        text: 인용된 블록의 출처 원문
+        query: 답변 설명 + 질문
+        max_sentences: 최대 문장 수
+
+    Returns:
+        str: 원문 순서를 유지한 근거 문장 (여러 개면 공백으로 연결)
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return sentences[0] if sentences else ""
+    query_grams = char_ngrams(query)
+    scores = [_dice(char_ngrams(sentence), query_grams) for sentence in sentences]
+    ranked = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)
+    best = scores[ranked[0]]
+    chosen = [ranked[0]] + [
+        i for i in ranked[1:max_sentences] if best and scores[i] >= _RUNNER_UP_RATIO * best
+    ]
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def _page_number(page) -> int | None:
+    if isinstance(page, int):
+        return page
+    if isinstance(page, str) and page.strip().isdigit():
+        return int(page.strip())
+    return None
+
+
+def resolve_reference(response: dict, blocks: list[ContextBlock], question: str) -> dict:
+    """
+    블록 번호(ref) 응답을 source/page가 채워진 일반 응답으로 변환
+
+    Args:
+        response: answer_type/description/ref 딕셔너리 (LLM 출력)
+        blocks: 프롬프트에 들어간 컨텍스트 블록 ([n]은 blocks[n-1])
+        question: 사용자 질문
+
+    Returns:
+        dict: answer_type/description/source/page 딕셔너리
+    """
+    resolved = {
+        "answer_type": response.get("answer_type"),
+        "description": response.get("description", ""),
+        "source": "",
+        "page": None,
+    }
+    ref = response.get("ref")
+    if ref is None or resolved["answer_type"] == "CANNOT_ANSWER":
+        SOURCE_EXTRACTIONS.inc(result="no_ref")
+        return resolved
+    if not isinstance(ref, int) or not 1 <= ref <= len(blocks):
+        SOURCE_EXTRACTIONS.inc(result="invalid_ref")
+        return resolved
+    block = blocks[ref - 1]
+    resolved["source"] = extract_source(block.source, f"{resolved['description']} {question}")
+    resolved["page"] = _page_number(block.page)
+    SOURCE_EXTRACTIONS.inc(result="extracted")
+    return resolved
+
+
+def _qa_answer(block: ContextBlock) -> str:
+    """Answer text of the block's first QA document ("" if the block has none)."""
+    for doc in block.documents:
+        if doc.metadata.get("type") != "QA":
+            continue
+        answer = doc.metadata.get("answer") or doc.page_content.partition("\nA:")[2]
+        if answer.strip():
+            return answer.strip()
+    return ""
+
+
+def fallback_response(blocks: list[ContextBlock], question: str) -> dict:
+    """
+    LLM 없이 검색 1위 블록으로 만든 답변 (예산 부족/LLM 장애 시 사용)
+
+    Args:
+        blocks: 프롬프트에 들어갈 컨텍스트 블록 (관련도 순)
+        question: 사용자 질문
+
+    Returns:
+        dict: answer_type/description/source/page 딕셔너리 (블록이 없으면 CANNOT_ANSWER)
+    """
+    if not blocks:
+        return {
+            "answer_type": "CANNOT_ANSWER",
+            "description": "지금은 답변을 만들 수 없어요. 잠시 후 다시 물어봐 주세요.",
+            "source": "",
+            "page": None,
+        }
+    block = blocks[0]
+    source = extract_source(block.source, question)
+    return {
+        "answer_type": "EXPLAIN",
+        "description": _qa_answer(block) or source,
+        "source": source,
+        "page": _page_number(block.page),
+    }
@@ -0,0 +1,181 @@
+"""Cold-start import profiling.
+
+Heavy provider SDKs (openai, chromadb, Upstage, boto3, tiktoken) are imported
+on first use instead of at module import time, so a fresh worker can answer
+/health before they are loaded. At startup the app logs how long its own
+import took and warns if any heavy module was still imported eagerly; the
+background warm-up then imports them one by one and logs each cost.
+
+Per-module report (runs `python -X importtime` in a subprocess):
+
+    python -m app.core.coldstart --top 25
+    python -m app.core.coldstart --health    # also time import + startup + /health
+"""
+
+import argparse
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Deferred until first real use (vectorstore load, LLM call, DynamoDB access)
+HEAVY_MODULES = (
+    "openai",
+    "langchain_openai",
+    "chromadb",
+    "langchain_chroma",
+    "langchain_upstage",
+    "boto3",
+    "tiktoken",
+)
+
+
+def eagerly_imported() -> list[str]:
+    """Heavy modules that are already imported (should be empty right after app import)."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def log_import_summary(import_seconds: float) -> None:
+    """
+    앱 import 시간과 미리 import된 무거운 모듈을 시작 로그에 기록
+
+    Args:
+        import_seconds: app.main import에 걸린 시간 (초)
+    """
+    logger.info(f"app import took {import_seconds * 1000:.0f} ms")
+    eager = eagerly_imported()
+    if eager:
+        logger.warning(f"heavy modules imported at startup (slows cold start): {', '.join(eager)}")
+
+
+def preload_heavy_modules() -> dict[str, float]:
+    """
+    지연된 무거운 모듈을 하나씩 import하고 모듈별 소요 시간 기록
+
+    Returns:
+        dict[str, float]: 모듈 이름 -> import 시간 (초, 이미 로드된 모듈은 0에 가까움)
+    """
+    timings = {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"preload skipped {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    summary = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+    logger.info(f"deferred modules loaded in {sum(timings.values()) * 1000:.0f} ms ({summary})")
+    return timings
+
+
+@dataclass
+class ImportCost:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> list[ImportCost]:
+    """Parse `-X importtime` output into per-module costs."""
+    costs = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+            costs.append(ImportCost(module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return costs
+
+
+def profile_imports(module: str = "app.main") -> list[ImportCost]:
+    """
+    새 인터프리터에서 모듈을 import하며 모듈별 import 비용 측정
+
+    Args:
+        module: 측정할 최상위 모듈
+
+    Returns:
+        list[ImportCost]: 모듈별 self/누적 import 시간 (마이크로초)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    return parse_importtime(result.stderr)
+
+
+_HEALTH_SCRIPT = """
+import asyncio, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+import httpx
+
+async def main():
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://local") as client:
+            response = await client.get("/api/v1/health")
+        done = time.perf_counter()
+        response.raise_for_status()
+        print(f"{imported - start:.3f} {started - imported:.3f} {done - start:.3f}")
+
+asyncio.run(main())
+"""
+
+
+def measure_time_to_health() -> tuple[float, float, float]:
+    """
+    새 인터프리터에서 import → 시작(lifespan) → 첫 /health 응답까지 걸린 시간 측정
+
+    Returns:
+        tuple[float, float, float]: (import 초, lifespan 시작 초, /health 응답까지 총 초)
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _HEALTH_SCRIPT],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "startup failed")
+    imported, started, total = (float(v) for v in result.stdout.split()[-3:])
+    return imported, started, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="rag-server cold-start import profile")
+    parser.add_argument("--module", default="app.main", help="module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="number of modules to list")
+    parser.add_argument("--sort", choices=("cumulative", "self"), default="cumulative")
+    parser.add_argument("--health", action="store_true", help="also measure time until /health responds")
+    args = parser.parse_args()
+
+    costs = profile_imports(args.module)
+    key = (lambda c: c.cumulative_us) if args.sort == "cumulative" else (lambda c: c.self_us)
+    total = next((c.cumulative_us for c in costs if c.module == args.module), 0)
+    print(f"import {args.module}: {total / 1000:.0f} ms")
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for cost in sorted(costs, key=key, reverse=True)[:args.top]:
+        print(f"{cost.self_us / 1000:9.1f} {cost.cumulative_us / 1000:9.1f}  {cost.module}")
+    loaded = {c.module for c in costs}
+    eager = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"heavy modules imported eagerly: {', '.join(eager) if eager else 'none'}")
+
+    if args.health:
+        imported, started, total = measure_time_to_health()
+        print(f"time to /health: {total * 1000:.0f} ms "
+              f"(import {imported * 1000:.0f} ms, startup {started * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Context assembly for the RAG prompt.
+
+QA documents from the JSON pipeline copy the rulebook `content` into their
+metadata, so a single retrieval often returns the same rulebook sentence
+several times (once per matching QA doc and once as the rulebook chunk).
+This module merges hits sharing the same source content into one block,
+renders a compact header and enforces a token budget.
+
+Block format:
+    [1] QA+rulebook | p.1 | 내용물
+    Source: <rulebook sentence>
+    Q: ...
+    A: ...
+"""
+
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from app.core.tokenizer import count_tokens, truncate_to_tokens
+
+BLOCK_SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class ContextBlock:
+    """동일한 출처(content)를 공유하는 검색 결과 묶음"""
+    source: str
+    section: str | None = None
+    page: int | str | None = None
+    types: list[str] = field(default_factory=list)
+    qa_pairs: list[str] = field(default_factory=list)
+    bodies: list[str] = field(default_factory=list)
+    documents: list[Document] = field(default_factory=list)
+
+    def render(self, index: int) -> str:
+        """블록을 프롬프트용 문자열로 변환"""
+        header_parts = ["+".join(self.types) or "unknown"]
+        if self.page not in (None, "", "N/A"):
+            header_parts.append(f"p.{self.page}")
+        if self.section:
+            header_parts.append(self.section)
+
+        lines = [f"[{index}] " + " | ".join(header_parts), f"Source: {self.source}"]
+        lines.extend(self.qa_pairs)
+        lines.extend(self.bodies)
+        return "\n".join(lines)
+
+
+@dataclass
+class AssembledContext:
+    """프롬프트에 들어갈 최종 컨텍스트"""
+    text: str
+    blocks: list[ContextBlock]
+    tokens: int
+    retrieved: int
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace so trivially different copies share one key."""
+    return " ".join(text.split())
+
+
+def merge_documents(docs: list[Document]) -> list[ContextBlock]:
+    """
+    같은 출처 문장을 가진 문서들을 하나의 블록으로 병합
+
+    Args:
+        docs: 유사도 순으로 정렬된 검색 결과
+
+    Returns:
+        list[ContextBlock]: 첫 등장 순서를 유지한 병합 블록 목록
+    """
+    blocks: dict[str, ContextBlock] = {}
+    for doc in docs:
+        meta = doc.metadata or {}
+        doc_type = meta.get("type") or "unknown"
+        source = meta.get("content") or doc.page_content
+        key = _normalize(source)
+
+        block = blocks.get(key)
+        if block is None:
+            block = ContextBlock(
+                source=source,
+                section=meta.get("section_title"),
+                page=meta.get("page"),
+            )
+            blocks[key] = block
+
+        block.documents.append(doc)
+        if doc_type not in block.types:
+            block.types.append(doc_type)
+
+        body = doc.page_content.strip()
+        if doc_type == "QA":
+            if body not in block.qa_pairs:
+                block.qa_pairs.append(body)
+        else:
+            # Rulebook chunks are "title\ncontent" or a slice of content; both
+            # are already covered by the Source line
+            normalized_body = _normalize(body)
+            covered = key in normalized_body or normalized_body in key
+            if not covered and body not in block.bodies:
+                block.bodies.append(body)
+
+    return list(blocks.values())
+
+
+def assemble_context(docs: list[Document], max_tokens: int) -> AssembledContext:
+    """
+    검색 결과를 중복 제거 후 토큰 예산 안에서 컨텍스트 문자열로 조립
+
+    Args:
+        docs: 유사도 순으로 정렬된 검색 결과
+        max_tokens: 컨텍스트에 허용되는 최대 토큰 수
+
+    Returns:
+        AssembledContext: 조립된 컨텍스트 (텍스트, 블록, 토큰 수)
+    """
+    separator_tokens = count_tokens(BLOCK_SEPARATOR)
+    rendered: list[str] = []
+    kept: list[ContextBlock] = []
+    used = 0
+
+    for block in merge_documents(docs):
+        text = block.render(len(kept) + 1)
+        cost = count_tokens(text) + (separator_tokens if rendered else 0)
+        if used + cost > max_tokens:
+            if not rendered:
+                # Always keep the best hit, trimmed to the budget
+                text = truncate_to_tokens(text, max_tokens)
+                rendered.append(text)
+                kept.append(block)
+                used = count_tokens(text)
+            break
+        rendered.append(text)
+        kept.append(block)
+        used += cost
+
+    return AssembledContext(
+        text=BLOCK_SEPARATOR.join(rendered),
+        blocks=kept,
+        tokens=used,
+        retrieved=len(docs),
+    )
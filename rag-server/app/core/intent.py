@@ -0,0 +1,183 @@
+"""Local intent classifier for greetings and small talk.
+
+Greetings, thanks, farewells and out-of-scope small talk ("안녕", "밥 먹었어?")
+do not need the rulebook: answering them through the chain still costs an
+embedding call, a vector search, a DynamoDB round trip and a full LLM
+completion. This classifier runs in front of the chain and answers them from
+templates instead.
+
+Scoring is two-tiered: an exact pattern set for the most common short forms,
+then character n-gram similarity (Dice over padded bigrams/trigrams) against
+example utterances per intent. It is tuned for precision: anything long, or
+that mentions game vocabulary or asks how/whether something works, falls
+through to the chain (which still handles chit-chat in its system prompt).
+"""
+
+import re
+from collections import Counter as NgramCounter
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.metrics import Counter
+
+QUESTION = "question"
+GREETING = "greeting"
+THANKS = "thanks"
+FAREWELL = "farewell"
+SMALLTALK = "smalltalk"
+
+INTENT_SHORTCUTS = Counter(
+    "rag_intent_shortcuts_total", "Questions answered locally by the intent classifier", ("intent",)
+)
+
+# Longer utterances are almost always real questions
+_MAX_CHARS = 20
+
+_NOISE = re.compile(r"[\s\W_ㅋㅎㅠㅜ]+")
+
+# Exact short forms (matched against the noise-stripped text)
+_PATTERNS = {
+    GREETING: re.compile(
+        r"(안녕|하이|헬로|방가|반가워|반갑다|hi|hello|hey|굿모닝|좋은아침)+"
+        r"(하세요|하십니까|요|하신가요|워요|습니다|친구|보보|보쌤|선생님)?"
+    ),
+    THANKS: re.compile(
+        r"(고마워|고맙|감사|땡큐|땡스|thanks|thankyou|thx|ㄱㅅ)"
+        r"(요|합니다|해요|해|드려요|드립니다|습니다|용|여)?"
+    ),
+    FAREWELL: re.compile(
+        r"(잘가|잘있어|안녕히계세요|안녕히가세요|바이|빠이|bye|또봐|다음에봐|수고했어|수고하셨습니다|수고)+"
+        r"(요|용)?"
+    ),
+}
+
+# Example utterances per intent for n-gram scoring
+_EXAMPLES = {
+    GREETING: (
+        "안녕", "안녕하세요", "안녕 반가워", "반갑습니다", "하이 안녕", "좋은 아침이에요",
+        "좋은 저녁", "처음 뵙겠습니다", "잘 지냈어", "오랜만이야",
+    ),
+    THANKS: (
+        "고마워", "감사합니다", "정말 고마워요", "덕분에 알았어 고마워", "알려줘서 고마워",
+        "도움이 됐어", "친절하게 알려줘서 감사해요", "최고야 고마워",
+    ),
+    FAREWELL: (
+        "잘가", "안녕히 계세요", "다음에 또 봐", "이제 그만할게", "오늘은 여기까지",
+        "수고했어", "나중에 또 물어볼게", "잘 있어",
+    ),
+    SMALLTALK: (
+        "밥 먹었어", "점심 뭐 먹었어", "오늘 날씨 어때", "날씨 좋다", "심심해", "뭐해",
+        "너는 누구야", "너 이름이 뭐야", "몇 살이야", "기분 어때", "오늘 기분 어때",
+        "사랑해", "노래 불러줘", "농담 해줘", "재밌는 얘기 해줘", "배고파", "졸려",
+        "피곤하다", "너 사람이야", "어디 살아",
+    ),
+}
+
+# Any of these means the user is asking about the game, not chatting
+_GAME_CUES = (
+    "게임", "규칙", "룰", "카드", "타일", "블록", "조커", "점수", "턴", "차례", "순서", "라운드",
+    "승리", "이기", "패배", "지면", "벌점", "등록", "배치", "버려", "뽑", "내도", "내려", "놓",
+    "가능", "할수", "해도", "되나", "돼", "되요", "돼요", "되는", "안되", "몇명", "몇장", "몇개",
+    "몇점", "몇번", "방법", "어떻게", "왜", "언제", "무슨", "규정", "설명",
+    "종", "광산", "사보", "곡괭이", "벨",
+)
+
+_NGRAM_SIZES = (2, 3)
+
+
+@dataclass(frozen=True)
+class IntentResult:
+    intent: str
+    score: float
+
+    @property
+    def is_shortcut(self) -> bool:
+        return self.intent != QUESTION
+
+
+def _compact(text: str) -> str:
+    return _NOISE.sub("", text.lower())
+
+
+def _ngrams(compact: str) -> NgramCounter:
+    padded = f"^{compact}$"
+    grams = NgramCounter()
+    for size in _NGRAM_SIZES:
+        grams.update(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return grams
+
+
+def _dice(a: NgramCounter, b: NgramCounter) -> float:
+    total = sum(a.values()) + sum(b.values())
+    if not total:
+        return 0.0
+    return 2 * sum((a & b).values()) / total
+
+
+_EXAMPLE_NGRAMS = {
+    intent: [_ngrams(_compact(example)) for example in examples]
+    for intent, examples in _EXAMPLES.items()
+}
+
+
+def classify_intent(question: str, min_score: float = 0.6) -> IntentResult:
+    """
+    질문이 인사/감사/작별/잡담인지 로컬에서 판별
+
+    Args:
+        question: 사용자 질문
+        min_score: n-gram 유사도 임계값 (0~1)
+
+    Returns:
+        IntentResult: 판별된 의도와 점수 (게임 질문이면 intent="question")
+    """
+    compact = _compact(question)
+    if not compact or len(compact) > _MAX_CHARS:
+        return IntentResult(QUESTION, 0.0)
+    if any(cue in compact for cue in _GAME_CUES):
+        return IntentResult(QUESTION, 0.0)
+
+    for intent, pattern in _PATTERNS.items():
+        if pattern.fullmatch(compact):
+            return IntentResult(intent, 1.0)
+
+    grams = _ngrams(compact)
+    best_intent, best_score = QUESTION, 0.0
+    for intent, examples in _EXAMPLE_NGRAMS.items():
+        for example in examples:
+            score = _dice(grams, example)
+            if score > best_score:
+                best_intent, best_score = intent, score
+    if best_score < min_score:
+        return IntentResult(QUESTION, best_score)
+    return IntentResult(best_intent, best_score)
+
+
+_TEMPLATES = {
+    GREETING: "안녕하세요! {game_title} 규칙에 대해 궁금한 점을 물어보세요.",
+    THANKS: "천만에요! {game_title} 규칙이 더 궁금하면 언제든 물어보세요.",
+    FAREWELL: "즐거운 {game_title} 게임 되세요! 규칙이 헷갈리면 언제든 다시 불러주세요.",
+    SMALLTALK: "저는 {game_title} 규칙을 알려드리는 도우미예요. 게임 규칙에 대해 물어봐 주세요.",
+}
+
+
+def template_response(intent: str, game_title: str) -> Optional[dict]:
+    """
+    의도별 고정 답변 (체인 출력과 같은 형식)
+
+    Args:
+        intent: classify_intent가 돌려준 의도
+        game_title: 게임 이름
+
+    Returns:
+        Optional[dict]: answer_type/description/source/page 딕셔너리, 게임 질문이면 None
+    """
+    template = _TEMPLATES.get(intent)
+    if template is None:
+        return None
+    return {
+        "answer_type": "EXPLAIN",
+        "description": template.format(game_title=game_title),
+        "source": "",
+        "page": None,
+    }
@@ -0,0 +1,220 @@
+"""Per-game lexical index for hybrid retrieval.
+
+Dense search alone often misses exact game terms (card names, numbers such as
+"106개"). Each loaded game therefore also gets an in-memory inverted index
+over character bigrams and trigrams of its chunks, built from the same
+documents as its Chroma collection. Whitespace and punctuation are dropped
+before n-gramming, so inconsistent Korean spacing ("할수" / "할 수") still
+matches.
+
+Lexical (BM25) and vector rankings are merged with reciprocal rank fusion.
+When the best lexical hit covers nearly all of the question's n-gram weight
+and clearly beats the runner-up (e.g. a question copied from the QA set, or a
+unique term), the lexical result is used on its own and the embedding call is
+skipped entirely.
+"""
+
+import logging
+import math
+import re
+import threading
+import weakref
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from app.core.multi_index import collection_scope
+from app.core.shared_index import SharedVectorIndex
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+")
+_NGRAM_SIZES = (2, 3)
+
+# BM25 parameters (common defaults)
+_K1 = 1.2
+_B = 0.75
+
+# Reciprocal rank fusion constant (from the original RRF paper)
+RRF_K = 60
+
+
+def char_ngrams(text: str) -> Counter:
+    """
+    공백/문장부호를 제거한 문자열의 문자 bigram/trigram 빈도
+
+    Args:
+        text: 질문 또는 문서 본문
+
+    Returns:
+        Counter: n-gram -> 등장 횟수
+    """
+    compact = _NON_WORD.sub("", text.lower())
+    grams = Counter()
+    for size in _NGRAM_SIZES:
+        grams.update(compact[i:i + size] for i in range(len(compact) - size + 1))
+    return grams
+
+
+@dataclass
+class LexicalHit:
+    document: Document
+    score: float
+    # Share of the question's idf weight found in the document (0~1)
+    coverage: float
+
+
+class LexicalIndex:
+    """BM25 over character n-grams with an inverted index (read-only after build)."""
+
+    def __init__(self, texts: list[str], metadatas: list[dict]):
+        self._texts = texts
+        self._metadatas = metadatas
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for doc_id, text in enumerate(texts):
+            grams = char_ngrams(text)
+            lengths.append(sum(grams.values()))
+            for gram, tf in grams.items():
+                self._postings[gram].append((doc_id, tf))
+        self._postings = dict(self._postings)
+        self._lengths = lengths
+        self._avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        n = len(texts)
+        self._idf = {
+            gram: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for gram, postings in self._postings.items()
+        }
+        # Weight of a gram that no chunk contains (the rarest possible)
+        self._max_idf = math.log(1 + (n + 0.5) / 0.5) if n else 0.0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: VectorStore) -> "LexicalIndex":
+        """
+        벡터스토어에 저장된 문서와 같은 문서로 색인 생성
+
+        Args:
+            vectorstore: Chroma, SharedVectorIndex 또는 GameScopedIndex
+
+        Returns:
+            LexicalIndex: 생성된 색인 (통합 인덱스면 해당 게임 문서만)
+        """
+        if isinstance(vectorstore, SharedVectorIndex):
+            return cls(vectorstore._texts, vectorstore._metadatas)
+        collection, where = collection_scope(vectorstore)
+        data = collection.get(where=where, include=["documents", "metadatas"])
+        return cls(
+            [text or "" for text in data["documents"]],
+            [meta or {} for meta in data["metadatas"]],
+        )
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search(self, query: str, k: int) -> list[LexicalHit]:
+        """
+        BM25 점수 상위 k개 문서 검색
+
+        Args:
+            query: 질문
+            k: 반환할 문서 수
+
+        Returns:
+            list[LexicalHit]: 점수 내림차순 결과 (일치하는 n-gram이 없으면 빈 목록)
+        """
+        grams = char_ngrams(query)
+        if not grams or not self._texts:
+            return []
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, float] = defaultdict(float)
+        total_weight = 0.0
+        for gram, query_tf in grams.items():
+            idf = self._idf.get(gram)
+            total_weight += (idf if idf is not None else self._max_idf) * query_tf
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[gram]:
+                norm = _K1 * (1 - _B + _B * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] += idf * tf * (_K1 + 1) / (tf + norm) * query_tf
+                matched[doc_id] += idf * query_tf
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            LexicalHit(
+                Document(page_content=self._texts[doc_id], metadata=dict(self._metadatas[doc_id])),
+                score,
+                matched[doc_id] / total_weight if total_weight else 0.0,
+            )
+            for doc_id, score in ranked
+        ]
+
+
+def is_decisive(hits: list[LexicalHit], min_coverage: float, min_margin: float = 1.5) -> bool:
+    """
+    어휘 검색 결과만으로 답해도 될 만큼 확실한지 판단
+
+    Args:
+        hits: search 결과 (점수 내림차순)
+        min_coverage: 1위 문서가 질문 n-gram 가중치를 덮어야 하는 최소 비율 (0~1)
+        min_margin: 1위 점수가 2위 점수보다 커야 하는 배수
+
+    Returns:
+        bool: 임베딩 없이 어휘 결과를 써도 되면 True
+    """
+    if min_coverage <= 0 or not hits or hits[0].coverage < min_coverage:
+        return False
+    return len(hits) == 1 or hits[0].score >= min_margin * hits[1].score
+
+
+def reciprocal_rank_fusion(rankings: Iterable[list[Document]], k: int) -> list[Document]:
+    """
+    여러 검색 결과 순위를 RRF로 합침 (같은 본문은 하나로 취급)
+
+    Args:
+        rankings: 검색기별 결과 목록 (각각 관련도 내림차순)
+        k: 반환할 문서 수
+
+    Returns:
+        list[Document]: 합산 점수 상위 k개 문서
+    """
+    scores: dict[str, float] = defaultdict(float)
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking):
+            key = document.page_content
+            scores[key] += 1 / (RRF_K + rank + 1)
+            documents.setdefault(key, document)
+    ranked = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    return [documents[key] for key in ranked]
+
+
+_indexes: "weakref.WeakKeyDictionary[VectorStore, Optional[LexicalIndex]]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(vectorstore: VectorStore) -> Optional[LexicalIndex]:
+    """
+    벡터스토어의 어휘 색인 (처음 요청 시 생성, 벡터스토어가 해제되면 같이 해제)
+
+    Args:
+        vectorstore: Chroma 또는 SharedVectorIndex
+
+    Returns:
+        Optional[LexicalIndex]: 색인, 문서를 읽을 수 없는 저장소면 None
+    """
+    if vectorstore in _indexes:
+        return _indexes[vectorstore]
+    with _indexes_lock:
+        if vectorstore in _indexes:
+            return _indexes[vectorstore]
+        try:
+            index = LexicalIndex.from_vectorstore(vectorstore)
+            logger.info(f"lexical index built: {len(index)} chunks, {len(index._postings)} n-grams")
+        except Exception as e:
+            # Remembered as None so the build is not retried on every request
+            logger.warning(f"lexical index unavailable, using vector search only: {e}")
+            index = None
+        _indexes[vectorstore] = index
+    return index
@@ -0,0 +1,369 @@
+"""Shared LLM client with pooled connections and hedged requests.
+
+Every chain in the worker shares one `ChatOpenAI` backed by long-lived httpx
+clients, so requests reuse warm TLS connections instead of opening new ones.
+Each attempt has an explicit deadline (`RAG_LLM_TIMEOUT_SECONDS`).
+
+Tail latency is cut by hedging: if the first attempt has not streamed a token
+within the `RAG_LLM_HEDGE_PERCENTILE` of recent time-to-first-token, a second
+identical attempt is fired and whichever finishes first wins; the other is
+cancelled. Hedge rate, wins and the estimated extra tokens are exported on
+/metrics.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from app.config.settings import (
+    LLM_HEDGE_MIN_DELAY_MS,
+    LLM_HEDGE_PERCENTILE,
+    LLM_MAX_RETRIES,
+    LLM_MODEL_NAME,
+    LLM_POOL_SIZE,
+    LLM_PREWARM_CONNECTIONS,
+    LLM_TIMEOUT_SECONDS,
+)
+from app.core.metrics import Counter, Gauge
+from app.core.tokenizer import count_tokens
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = Counter("rag_llm_calls_total", "LLM generations requested through the hedged client")
+LLM_HEDGES = Counter(
+    "rag_llm_hedges_total", "Hedged second LLM attempts fired", ("reason",)
+)
+LLM_HEDGE_WINS = Counter("rag_llm_hedge_wins_total", "Generations won by the hedged attempt")
+LLM_HEDGE_EXTRA_TOKENS = Counter(
+    "rag_llm_hedge_extra_tokens_total",
+    "Estimated tokens spent on losing hedged attempts",
+    ("kind",),
+)
+LLM_ATTEMPT_ERRORS = Counter(
+    "rag_llm_attempt_errors_total", "Failed LLM attempts", ("kind",)
+)
+LLM_HEDGE_DELAY = Gauge(
+    "rag_llm_hedge_delay_seconds", "Current time-to-first-token threshold that triggers a hedge"
+)
+
+
+class LatencyTracker:
+    """Rolling window of recent time-to-first-token samples."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100), or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+def _supports_streaming(model: BaseChatModel) -> bool:
+    cls = type(model)
+    return cls._stream is not BaseChatModel._stream or cls._astream is not BaseChatModel._astream
+
+
+def _prompt_tokens(messages: List[BaseMessage]) -> int:
+    # Same estimate as the chain's prompt logging (~3 tokens of overhead per message)
+    return sum(count_tokens(str(m.content)) + 3 for m in messages)
+
+
+class _Attempt:
+    """One in-flight LLM attempt of a hedged generation."""
+
+    def __init__(self, hedged: bool):
+        self.hedged = hedged
+        self.started = time.perf_counter()
+        self.first_token = asyncio.Event()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def mark_first_token(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.first_token.set()
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model wrapper that races a second attempt against a slow first one.
+
+    Only the async path hedges; sync calls are passed through to the wrapped
+    model unchanged.
+    """
+
+    model: BaseChatModel
+    hedge_percentile: float = 95.0
+    min_delay_seconds: float = 0.3
+    timeout_seconds: float = 20.0
+
+    _tracker: LatencyTracker = PrivateAttr(default_factory=LatencyTracker)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"hedged-{self.model._llm_type}"
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait for a first token before hedging (None: do not hedge)."""
+        if self.hedge_percentile <= 0:
+            return None
+        observed = self._tracker.percentile(self.hedge_percentile)
+        if observed is None:
+            return None
+        delay = min(max(observed, self.min_delay_seconds), self.timeout_seconds)
+        LLM_HEDGE_DELAY.set(delay)
+        return delay
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        yield from self.model._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            yield chunk
+
+    async def _run_attempt(
+        self,
+        attempt: _Attempt,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        on_first_token: Callable[[str], Awaitable[None]],
+        **kwargs: Any,
+    ) -> ChatResult:
+        if not _supports_streaming(self.model):
+            result = await self.model._agenerate(messages, stop=stop, **kwargs)
+            attempt.mark_first_token()
+            await on_first_token("")
+            return result
+
+        chunks: list[ChatGenerationChunk] = []
+        async for chunk in self.model._astream(messages, stop=stop, **kwargs):
+            if not chunks:
+                attempt.mark_first_token()
+                await on_first_token(chunk.text)
+            chunks.append(chunk)
+            attempt.chunks += 1
+        return generate_from_stream(iter(chunks))
+
+    def _start(
+        self,
+        hedged: bool,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        on_first_token: Callable[[str], Awaitable[None]],
+        **kwargs: Any,
+    ) -> _Attempt:
+        attempt = _Attempt(hedged)
+        attempt.task = asyncio.create_task(
+            asyncio.wait_for(
+                self._run_attempt(attempt, messages, stop, on_first_token, **kwargs),
+                timeout=self.timeout_seconds,
+            )
+        )
+        return attempt
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        LLM_CALLS.inc()
+        notified = False
+
+        async def on_first_token(token: str) -> None:
+            # Report the earliest token of any attempt so TTFT tracing still works
+            nonlocal notified
+            if not notified:
+                notified = True
+                if run_manager is not None:
+                    await run_manager.on_llm_new_token(token)
+
+        primary = self._start(False, messages, stop, on_first_token, **kwargs)
+        attempts = [primary]
+        winner: Optional[_Attempt] = None
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                token_wait = asyncio.create_task(primary.first_token.wait())
+                await asyncio.wait(
+                    {primary.task, token_wait}, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                token_wait.cancel()
+                failed = primary.task.done() and primary.task.exception() is not None
+                if failed or not primary.first_token.is_set():
+                    LLM_HEDGES.inc(reason="error" if failed else "slow")
+                    attempts.append(self._start(True, messages, stop, on_first_token, **kwargs))
+            winner = await self._first_success(attempts)
+        finally:
+            for attempt in attempts:
+                if not attempt.task.done():
+                    attempt.task.cancel()
+            self._record(primary, attempts, winner, messages)
+
+        if winner.hedged:
+            LLM_HEDGE_WINS.inc()
+        return winner.task.result()
+
+    @staticmethod
+    async def _first_success(attempts: List[_Attempt]) -> _Attempt:
+        by_task = {attempt.task: attempt for attempt in attempts}
+        pending = set(by_task)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    return by_task[task]
+                LLM_ATTEMPT_ERRORS.inc(kind="timeout" if isinstance(exc, asyncio.TimeoutError) else "error")
+                error = exc
+        raise error
+
+    def _record(
+        self,
+        primary: _Attempt,
+        attempts: List[_Attempt],
+        winner: Optional[_Attempt],
+        messages: List[BaseMessage],
+    ) -> None:
+        # A cancelled primary without a token still tells us TTFT was at least this long
+        end = primary.first_token_at or time.perf_counter()
+        self._tracker.observe(end - primary.started)
+        if len(attempts) > 1:
+            # The hedge doubled the prompt; the loser's streamed chunks are wasted output
+            loser = attempts[0] if winner is attempts[1] else attempts[1]
+            LLM_HEDGE_EXTRA_TOKENS.inc(_prompt_tokens(messages), kind="prompt")
+            LLM_HEDGE_EXTRA_TOKENS.inc(loser.chunks, kind="completion")
+
+
+_chat_model: Optional[BaseChatModel] = None
+_chat_model_lock = threading.Lock()
+
+
+def get_chat_model() -> BaseChatModel:
+    """
+    워커 전체에서 공유하는 LLM 클라이언트 반환 (최초 호출 시 생성)
+
+    Returns:
+        BaseChatModel: 연결 풀을 공유하는 ChatOpenAI (헤징 활성화 시 HedgedChatModel로 감쌈)
+    """
+    global _chat_model
+    if _chat_model is not None:
+        return _chat_model
+    with _chat_model_lock:
+        if _chat_model is None:
+            # Deferred: the openai SDK is the single largest import in the app
+            from langchain_openai import ChatOpenAI
+
+            limits = httpx.Limits(
+                max_connections=LLM_POOL_SIZE,
+                max_keepalive_connections=LLM_POOL_SIZE,
+                keepalive_expiry=60,
+            )
+            timeout = httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=5.0)
+            model: BaseChatModel = ChatOpenAI(
+                temperature=0.3,
+                model_name=LLM_MODEL_NAME,
+                # Stream internally so time-to-first-token can be traced and hedged on
+                streaming=True,
+                stream_usage=True,
+                timeout=LLM_TIMEOUT_SECONDS,
+                max_retries=LLM_MAX_RETRIES,
+                http_client=httpx.Client(limits=limits, timeout=timeout),
+                http_async_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+            )
+            if LLM_HEDGE_PERCENTILE > 0:
+                model = HedgedChatModel(
+                    model=model,
+                    hedge_percentile=LLM_HEDGE_PERCENTILE,
+                    min_delay_seconds=LLM_HEDGE_MIN_DELAY_MS / 1000,
+                    timeout_seconds=LLM_TIMEOUT_SECONDS,
+                )
+            _chat_model = model
+    return _chat_model
+
+
+def _openai_model(model: BaseChatModel) -> Optional["ChatOpenAI"]:
+    from langchain_openai import ChatOpenAI
+
+    inner = model.model if isinstance(model, HedgedChatModel) else model
+    return inner if isinstance(inner, ChatOpenAI) else None
+
+
+async def prewarm_llm_connections() -> None:
+    """Open pooled TLS connections to the LLM API before the first request needs them."""
+    try:
+        openai_model = _openai_model(get_chat_model())
+    except Exception as e:
+        logger.warning(f"LLM client unavailable, skipping pre-warm: {e}")
+        return
+    if openai_model is None or LLM_PREWARM_CONNECTIONS <= 0:
+        return
+    base_url = (openai_model.openai_api_base or "https://api.openai.com/v1").rstrip("/")
+    client = openai_model.http_async_client
+    # Unauthenticated requests are rejected cheaply but leave warm keep-alive connections
+    results = await asyncio.gather(
+        *(client.get(f"{base_url}/models") for _ in range(LLM_PREWARM_CONNECTIONS)),
+        return_exceptions=True,
+    )
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning(f"LLM connection pre-warm failed: {failures[0]}")
+    else:
+        logger.info(f"LLM connection pool pre-warmed ({len(results)} connections)")
+
+
+async def close_llm_clients() -> None:
+    """Close the shared HTTP clients (called on shutdown)."""
+    openai_model = _openai_model(_chat_model) if _chat_model is not None else None
+    if openai_model is None:
+        return
+    await openai_model.http_async_client.aclose()
+    openai_model.http_client.close()
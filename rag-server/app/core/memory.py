@@ -5,6 +5,9 @@ Refactors to:
 - Reuse a single boto3 Session/Resource.
 - Improve delete logic using the table key schema and pagination.
 - Support optional local DynamoDB endpoint for development (DDB_ENDPOINT_URL).
+- Serve reads from a bounded per-worker LRU and flush writes to DynamoDB
+  asynchronously in batches (write-behind), keeping DynamoDB latency off the
+  critical path of /chat.
 
 Notes:
 - Environment variables only read by name; no defaults for sensitive settings like table name.
@@ -12,22 +15,50 @@ Notes:
 """
 
 import os
-import boto3
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_community.chat_message_histories import DynamoDBChatMessageHistory
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
 from dotenv import load_dotenv
-from boto3.dynamodb.conditions import Key
-from typing import Optional, Dict, Any, List
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Sequence
+
+from app.config.settings import (
+    HISTORY_CACHE_SIZE,
+    HISTORY_CACHE_TTL_SECONDS,
+    HISTORY_FLUSH_INTERVAL_MS,
+)
+
+if TYPE_CHECKING:
+    import boto3
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Global cached session/resource
-_boto3_session: Optional[boto3.session.Session] = None
+_boto3_session: Optional["boto3.session.Session"] = None
 _dynamodb_resource = None
 
 MAX_HISTORY = 1 * 2 # 총 1개의 질문,답변을 저장 (질문/답변 각각 갯수로 쳐서 2 곱해야함)
 
-def _get_boto3_session() -> boto3.session.Session:
+# Item attribute names, compatible with LangChain's DynamoDBChatMessageHistory
+_PRIMARY_KEY = 'SessionId'
+_HISTORY_KEY = 'History'
+
+_VERSION_KEY = 'Version'
+
+# Pending sessions that wake the flusher before its interval
+_FLUSH_BATCH_SIZE = 25
+
+# Re-reads after a version conflict before a write is re-queued
+_MAX_MERGE_ATTEMPTS = 3
+
+def _get_boto3_session() -> "boto3.session.Session":
     """Create or return a cached boto3 Session.
 
     Prefer the default AWS credential/provider chain. Only pass explicit
@@ -35,6 +66,9 @@ def _get_boto3_session() -> boto3.session.Session:
     """
     global _boto3_session
     if _boto3_session is None:
+        # Deferred: botocore loads its service models at import time
+        import boto3
+
         aws_access_key = os.getenv('DDB_AWS_ACCESS_KEY')
         aws_secret_key = os.getenv('DDB_AWS_SECRET_ACCESS_KEY')
         region = os.getenv('DDB_AWS_REGION')
@@ -79,9 +113,280 @@ def _require_table_name() -> str:
     return table_name
 
 
+def _to_dynamodb_value(value: Any) -> Any:
+    """Convert floats to Decimal recursively; boto3 rejects native floats."""
+    if isinstance(value, list):
+        return [_to_dynamodb_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_dynamodb_value(v) for k, v in value.items()}
+    if isinstance(value, float):
+        return Decimal(str(value))
+    return value
+
+
+class _HistoryCache:
+    """Bounded, thread-safe LRU of session messages (with their stored version) and a TTL.
+
+    The TTL bounds how long a worker can serve a history another worker has
+    since changed; writes never rely on it (they are versioned).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, tuple[float, List[BaseMessage], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[tuple[List[BaseMessage], int]]:
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is None:
+                return None
+            stored_at, messages, version = entry
+            if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._items[session_id]
+                return None
+            self._items.move_to_end(session_id)
+            return list(messages), version
+
+    def put(self, session_id: str, messages: List[BaseMessage], version: int) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[session_id] = (time.monotonic(), list(messages), version)
+            self._items.move_to_end(session_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def set_version(self, session_id: str, base: int, version: int) -> None:
+        """Record a flushed version, unless the cached entry was replaced meanwhile."""
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is not None and entry[2] == base:
+                self._items[session_id] = (entry[0], entry[1], version)
+
+    def pop(self, session_id: str) -> None:
+        with self._lock:
+            self._items.pop(session_id, None)
+
+
+@dataclass
+class _PendingWrite:
+    """Unflushed state of one session: the full list plus the messages added since `base_version`."""
+    base_version: int
+    messages: List[Dict[str, Any]]
+    added: List[Dict[str, Any]]
+    history_size: int
+
+
+class _WriteBehindFlusher:
+    """Background thread that flushes pending history writes to DynamoDB.
+
+    Only the latest state per session is kept, so bursts of writes to the same
+    session collapse into a single PutItem. Each PutItem is conditional on the
+    version the state was built on; if another worker (or a delete) changed the
+    item meanwhile, the added messages are merged onto the current item instead
+    of overwriting it.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._pending: Dict[str, _PendingWrite] = {}
+        # Batch currently being written; still newer than what DynamoDB returns
+        self._flushing: Dict[str, _PendingWrite] = {}
+        self._pending_lock = threading.Lock()
+        # Held while a batch is written so deletes never race with a flush
+        self.flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="ddb-history-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def enqueue(self, session_id: str, write: _PendingWrite) -> None:
+        with self._pending_lock:
+            previous = self._pending.get(session_id)
+            if previous is not None:
+                # Still unflushed: keep its base so the merge carries both turns
+                write = _PendingWrite(
+                    previous.base_version, write.messages, previous.added + write.added, write.history_size
+                )
+            self._pending[session_id] = write
+            self._ensure_started()
+        if len(self._pending) >= _FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+
+    def discard(self, session_id: str) -> None:
+        with self._pending_lock:
+            self._pending.pop(session_id, None)
+
+    def unflushed(self, session_id: str) -> Optional[_PendingWrite]:
+        """Latest state of a session not yet confirmed in DynamoDB, if any."""
+        with self._pending_lock:
+            write = self._pending.get(session_id)
+            if write is None:
+                write = self._flushing.get(session_id)
+            return write
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"History flush failed: {e}")
+
+    def flush(self) -> None:
+        """Write all pending sessions to DynamoDB (versioned, merging on conflicts)."""
+        with self.flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                self._flushing = pending
+            if not pending:
+                return
+
+            failed: Dict[str, _PendingWrite] = {}
+            try:
+                table = _get_dynamodb_resource().Table(_require_table_name())
+                for session_id, write in pending.items():
+                    try:
+                        _write_versioned(table, session_id, write)
+                    except Exception as e:
+                        logger.error(f"History write failed for {session_id}: {e}")
+                        failed[session_id] = write
+            except Exception:
+                failed = pending
+                raise
+            finally:
+                with self._pending_lock:
+                    # Re-queue failures unless a newer state arrived meanwhile
+                    for session_id, write in failed.items():
+                        newer = self._pending.get(session_id)
+                        self._pending[session_id] = write if newer is None else _PendingWrite(
+                            write.base_version, newer.messages, write.added + newer.added, newer.history_size
+                        )
+                    self._flushing = {}
+
+
+def _read_item(table: Any, session_id: str) -> tuple[List[Dict[str, Any]], int]:
+    """Stored messages and version of a session (version 0 if it was never written)."""
+    response = table.get_item(Key={_PRIMARY_KEY: session_id}, ConsistentRead=True)
+    item = response.get('Item', {}) if response else {}
+    return item.get(_HISTORY_KEY, []), int(item.get(_VERSION_KEY, 0))
+
+
+def _put_if_version(table: Any, session_id: str, messages: List[Dict[str, Any]], expected: int) -> bool:
+    """PutItem only if the stored version is still `expected`; False on a conflict."""
+    condition = "attribute_not_exists(#ver)" if expected == 0 else "#ver = :expected"
+    kwargs: Dict[str, Any] = {
+        'Item': {
+            _PRIMARY_KEY: session_id,
+            _HISTORY_KEY: _to_dynamodb_value(messages),
+            _VERSION_KEY: expected + 1,
+        },
+        'ConditionExpression': condition,
+        'ExpressionAttributeNames': {'#ver': _VERSION_KEY},
+    }
+    if expected:
+        kwargs['ExpressionAttributeValues'] = {':expected': expected}
+    try:
+        table.put_item(**kwargs)
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def _write_versioned(table: Any, session_id: str, write: _PendingWrite) -> None:
+    """Persist one pending write; on a version conflict merge its added messages onto the stored ones."""
+    if _put_if_version(table, session_id, write.messages, write.base_version):
+        _history_cache.set_version(session_id, write.base_version, write.base_version + 1)
+        return
+    for _ in range(_MAX_MERGE_ATTEMPTS):
+        stored, version = _read_item(table, session_id)
+        merged = (list(stored) + write.added)[-write.history_size:]
+        if _put_if_version(table, session_id, merged, version):
+            # The cached copy misses the other writer's turns: reload it on the next read
+            _history_cache.pop(session_id)
+            return
+    raise RuntimeError(f"version conflict persisted after {_MAX_MERGE_ATTEMPTS} merges")
+
+
+_history_cache = _HistoryCache(HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL_SECONDS)
+_flusher = _WriteBehindFlusher(HISTORY_FLUSH_INTERVAL_MS / 1000)
+
+# Striped per-session locks around read-modify-write of a history
+_SESSION_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _session_lock(session_id: str) -> threading.Lock:
+    return _SESSION_LOCKS[hash(session_id) % len(_SESSION_LOCKS)]
+
+
+class CachedChatMessageHistory(BaseChatMessageHistory):
+    """Chat history served from the per-worker LRU, persisted write-behind.
+
+    Reads hit DynamoDB only on a cache miss; writes update the cache
+    immediately and are flushed to DynamoDB by a background thread. A session
+    evicted from the cache (or never cached, with a cache size of 0) while its
+    write is still unflushed is read back from the flusher, not DynamoDB.
+    Writes are versioned, so a stale cached copy in one worker never
+    overwrites turns written by another.
+    """
+
+    def __init__(self, session_id: str, history_size: int = MAX_HISTORY):
+        self.session_id = session_id
+        self.history_size = history_size
+
+    def _current(self) -> tuple[List[BaseMessage], int]:
+        """Messages and the stored version they are based on."""
+        cached = _history_cache.get(self.session_id)
+        if cached is not None:
+            return cached
+        unflushed = _flusher.unflushed(self.session_id)
+        if unflushed is not None:
+            return messages_from_dict(unflushed.messages)[-self.history_size:], unflushed.base_version
+        table = _get_dynamodb_resource().Table(_require_table_name())
+        stored, version = _read_item(table, self.session_id)
+        messages = messages_from_dict(stored)[-self.history_size:]
+        _history_cache.put(self.session_id, messages, version)
+        return messages, version
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        return self._current()[0]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with _session_lock(self.session_id):
+            current, version = self._current()
+            updated = (current + list(messages))[-self.history_size:]
+            _history_cache.put(self.session_id, updated, version)
+            _flusher.enqueue(self.session_id, _PendingWrite(
+                version, messages_to_dict(updated), messages_to_dict(list(messages)), self.history_size
+            ))
+
+    def clear(self) -> None:
+        delete_session_history(self.session_id)
+
+
+def flush_session_histories() -> None:
+    """Synchronously flush pending history writes (e.g. on shutdown)."""
+    try:
+        _flusher.flush()
+    except Exception as e:
+        logger.error(f"History flush failed: {e}")
+
+
+atexit.register(flush_session_histories)
+
+
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
     """
-    세션 ID별로 채팅 기록을 관리 (DynamoDB 기반)
+    세션 ID별로 채팅 기록을 관리 (LRU 캐시 + DynamoDB write-behind)
     
     Args:
         session_id: 세션 식별자
@@ -89,24 +394,20 @@ def get_session_history(session_id: str) -> BaseChatMessageHistory:
     Returns:
         BaseChatMessageHistory: 해당 세션의 채팅 기록
     """
-    table_name = _require_table_name()
-    session = _get_boto3_session()
-
-    return DynamoDBChatMessageHistory(
-        table_name=table_name,
-        session_id=session_id,
-        boto3_session=session,
-        history_size=MAX_HISTORY,
-    )
+    _require_table_name()
+    return CachedChatMessageHistory(session_id=session_id, history_size=MAX_HISTORY)
 
 
 def delete_session_history(session_id: str) -> bool:
     """
     특정 세션의 대화 기록을 DynamoDB에서 삭제
-    
+
+    항목을 지우는 대신 기록을 비우고 버전을 올려서, 다른 워커가 캐시에 들고 있던
+    이전 기록으로 덮어쓰지 못하게 함 (그 워커의 다음 저장은 빈 기록 위에 합쳐짐)
+
     Args:
         session_id: 세션 식별자
-        
+
     Returns:
         bool: 삭제 성공 여부
     """
@@ -114,46 +415,19 @@ def delete_session_history(session_id: str) -> bool:
         table_name = _require_table_name()
         table = _get_dynamodb_resource().Table(table_name)
 
-        # Query all items for this session_id with pagination
-        last_evaluated_key: Optional[Dict[str, Any]] = None
-        items: List[Dict[str, Any]] = []
-        while True:
-            kwargs: Dict[str, Any] = {
-                'KeyConditionExpression': Key('SessionId').eq(session_id)
-            }
-            if last_evaluated_key:
-                kwargs['ExclusiveStartKey'] = last_evaluated_key
-
-            response = table.query(**kwargs)
-            items.extend(response.get('Items', []))
-            last_evaluated_key = response.get('LastEvaluatedKey')
-            if not last_evaluated_key:
-                break
-
-        if not items:
-            return True
-
-        # Build delete keys using the table's key schema
-        key_schema = table.key_schema  # e.g., [{'AttributeName': 'SessionId', 'KeyType': 'HASH'}, ...]
-
-        def build_key(it: Dict[str, Any]) -> Dict[str, Any]:
-            key: Dict[str, Any] = {}
-            for ks in key_schema:
-                attr = ks['AttributeName']
-                if attr in it:
-                    key[attr] = it[attr]
-            # Fallback: at least provide partition key when schema unavailable
-            if not key and 'SessionId' in it:
-                key['SessionId'] = it['SessionId']
-            return key
-
-        with table.batch_writer() as batch:
-            for item in items:
-                key = build_key(item)
-                if key:
-                    batch.delete_item(Key=key)
-
+        # Drop cached state and hold the flush lock for the whole delete so an
+        # in-flight write-behind batch cannot resurrect the session afterwards
+        with _session_lock(session_id):
+            _history_cache.pop(session_id)
+            with _flusher.flush_lock:
+                _flusher.discard(session_id)
+                table.update_item(
+                    Key={_PRIMARY_KEY: session_id},
+                    UpdateExpression="SET #hist = :empty ADD #ver :one",
+                    ExpressionAttributeNames={'#hist': _HISTORY_KEY, '#ver': _VERSION_KEY},
+                    ExpressionAttributeValues={':empty': [], ':one': 1},
+                )
         return True
     except Exception as e:
-        print(f"Error deleting session {session_id}: {e}")
+        logger.error(f"Error deleting session {session_id}: {e}")
         return False
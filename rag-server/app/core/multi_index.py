@@ -0,0 +1,180 @@
+"""Per-game views over the consolidated multi-game index.
+
+The vector DB generator can write every game into one Chroma collection
+(`embed_json_rulebooks.py --shared`), each chunk tagged with its `game_key`.
+Catalog entries of those games carry `"shared": true` and all point at the
+same index directory.
+
+The collection is opened once per index version and shared by every game:
+a `GameScopedIndex` is a lightweight view that adds a `game_key` filter to
+vector queries and to the document export used by the lexical index and the
+pre-fork shared matrix. Views are reference counted, so the underlying Chroma
+client is closed only when the last game using that index version is evicted
+or swapped out.
+
+The unscoped view (`game_key="auto"`) searches all games at once; the game of
+a question that does not name one is inferred from its top hits.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+logger = logging.getLogger(__name__)
+
+# Chunk metadata naming the game in a consolidated index
+GAME_KEY_FIELD = "game_key"
+
+# Pseudo game key: search every game of the consolidated index
+AUTO_GAME = "auto"
+
+
+class GameScopedIndex(VectorStore):
+    """One game's view of a shared Chroma collection (all games when game_key is None)."""
+
+    def __init__(self, store: "Chroma", game_key: Optional[str], key: tuple[str, str]):
+        self.store = store
+        self.game_key = game_key
+        self._key = key
+        self._closed = False
+
+    @property
+    def where(self) -> Optional[dict]:
+        """Chroma metadata filter of this view (None for the cross-game view)."""
+        if self.game_key is None:
+            return None
+        return {GAME_KEY_FIELD: self.game_key}
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.store.embeddings
+
+    def close(self) -> None:
+        """Return this view's reference; the last one closes the shared client."""
+        if self._closed:
+            return
+        self._closed = True
+        _STORES.release(self._key)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.store.similarity_search(query, k, filter=self.where)
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.store.similarity_search_by_vector(embedding, k, filter=self.where)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[list[dict]] = None, **kwargs: Any) -> list[str]:
+        # TypeError, not ValueError: routers map ValueError to 404 (unknown game)
+        raise TypeError("읽기 전용 인덱스 뷰입니다: 통합 인덱스의 게임 뷰에는 문서를 추가할 수 없습니다")
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: Optional[list[dict]] = None, **kwargs: Any):
+        raise TypeError(
+            "읽기 전용 인덱스 뷰입니다: 통합 인덱스는 벡터 DB 생성기(embed_json_rulebooks.py --shared)로 만드세요"
+        )
+
+
+def collection_scope(vectorstore: VectorStore) -> tuple[Any, Optional[dict]]:
+    """
+    벡터스토어의 Chroma 컬렉션과 게임 필터
+
+    Args:
+        vectorstore: Chroma 또는 GameScopedIndex
+
+    Returns:
+        tuple: (Chroma 컬렉션, where 필터; 게임별 인덱스면 None)
+    """
+    if isinstance(vectorstore, GameScopedIndex):
+        return vectorstore.store._collection, vectorstore.where
+    return vectorstore._collection, None
+
+
+class _SharedStores:
+    """Open consolidated collections keyed by (index dir, collection), reference counted."""
+
+    def __init__(self):
+        self._stores: dict[tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def open(self, db_path: str, collection: str, embeddings: Embeddings, game_key: Optional[str]) -> GameScopedIndex:
+        key = (db_path, collection)
+        with self._lock:
+            entry = self._stores.get(key)
+            if entry is None:
+                # Deferred like load_vectorstore: chromadb imports are slow
+                from langchain_chroma import Chroma
+
+                store = Chroma(
+                    persist_directory=db_path,
+                    embedding_function=embeddings,
+                    collection_name=collection,
+                )
+                entry = self._stores[key] = [store, 0]
+                logger.info(f"consolidated index opened: {db_path} ({collection})")
+            entry[1] += 1
+            return GameScopedIndex(entry[0], game_key, key)
+
+    def release(self, key: tuple[str, str]) -> None:
+        with self._lock:
+            entry = self._stores.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._stores[key]
+        close = getattr(entry[0]._client, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"failed to close consolidated index client: {e}")
+        logger.info(f"consolidated index closed: {key[0]}")
+
+
+_STORES = _SharedStores()
+
+
+def open_game_view(
+    db_path: str, collection: str, embeddings: Embeddings, game_key: Optional[str]
+) -> GameScopedIndex:
+    """
+    통합 인덱스에서 게임 하나(또는 전체)의 뷰 생성 (같은 인덱스는 한 번만 엶)
+
+    Args:
+        db_path: 통합 인덱스의 현재 버전 경로
+        collection: 컬렉션 이름
+        embeddings: 질문 임베딩 모델
+        game_key: 걸러낼 게임 키 (None이면 모든 게임)
+
+    Returns:
+        GameScopedIndex: 사용이 끝나면 close()로 반환해야 하는 뷰
+    """
+    return _STORES.open(db_path, collection, embeddings, game_key)
+
+
+def infer_game(documents: list[Document]) -> Optional[str]:
+    """
+    교차 게임 검색 결과로 질문의 게임 판별 (순위 역수 합이 가장 큰 게임)
+
+    Args:
+        documents: 모든 게임 대상 검색 결과 (관련도 순)
+
+    Returns:
+        Optional[str]: 게임 키, game_key 메타데이터가 있는 문서가 없으면 None
+    """
+    scores: dict[str, float] = defaultdict(float)
+    for rank, doc in enumerate(documents):
+        game_key = doc.metadata.get(GAME_KEY_FIELD)
+        if game_key:
+            scores[game_key] += 1 / (rank + 1)
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
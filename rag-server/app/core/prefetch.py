@@ -0,0 +1,171 @@
+"""Speculative retrieval from interim speech transcripts.
+
+While the user is still talking, the voice client sends partial transcripts
+to /prefetch. Each one starts a background retrieval (embedding + search)
+whose result is kept per game/session for a short time. When the final
+question arrives at /chat, the closest recent prefetch is reused if its text
+is similar enough, so embedding and retrieval are already done (or at least
+under way) by the time the LLM call starts.
+
+Entries are one-shot: a /chat lookup consumes all prefetches of its session.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from app.core.metrics import Counter
+from app.core.singleflight import normalize_question
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PREFETCH_REQUESTS = Counter(
+    "rag_prefetch_requests_total", "Interim transcripts received for prefetch", ("result",)
+)
+PREFETCH_LOOKUPS = Counter(
+    "rag_prefetch_lookups_total", "Final questions checked against prefetched retrievals", ("result",)
+)
+
+
+def text_similarity(a: str, b: str) -> float:
+    """
+    두 질문의 정규화된 문자열 유사도 (0~1)
+
+    Args:
+        a: 질문 1
+        b: 질문 2
+
+    Returns:
+        float: SequenceMatcher 비율
+    """
+    return SequenceMatcher(None, normalize_question(a), normalize_question(b)).ratio()
+
+
+@dataclass
+class _Prefetch:
+    text: str
+    task: asyncio.Task
+    created_at: float
+
+
+class PrefetchCache(Generic[T]):
+    """Per-session, short-lived cache of speculative retrievals."""
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        min_similarity: float,
+        max_sessions: int = 2048,
+        per_session: int = 3,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.max_sessions = max_sessions
+        self.per_session = per_session
+        self._sessions: OrderedDict[Hashable, list[_Prefetch]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def schedule(self, key: Hashable, text: str, fn: Callable[[], Awaitable[T]]) -> str:
+        """
+        중간 전사문에 대한 검색을 백그라운드로 시작
+
+        Args:
+            key: 세션 키 (예: (game_key, session_id))
+            text: 중간 전사문
+            fn: 검색을 수행하는 코루틴 함수
+
+        Returns:
+            str: "scheduled" 또는 "duplicate" (같은 문장을 이미 검색 중/완료)
+        """
+        entries = self._live(key)
+        normalized = normalize_question(text)
+        if any(normalize_question(entry.text) == normalized for entry in entries):
+            PREFETCH_REQUESTS.inc(result="duplicate")
+            return "duplicate"
+
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(_consume_exception)
+        entries.append(_Prefetch(text, task, time.monotonic()))
+        # Keep only the latest few partials (the final text usually extends them)
+        for stale in entries[:-self.per_session]:
+            stale.task.cancel()
+        self._sessions[key] = entries[-self.per_session:]
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            _, dropped = self._sessions.popitem(last=False)
+            for entry in dropped:
+                entry.task.cancel()
+        PREFETCH_REQUESTS.inc(result="scheduled")
+        return "scheduled"
+
+    async def take(self, key: Hashable, text: str) -> Optional[T]:
+        """
+        최종 질문과 충분히 비슷한 prefetch 결과를 꺼냄 (세션의 prefetch는 모두 소비됨)
+
+        Args:
+            key: 세션 키
+            text: 최종 질문
+
+        Returns:
+            Optional[T]: 재사용 가능한 검색 결과, 없으면 None
+        """
+        entries = self._live(key)
+        self._sessions.pop(key, None)
+        if not entries:
+            PREFETCH_LOOKUPS.inc(result="miss")
+            return None
+
+        best, score = None, 0.0
+        for entry in entries:
+            similarity = text_similarity(entry.text, text)
+            # Prefer the most recent partial on ties
+            if similarity >= score:
+                best, score = entry, similarity
+        for entry in entries:
+            if entry is not best:
+                entry.task.cancel()
+        if best is None or score < self.min_similarity:
+            if best is not None:
+                best.task.cancel()
+            PREFETCH_LOOKUPS.inc(result="mismatch")
+            return None
+
+        try:
+            # Still running: waiting is cheaper than starting over
+            result = await asyncio.shield(best.task)
+        except asyncio.CancelledError:
+            if not best.task.cancelled():
+                raise
+            PREFETCH_LOOKUPS.inc(result="miss")
+            return None
+        except Exception as e:
+            logger.warning(f"prefetch failed, retrieving normally: {e}")
+            PREFETCH_LOOKUPS.inc(result="error")
+            return None
+        PREFETCH_LOOKUPS.inc(result="hit")
+        return result
+
+    def _live(self, key: Hashable) -> list[_Prefetch]:
+        """Entries of a session that are still within the TTL (expired ones are dropped)."""
+        now = time.monotonic()
+        live = []
+        for entry in self._sessions.get(key, []):
+            if now - entry.created_at <= self.ttl_seconds:
+                live.append(entry)
+            else:
+                entry.task.cancel()
+        return live
+
+
+def _consume_exception(task: asyncio.Task) -> None:
+    # Prefetches are often never awaited; keep failures out of "never retrieved" warnings
+    if not task.cancelled():
+        task.exception()
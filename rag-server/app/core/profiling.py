@@ -0,0 +1,254 @@
+"""On-demand CPU and memory profiling for a running worker.
+
+Nothing here runs until an admin endpoint asks for it, so the cost while
+profiling is off is zero:
+
+- CPU: a background thread samples every thread's Python stack
+  (`sys._current_frames`) at a fixed interval for N seconds and aggregates
+  them into collapsed stacks ("frame;frame;frame count" lines), the input
+  format of flamegraph.pl, speedscope and inferno. Wall-clock sampling: idle
+  threads show up waiting in their blocking call.
+- Memory: `tracemalloc` is started on request; snapshots are kept (a few,
+  newest last) so any two can be diffed by allocation site. Stopping it
+  drops the snapshots and the tracing overhead.
+
+Profiles are per worker process (the one that served the admin request).
+"""
+
+import os
+import site
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# Snapshots kept for diffing (oldest dropped first)
+_MAX_SNAPSHOTS = 8
+
+
+class ProfilerBusy(Exception):
+    """A CPU profile is already running in this worker."""
+
+
+# Longest first, so site-packages wins over the stdlib directory containing it
+_PATH_PREFIXES = sorted(
+    {
+        os.path.join(path, "")
+        for path in (*site.getsitepackages(), sysconfig.get_paths()["stdlib"], os.getcwd())
+        if path
+    },
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(path: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames in the collapsed format (the count follows the last space)
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame, thread_name: str) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.append(f"thread {thread_name}".replace(";", ":"))
+    return ";".join(reversed(stack))
+
+
+@dataclass
+class CpuProfile:
+    """샘플링 CPU 프로파일 결과"""
+    stacks: Counter
+    samples: int
+    seconds: float
+    interval: float
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope에 바로 넣을 수 있는 collapsed stack 텍스트"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler over all Python threads (one profile at a time)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def run(self, seconds: float, interval: float = 0.01) -> CpuProfile:
+        """
+        현재 스레드에서 seconds 동안 다른 스레드들의 스택을 샘플링 (호출한 스레드는 막힘)
+
+        Args:
+            seconds: 프로파일 시간 (초)
+            interval: 샘플 간격 (초)
+
+        Returns:
+            CpuProfile: collapsed stack별 샘플 수
+
+        Raises:
+            ProfilerBusy: 이미 다른 프로파일이 실행 중
+        """
+        with self._lock:
+            if self._running:
+                raise ProfilerBusy("CPU profile already running")
+            self._running = True
+        try:
+            me = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            while True:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != me:
+                        stacks[_collapse(frame, names.get(ident, str(ident)))] += 1
+                samples += 1
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                time.sleep(min(interval, remaining))
+            return CpuProfile(stacks, samples, time.perf_counter() - started, interval)
+        finally:
+            self._running = False
+
+
+class MemoryProfiler:
+    """tracemalloc control with numbered snapshots for diffing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: dict[int, tracemalloc.Snapshot] = {}
+        self._next_id = 1
+
+    def start(self, frames: int = 10) -> bool:
+        """tracemalloc 시작 (이미 켜져 있으면 False)"""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames)
+        return True
+
+    def stop(self) -> None:
+        """tracemalloc 종료 및 스냅샷 삭제"""
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshot_ids = list(self._snapshots)
+        return {
+            "tracing": tracing,
+            "traceback_frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshots": snapshot_ids,
+        }
+
+    def snapshot(self, top: int = 20) -> dict:
+        """
+        스냅샷을 찍고 할당 위치별 상위 항목 반환
+
+        Args:
+            top: 반환할 할당 위치 수
+
+        Returns:
+            dict: 스냅샷 id, 추적 중인 메모리, 상위 할당 위치
+
+        Raises:
+            ValueError: tracemalloc이 꺼져 있음
+        """
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc이 꺼져 있습니다 (먼저 시작하세요)")
+        snapshot = _filtered(tracemalloc.take_snapshot())
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > _MAX_SNAPSHOTS:
+                self._snapshots.pop(next(iter(self._snapshots)))
+        stats = snapshot.statistics("lineno")
+        return {
+            "id": snapshot_id,
+            "traced_bytes": sum(stat.size for stat in stats),
+            "top": [
+                {"location": _location(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in stats[:top]
+            ],
+        }
+
+    def diff(self, base: int, target: Optional[int] = None, top: int = 20) -> dict:
+        """
+        두 스냅샷 사이의 할당 위치별 증감
+
+        Args:
+            base: 기준 스냅샷 id
+            target: 비교할 스냅샷 id (None이면 가장 최근)
+            top: 반환할 할당 위치 수 (증가량 절댓값 순)
+
+        Returns:
+            dict: 전체 증감과 상위 할당 위치
+
+        Raises:
+            ValueError: 없는 스냅샷 id
+        """
+        with self._lock:
+            if target is None and self._snapshots:
+                target = next(reversed(self._snapshots))
+            old = self._snapshots.get(base)
+            new = self._snapshots.get(target) if target is not None else None
+        if old is None or new is None:
+            raise ValueError(f"스냅샷을 찾을 수 없습니다: base={base}, target={target}")
+        stats = new.compare_to(old, "lineno")
+        return {
+            "base": base,
+            "target": target,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "location": _location(stat.traceback),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:top]
+            ],
+        }
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    # The profiler's own bookkeeping is not interesting
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def _location(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+# One of each per worker process
+CPU_PROFILER = SamplingProfiler()
+MEMORY_PROFILER = MemoryProfiler()
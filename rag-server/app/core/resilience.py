@@ -0,0 +1,178 @@
+"""Per-request latency budget and per-upstream circuit breakers.
+
+`/chat` starts a deadline (`RAG_CHAT_DEADLINE_MS`) that every stage reads
+from a ContextVar, like the request trace: the embedding call gets the
+remaining time as its HTTP timeout, and the LLM call is cut off so a
+fallback answer can still be returned within the budget.
+
+Each upstream (Upstage embeddings, OpenAI LLM) has a circuit breaker. After
+`failure_threshold` consecutive failures (errors or timeouts) it opens and
+calls are skipped outright for `reset_seconds`; then a single probe call is
+let through (half-open) and its outcome closes or re-opens the breaker.
+A call cut off because the request's own budget ran out says nothing about
+the upstream and is not counted as a failure.
+
+When an upstream is skipped the pipeline degrades instead of failing:
+retrieval falls back to the lexical index, and the answer is built from the
+top retrieved chunk without the LLM (see app.core.chain).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.config.settings import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_TRANSITIONS = Counter(
+    "rag_circuit_breaker_transitions_total", "Circuit breaker state changes", ("upstream", "state")
+)
+DEGRADED = Counter(
+    "rag_degraded_total", "Upstream calls skipped or cut off with a fallback result", ("upstream", "reason")
+)
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call was skipped or failed; the caller should degrade."""
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"{upstream} unavailable: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("rag_request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[None]:
+    """
+    현재 요청의 지연 예산 설정 (0 이하면 예산 없음)
+
+    Args:
+        seconds: 요청 전체에 허용되는 시간 (초)
+    """
+    token = _deadline.set(time.monotonic() + seconds if seconds > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    현재 요청의 남은 예산 (초)
+
+    Returns:
+        Optional[float]: 남은 시간 (음수면 초과), 예산이 없는 요청이면 None
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def deadline_exceeded() -> bool:
+    """
+    현재 요청의 예산을 다 썼는지 (예산 때문에 끊긴 호출은 업스트림 실패가 아님)
+
+    Returns:
+        bool: 예산이 있고 남은 시간이 없으면 True
+    """
+    remaining = remaining_budget()
+    return remaining is not None and remaining <= 0
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, upstream: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        이번 호출을 업스트림에 보내도 되는지 확인 (half-open이면 한 번만 허용)
+
+        Returns:
+            bool: 호출 가능하면 True (threshold가 0 이하면 항상 True)
+        """
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and 0 < self.failure_threshold <= self._failures
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give up a call without an outcome (e.g. the request was cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def _transition(self, state: str) -> None:
+        # Called with the lock held
+        self._state = state
+        BREAKER_TRANSITIONS.inc(upstream=self.upstream, state=state)
+        logger.warning(f"circuit breaker {self.upstream}: {state}")
+
+
+def register_breaker_gauge(breakers: dict[str, CircuitBreaker]) -> None:
+    """Export breaker states on /metrics (0 closed, 1 half-open, 2 open)."""
+    Gauge(
+        "rag_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+        ("upstream",),
+        callback=lambda: {(name,): _STATE_VALUES[b.state] for name, b in breakers.items()},
+    )
+
+
+# One breaker per upstream, shared by every request in the worker
+LLM_BREAKER = CircuitBreaker("llm", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+EMBEDDING_BREAKER = CircuitBreaker("embedding", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+register_breaker_gauge({"llm": LLM_BREAKER, "embedding": EMBEDDING_BREAKER})
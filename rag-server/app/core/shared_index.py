@@ -0,0 +1,124 @@
+"""Read-only in-memory vector index shared copy-on-write across forked workers.
+
+A Chroma client must not cross `fork()` (its native runtime deadlocks in the
+child), so the pre-fork master exports every game's collection into a plain
+float32 matrix plus documents, closes the Chroma client and forks. Workers
+inherit the matrix pages copy-on-write; since nothing ever writes to them
+(the array is marked read-only and lives outside the Python object heap),
+every worker reads the same physical memory.
+
+Search is exact cosine similarity over the (small, per-game) matrix, which
+matches the `hnsw:space=cosine` collections the generator builds.
+"""
+
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.core.multi_index import collection_scope
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_chroma import Chroma
+
+
+class SharedVectorIndex(VectorStore):
+    """Exact cosine search over a read-only, row-normalized embedding matrix."""
+
+    def __init__(
+        self,
+        matrix: "np.ndarray",
+        texts: list[str],
+        metadatas: list[dict],
+        embedding: Embeddings,
+    ):
+        self._matrix = matrix
+        self._texts = texts
+        self._metadatas = metadatas
+        self._embedding = embedding
+
+    @classmethod
+    def from_chroma(cls, vectorstore: "Chroma") -> "SharedVectorIndex":
+        """
+        Chroma 컬렉션 전체를 읽어 공유용 인덱스로 변환
+
+        Args:
+            vectorstore: 원본 Chroma 벡터스토어 또는 통합 인덱스의 게임 뷰 (호출 후 닫아도 됨)
+
+        Returns:
+            SharedVectorIndex: 정규화된 읽기 전용 행렬 기반 인덱스
+        """
+        import numpy as np
+
+        collection, where = collection_scope(vectorstore)
+        data = collection.get(where=where, include=["embeddings", "documents", "metadatas"])
+        matrix = np.asarray(data["embeddings"], dtype=np.float32)
+        if matrix.ndim != 2 or not len(matrix):
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        matrix.flags.writeable = False
+        return cls(
+            matrix,
+            [text or "" for text in data["documents"]],
+            [meta or {} for meta in data["metadatas"]],
+            vectorstore.embeddings,
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def nbytes(self) -> int:
+        return self._matrix.nbytes
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search_many(self, vectors: list[list[float]], k: int) -> list[list[Document]]:
+        """
+        여러 질문 벡터를 한 번의 행렬 곱으로 검색
+
+        Args:
+            vectors: 질문 임베딩 목록
+            k: 질문별 검색 문서 수
+
+        Returns:
+            list[list[Document]]: 질문별 유사도 상위 k개 문서 (유사도 내림차순)
+        """
+        import numpy as np
+
+        if not vectors or not len(self._texts):
+            return [[] for _ in vectors]
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self._matrix.T
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([
+                Document(page_content=self._texts[i], metadata=dict(self._metadatas[i]))
+                for i in ranked
+            ])
+        return results
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.search_many([embedding], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[list[dict]] = None, **kwargs: Any) -> list[str]:
+        # TypeError, not ValueError: routers map ValueError to 404 (unknown game)
+        raise TypeError("읽기 전용 인덱스 뷰입니다: SharedVectorIndex에는 문서를 추가할 수 없습니다")
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: Optional[list[dict]] = None, **kwargs: Any):
+        raise TypeError(
+            "읽기 전용 인덱스 뷰입니다: 인덱스는 벡터 DB 생성기로 만들고 SharedVectorIndex.from_chroma로 여세요"
+        )
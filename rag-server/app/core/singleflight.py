@@ -0,0 +1,103 @@
+"""Single-flight coalescing of identical in-flight work.
+
+Concurrent callers with the same key share one execution: the first caller
+(leader) starts the work, later callers (followers) await the same result
+until it completes. Results are not cached afterwards; a new call with the
+same key starts fresh. Coalescing is per worker process.
+
+Answers depend on the session's chat history, so /chat keys include a
+fingerprint of it: follow-up questions are only shared between sessions with
+the same history (in practice, fresh sessions and retries of one session).
+"""
+
+import asyncio
+import hashlib
+import re
+from typing import Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+from langchain_core.messages import BaseMessage
+
+from app.core.metrics import Counter
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = Counter(
+    "rag_singleflight_calls_total",
+    "Calls through the single-flight layer by role (leader executes, follower shares)",
+    ("role",),
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?？!！.。~]+$")
+
+
+def normalize_question(question: str) -> str:
+    """
+    동일 질문 판별용 정규화 (공백 정리, 소문자화, 끝 문장부호 제거)
+
+    Args:
+        question: 사용자 질문
+
+    Returns:
+        str: 정규화된 질문
+    """
+    compact = _WHITESPACE.sub(" ", question.strip()).lower()
+    return _TRAILING_PUNCTUATION.sub("", compact)
+
+
+def history_fingerprint(messages: Sequence[BaseMessage]) -> str:
+    """
+    대화 기록 식별값 (기록이 같은 세션끼리만 답변을 공유하도록 키에 포함)
+
+    Args:
+        messages: 세션의 현재 대화 기록
+
+    Returns:
+        str: 기록 내용의 해시 (기록이 없으면 빈 문자열)
+    """
+    if not messages:
+        return ""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in messages:
+        digest.update(f"{message.type}\0{message.content}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicates concurrent async calls by key."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        키가 같은 호출이 진행 중이면 그 결과를 공유하고, 아니면 fn 실행
+
+        Args:
+            key: 중복 판별 키
+            fn: 실제 작업을 수행하는 코루틴 함수
+
+        Returns:
+            tuple[T, bool]: (결과, 다른 호출의 결과를 공유했는지 여부)
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            SINGLEFLIGHT_CALLS.inc(role="follower")
+            # Shield so a disconnecting follower does not cancel the shared work
+            return await asyncio.shield(future), True
+
+        SINGLEFLIGHT_CALLS.inc(role="leader")
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future), False
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            future.exception()
@@ -0,0 +1,169 @@
+"""Per-game term normalization applied before embedding.
+
+Players rarely use the rulebook's own words ("블록" for 루미큐브 "타일",
+"길카드" for "길 카드"), which hurts both retrieval recall and singleflight
+coalescing. The vector DB generator writes a `terms.json` alias dictionary
+(alias -> rulebook term) next to each index version; this module compiles it
+into a character trie and rewrites questions with a single left-to-right,
+longest-match pass.
+
+A match must start at a word boundary and end either at one or right before a
+Korean particle ("블록은" -> "타일은"), so an alias is never rewritten inside
+another word ("패배" stays as is). Particles are re-attached in the form that
+fits the new term ("패를" -> "타일을").
+
+A consolidated multi-game index stores one section per game
+(`{"games": {game_key: {"aliases": ...}}}`); each game reads only its own.
+"""
+
+import functools
+import json
+import logging
+import os
+from typing import Optional
+
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+TERMS_FILE = "terms.json"
+
+TERM_REWRITES = Counter("rag_term_rewrites_total", "Aliases rewritten to rulebook terms in questions")
+
+# Particles that may follow a noun (same list as the generator's term_index.py)
+_PARTICLES = frozenset({
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "한테", "으로", "로",
+    "도", "만", "과", "와", "랑", "이랑", "하고", "까지", "부터", "보다", "처럼", "이나", "나",
+    "이야", "야", "이에요", "예요", "이요", "요", "인가요", "인가", "이면", "면", "들", "으로는",
+    "로는", "에는", "에도", "은요", "는요",
+})
+
+# (after a vowel, after a final consonant)
+_PARTICLE_PAIRS = [
+    ("는", "은"), ("를", "을"), ("가", "이"), ("와", "과"), ("랑", "이랑"), ("나", "이나"),
+    ("야", "이야"), ("예요", "이에요"), ("면", "이면"), ("는요", "은요"),
+]
+# "로" also follows a final ㄹ ("타일로")
+_DIRECTIONAL = {"로": "으로", "으로": "으로", "로는": "으로는", "으로는": "으로는"}
+_RIEUL = 8
+_VOWEL_FORM = {consonant: vowel for vowel, consonant in _PARTICLE_PAIRS}
+_CONSONANT_FORM = {vowel: consonant for vowel, consonant in _PARTICLE_PAIRS}
+
+_END = ""
+
+
+def _final_consonant(char: str) -> Optional[int]:
+    """Final consonant index of a Hangul syllable (0 = none), None for other characters."""
+    code = ord(char) - 0xAC00
+    if not 0 <= code < 11172:
+        return None
+    return code % 28
+
+
+def _fit_particle(term: str, particle: str) -> str:
+    final = _final_consonant(term[-1]) if term else None
+    if not particle or final is None:
+        return particle
+    if particle in _DIRECTIONAL:
+        return particle.removeprefix("으") if final in (0, _RIEUL) else _DIRECTIONAL[particle]
+    if final == 0:
+        return _VOWEL_FORM.get(particle, particle)
+    return _CONSONANT_FORM.get(particle, particle)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+class TermNormalizer:
+    """Longest-match alias rewriter over a character trie (read-only after build)."""
+
+    def __init__(self, aliases: dict[str, str]):
+        self._root: dict = {}
+        for alias, term in aliases.items():
+            key = alias.strip().lower()
+            if not key or key == term.lower():
+                continue
+            node = self._root
+            for char in key:
+                node = node.setdefault(char, {})
+            node[_END] = term
+        self.size = len(aliases)
+
+    def rewrite(self, text: str) -> tuple[str, int]:
+        """
+        질문의 별칭을 룰북 용어로 치환
+
+        Args:
+            text: 사용자 질문
+
+        Returns:
+            tuple[str, int]: (치환된 질문, 치환 횟수)
+        """
+        lowered = text.lower()
+        out = []
+        rewrites = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            if i and _is_word_char(text[i - 1]):
+                out.append(text[i])
+                i += 1
+                continue
+            match = self._longest_match(lowered, i)
+            if match is None:
+                out.append(text[i])
+                i += 1
+                continue
+            end, term, particle = match
+            out.append(term + _fit_particle(term, particle))
+            i = end + len(particle)
+            rewrites += 1
+        return "".join(out), rewrites
+
+    def _longest_match(self, lowered: str, start: int) -> Optional[tuple[int, str, str]]:
+        """(alias end, term, trailing particle) of the longest alias at `start` that ends a word."""
+        best = None
+        node = self._root
+        i = start
+        while i < len(lowered) and lowered[i] in node:
+            node = node[lowered[i]]
+            i += 1
+            if _END not in node:
+                continue
+            word_end = i
+            while word_end < len(lowered) and _is_word_char(lowered[word_end]):
+                word_end += 1
+            rest = lowered[i:word_end]
+            if not rest or rest in _PARTICLES:
+                best = (i, node[_END], rest)
+        return best
+
+
+@functools.lru_cache(maxsize=64)
+def load_term_normalizer(index_dir: str, game_key: Optional[str] = None) -> Optional[TermNormalizer]:
+    """
+    인덱스 버전 디렉터리의 terms.json으로 정규화기 생성 (버전 경로/게임별로 캐시)
+
+    Args:
+        index_dir: 게임의 현재 버전 인덱스 경로 (카탈로그의 db_path)
+        game_key: 게임 키 (통합 인덱스의 게임별 섹션을 고를 때 사용)
+
+    Returns:
+        Optional[TermNormalizer]: 정규화기, terms.json이 없거나 읽을 수 없으면 None
+    """
+    path = os.path.join(index_dir, TERMS_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "games" in data:
+            data = data["games"].get(game_key) or {}
+        aliases = data.get("aliases", {})
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"term aliases unreadable, questions are not normalized: {path}: {e}")
+        return None
+    normalizer = TermNormalizer(aliases)
+    logger.info(f"term normalizer loaded: {normalizer.size} aliases ({index_dir}, {game_key})")
+    return normalizer
@@ -0,0 +1,75 @@
+"""Local token counting for prompt budgeting.
+
+Uses tiktoken with the encoding of the configured model. When the encoding
+cannot be loaded (e.g. no network on first use and no local cache), falls back
+to a byte-length based estimate so budgeting never blocks a request.
+"""
+
+import logging
+import math
+from functools import lru_cache
+
+from app.config.settings import LLM_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Return the cached tiktoken encoding, or None when unavailable."""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(LLM_MODEL_NAME)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, using estimate: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수 계산
+
+    Args:
+        text: 토큰 수를 셀 문자열
+
+    Returns:
+        int: 토큰 수 (토크나이저가 없으면 UTF-8 바이트 기반 추정치)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Roughly 4 UTF-8 bytes per token for mixed Korean/English text
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    텍스트를 최대 토큰 수에 맞게 자르기
+
+    Args:
+        text: 원본 문자열
+        max_tokens: 허용 토큰 수
+
+    Returns:
+        str: 잘린 문자열 (이미 범위 안이면 원본 그대로)
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Shrink by characters until the estimate fits
+    budget_bytes = max_tokens * 4
+    encoded = text.encode("utf-8")[:budget_bytes]
+    return encoded.decode("utf-8", errors="ignore")
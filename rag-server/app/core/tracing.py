@@ -0,0 +1,288 @@
+"""Per-stage tracing for the RAG pipeline.
+
+Every stage (embedding, Chroma retrieval, history load/save, LLM time to
+first token and total, output parsing) is recorded three ways:
+- into `rag_stage_duration_seconds{stage, game}` histograms served on /metrics,
+- into the current request's trace, rendered as a `Server-Timing` header,
+- as OpenTelemetry spans when `OTEL_EXPORTER_OTLP_ENDPOINT` is set
+  (e.g. a local collector at http://localhost:4318).
+
+The request trace lives in a ContextVar, so stages running in LangChain's
+executor threads still report to the request that started them.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage
+
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of RAG pipeline stages",
+    ("stage", "game"),
+)
+REQUEST_DURATION = Histogram(
+    "rag_request_duration_seconds",
+    "End-to-end duration of RAG API requests",
+    ("endpoint", "game", "status"),
+)
+
+
+@dataclass
+class RequestTrace:
+    """요청 하나에서 측정된 단계별 시간과 속성"""
+    game: str = "unknown"
+    stages: list[tuple[str, float]] = field(default_factory=list)
+    attributes: dict[str, Any] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages.append((stage, seconds))
+
+    def totals(self) -> dict[str, float]:
+        """Sum durations per stage (a stage may run more than once)."""
+        totals: dict[str, float] = {}
+        with self._lock:
+            for stage, seconds in self.stages:
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        """Render the trace as a Server-Timing header value (durations in ms)."""
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.totals().items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("rag_request_trace", default=None)
+
+
+def start_trace(game: str = "unknown") -> RequestTrace:
+    """
+    현재 컨텍스트에 새 요청 트레이스 시작
+
+    Args:
+        game: 게임 식별자 (메트릭 라벨)
+
+    Returns:
+        RequestTrace: 시작된 트레이스
+    """
+    trace = RequestTrace(game=game)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Return the trace of the current request, if any."""
+    return _current_trace.get()
+
+
+def bind_game(game_key: str) -> None:
+    """Label the current request's stages with a game key."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.game = game_key
+
+
+def annotate(key: str, value: Any) -> None:
+    """Attach an attribute (e.g. token counts) to the current trace and span."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes[key] = value
+    otel_span = _current_otel_span()
+    if otel_span is not None:
+        otel_span.set_attribute(f"rag.{key}", value)
+
+
+# --- OpenTelemetry (optional) -------------------------------------------------
+
+_tracer = None
+_tracer_initialized = False
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    """Lazily configure an OTLP exporter when OTEL_EXPORTER_OTLP_ENDPOINT is set."""
+    global _tracer, _tracer_initialized
+    if _tracer_initialized:
+        return _tracer
+    with _tracer_lock:
+        if _tracer_initialized:
+            return _tracer
+        _tracer_initialized = True
+        if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            return None
+        try:
+            from opentelemetry import trace as otel_trace
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        except ImportError as e:
+            logger.warning(f"OpenTelemetry export disabled (missing package): {e}")
+            return None
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "rag-server")})
+        )
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        otel_trace.set_tracer_provider(provider)
+        _tracer = otel_trace.get_tracer("rag-server")
+        logger.info("OpenTelemetry span export enabled")
+        return _tracer
+
+
+def _current_otel_span():
+    if _get_tracer() is None:
+        return None
+    from opentelemetry import trace as otel_trace
+
+    current = otel_trace.get_current_span()
+    return current if current.is_recording() else None
+
+
+# --- Recording ----------------------------------------------------------------
+
+def record_stage(stage: str, start: float, end: float, attributes: Optional[dict] = None) -> None:
+    """
+    이미 측정된 구간을 단계 시간으로 기록 (콜백처럼 with 블록을 쓸 수 없는 경우)
+
+    Args:
+        stage: 단계 이름
+        start: 시작 시각 (time.perf_counter)
+        end: 종료 시각 (time.perf_counter)
+        attributes: OpenTelemetry span 속성
+    """
+    seconds = max(end - start, 0.0)
+    trace = _current_trace.get()
+    STAGE_DURATION.observe(seconds, stage=stage, game=trace.game if trace else "unknown")
+    if trace is not None:
+        trace.add(stage, seconds)
+
+    tracer = _get_tracer()
+    if tracer is not None:
+        end_ns = time.time_ns() - int((time.perf_counter() - end) * 1e9)
+        otel_span = tracer.start_span(
+            stage, start_time=end_ns - int(seconds * 1e9), attributes=attributes or {}
+        )
+        otel_span.end(end_time=end_ns)
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[None]:
+    """
+    with 블록의 실행 시간을 단계 시간으로 기록
+
+    Args:
+        stage: 단계 이름 (예: "embed", "retrieve", "parse")
+        **attributes: OpenTelemetry span 속성
+    """
+    tracer = _get_tracer()
+    start = time.perf_counter()
+    if tracer is None:
+        try:
+            yield
+        finally:
+            _observe(stage, time.perf_counter() - start)
+        return
+
+    with tracer.start_as_current_span(stage, attributes=attributes):
+        try:
+            yield
+        finally:
+            _observe(stage, time.perf_counter() - start)
+
+
+def _observe(stage: str, seconds: float) -> None:
+    trace = _current_trace.get()
+    STAGE_DURATION.observe(seconds, stage=stage, game=trace.game if trace else "unknown")
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+@contextmanager
+def request_span(name: str) -> Iterator[None]:
+    """Parent OpenTelemetry span for a whole API request (no-op without an exporter)."""
+    tracer = _get_tracer()
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name):
+        yield
+
+
+# --- LangChain integration ----------------------------------------------------
+
+class TracedChatMessageHistory(BaseChatMessageHistory):
+    """History wrapper that records load/save time as `history_load`/`history_save`."""
+
+    def __init__(self, inner: BaseChatMessageHistory):
+        self.inner = inner
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        with span("history_load"):
+            return self.inner.messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with span("history_save"):
+            self.inner.add_messages(messages)
+
+    def clear(self) -> None:
+        self.inner.clear()
+
+
+def traced_history_factory(
+    get_session_history_func: Callable[[str], BaseChatMessageHistory],
+) -> Callable[[str], BaseChatMessageHistory]:
+    """Wrap a session history factory so every history it returns is traced."""
+    def factory(session_id: str) -> BaseChatMessageHistory:
+        return TracedChatMessageHistory(get_session_history_func(session_id))
+    return factory
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """Records `llm` (total) and `llm_ttft` (time to first streamed token) stages."""
+
+    def __init__(self):
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._runs[run_id] = {"start": time.perf_counter(), "first_token": None}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["first_token"] is None:
+                run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        end = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        if run["first_token"] is not None:
+            record_stage("llm_ttft", run["start"], run["first_token"])
+        record_stage("llm", run["start"], end)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
@@ -0,0 +1,238 @@
+"""Token and cost ledger per game and session.
+
+Every chain run records the LLM usage reported by the API (prompt, cached
+prompt and completion tokens) together with the context tokens assembled for
+the prompt. Usage is aggregated per game and per session in per-minute
+buckets, so `/api/v1/usage` can report rolling windows (5m, 1h, 24h) next to
+all-time totals, and cumulative counters are exported on `/metrics`.
+
+Costs are estimates from the configured per-token prices. Values are per
+worker process like all other metrics; sessions are kept in an LRU of
+`RAG_USAGE_MAX_SESSIONS` entries.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from app.config.settings import (
+    LLM_CACHED_INPUT_PRICE_PER_MTOK,
+    LLM_INPUT_PRICE_PER_MTOK,
+    LLM_OUTPUT_PRICE_PER_MTOK,
+    USAGE_MAX_SESSIONS,
+)
+from app.core.metrics import Counter
+
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total", "LLM tokens billed per game (prompt includes cached)", ("game", "kind")
+)
+CONTEXT_TOKENS = Counter(
+    "rag_context_tokens_total", "Retrieved context tokens put into prompts per game", ("game",)
+)
+LLM_COST = Counter("rag_llm_cost_usd_total", "Estimated LLM spend in USD per game", ("game",))
+
+# Rolling windows reported by the ledger, in minutes
+WINDOWS = {"5m": 5, "1h": 60, "24h": 24 * 60}
+_MAX_WINDOW = max(WINDOWS.values())
+
+
+@dataclass
+class TokenUsage:
+    """토큰 사용량 합계 (요청 수 포함)"""
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    context_tokens: int = 0
+    # Answers built without the LLM (no tokens billed)
+    degraded: int = 0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_tokens += other.cached_tokens
+        self.completion_tokens += other.completion_tokens
+        self.context_tokens += other.context_tokens
+        self.degraded += other.degraded
+
+    @property
+    def cost_usd(self) -> float:
+        uncached = max(self.prompt_tokens - self.cached_tokens, 0)
+        return (
+            uncached * LLM_INPUT_PRICE_PER_MTOK
+            + self.cached_tokens * LLM_CACHED_INPUT_PRICE_PER_MTOK
+            + self.completion_tokens * LLM_OUTPUT_PRICE_PER_MTOK
+        ) / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "cost_usd": round(self.cost_usd, 6)}
+
+
+def usage_from_message(message, context_tokens: int = 0) -> TokenUsage:
+    """
+    LLM 응답 메시지의 usage_metadata로 사용량 생성
+
+    Args:
+        message: 체인이 돌려준 AIMessage
+        context_tokens: 프롬프트에 들어간 컨텍스트 토큰 수
+
+    Returns:
+        TokenUsage: 요청 1건의 사용량 (usage가 없으면 토큰 0)
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    metadata = getattr(message, "response_metadata", None) or {}
+    return TokenUsage(
+        requests=1,
+        prompt_tokens=usage.get("input_tokens", 0),
+        cached_tokens=(usage.get("input_token_details") or {}).get("cache_read") or 0,
+        completion_tokens=usage.get("output_tokens", 0),
+        context_tokens=context_tokens,
+        degraded=1 if metadata.get("degraded") else 0,
+    )
+
+
+class _Series:
+    """Per-minute usage buckets of one game or session, plus all-time totals."""
+
+    def __init__(self):
+        self.buckets: deque[tuple[int, TokenUsage]] = deque()
+        self.total = TokenUsage()
+
+    def add(self, minute: int, usage: TokenUsage) -> None:
+        if not self.buckets or self.buckets[-1][0] != minute:
+            self.buckets.append((minute, TokenUsage()))
+        self.buckets[-1][1].add(usage)
+        self.total.add(usage)
+        while self.buckets[0][0] <= minute - _MAX_WINDOW:
+            self.buckets.popleft()
+
+    def window(self, minute: int, minutes: Optional[int]) -> TokenUsage:
+        summed = TokenUsage()
+        if minutes is None:
+            summed.add(self.total)
+            return summed
+        for bucket_minute, usage in reversed(self.buckets):
+            if bucket_minute <= minute - minutes:
+                break
+            summed.add(usage)
+        return summed
+
+
+class UsageLedger:
+    """In-process token ledger per game and session (thread-safe)."""
+
+    def __init__(self, max_sessions: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._games: dict[str, _Series] = {}
+        self._sessions: OrderedDict[str, tuple[str, _Series]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _minute(self) -> int:
+        return int(self._clock() // 60)
+
+    def record(self, game: str, session_id: Optional[str], usage: TokenUsage) -> None:
+        """
+        요청 1건의 사용량을 게임/세션 합계와 메트릭에 기록
+
+        Args:
+            game: 게임 키
+            session_id: 세션 ID (None이면 게임 합계에만 기록)
+            usage: 요청 사용량
+        """
+        LLM_TOKENS.inc(usage.prompt_tokens, game=game, kind="prompt")
+        LLM_TOKENS.inc(usage.cached_tokens, game=game, kind="cached")
+        LLM_TOKENS.inc(usage.completion_tokens, game=game, kind="completion")
+        CONTEXT_TOKENS.inc(usage.context_tokens, game=game)
+        LLM_COST.inc(usage.cost_usd, game=game)
+
+        minute = self._minute()
+        with self._lock:
+            self._games.setdefault(game, _Series()).add(minute, usage)
+            if session_id is None or self.max_sessions <= 0:
+                return
+            entry = self._sessions.pop(session_id, None)
+            series = entry[1] if entry else _Series()
+            # Most recently used last; the game is the one last asked about
+            self._sessions[session_id] = (game, series)
+            series.add(minute, usage)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def summary(self, window: Optional[str] = None, top_sessions: int = 10) -> dict:
+        """
+        게임별 합계와 사용량 상위 세션
+
+        Args:
+            window: "5m" / "1h" / "24h", None이면 누적 합계
+            top_sessions: 반환할 상위 세션 수 (추정 비용 기준)
+
+        Returns:
+            dict: {"window", "totals", "games", "top_sessions"}
+
+        Raises:
+            ValueError: 알 수 없는 window
+        """
+        minutes = self._window_minutes(window)
+        minute = self._minute()
+        with self._lock:
+            games = {game: series.window(minute, minutes) for game, series in self._games.items()}
+            sessions = [
+                (session_id, game, series.window(minute, minutes))
+                for session_id, (game, series) in self._sessions.items()
+            ]
+        totals = TokenUsage()
+        for usage in games.values():
+            totals.add(usage)
+        ranked = sorted(
+            (entry for entry in sessions if entry[2].requests),
+            key=lambda entry: entry[2].cost_usd,
+            reverse=True,
+        )[:top_sessions]
+        return {
+            "window": window or "total",
+            "totals": totals.to_dict(),
+            "games": {game: usage.to_dict() for game, usage in sorted(games.items())},
+            "top_sessions": [
+                {"session_id": session_id, "game": game, **usage.to_dict()}
+                for session_id, game, usage in ranked
+            ],
+        }
+
+    def session(self, session_id: str) -> Optional[dict]:
+        """
+        세션 하나의 구간별 사용량
+
+        Args:
+            session_id: 세션 ID
+
+        Returns:
+            Optional[dict]: {"session_id", "game", "windows": {구간: 사용량}}, 기록이 없으면 None
+        """
+        minute = self._minute()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            game, series = entry
+            windows = {name: series.window(minute, minutes) for name, minutes in WINDOWS.items()}
+            windows["total"] = series.window(minute, None)
+        return {
+            "session_id": session_id,
+            "game": game,
+            "windows": {name: usage.to_dict() for name, usage in windows.items()},
+        }
+
+    @staticmethod
+    def _window_minutes(window: Optional[str]) -> Optional[int]:
+        if window is None or window == "total":
+            return None
+        if window not in WINDOWS:
+            raise ValueError(f"알 수 없는 집계 구간입니다: {window} (가능: {', '.join(WINDOWS)}, total)")
+        return WINDOWS[window]
+
+
+# Shared by every request in the worker
+USAGE_LEDGER = UsageLedger(USAGE_MAX_SESSIONS)
@@ -1,33 +1,259 @@
 """Vector store management."""
 
-from langchain_upstage import UpstageEmbeddings
-from langchain_chroma import Chroma
+import functools
+import logging
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
 
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-def load_vectorstore(game_key: str, available_games: dict) -> tuple[Chroma, str]:
+from app.config.settings import EMBED_MIN_BUDGET_MS, HYBRID_LEXICAL, LEXICAL_SHORTCUT_COVERAGE
+from app.core.lexical import LexicalHit, get_lexical_index, is_decisive, reciprocal_rank_fusion
+from app.core.metrics import Counter
+from app.core.multi_index import AUTO_GAME, collection_scope, open_game_view
+from app.core.resilience import (
+    DEGRADED,
+    EMBEDDING_BREAKER,
+    UpstreamUnavailable,
+    deadline_exceeded,
+    remaining_budget,
+)
+from app.core.shared_index import SharedVectorIndex
+from app.core.tracing import annotate, span
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+logger = logging.getLogger(__name__)
+
+# Upstage accepts at most 100 inputs per embeddings request
+_MAX_EMBED_BATCH_SIZE = 100
+
+RETRIEVALS = Counter(
+    "rag_retrievals_total", "Questions retrieved per path (lexical only, hybrid, vector only)", ("path",)
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    """
+    모든 게임이 함께 쓰는 임베딩 클라이언트 (HTTP 커넥션 풀 공유)
+
+    Returns:
+        Embeddings: Upstage 임베딩 모델 (질문은 query 모델로 임베딩됨)
+    """
+    # Deferred: openai imports take seconds and are not needed for /health
+    from langchain_upstage import UpstageEmbeddings
+
+    return UpstageEmbeddings(model="solar-embedding-1-large-passage")
+
+
+def load_vectorstore(game_key: str, available_games: Mapping) -> tuple["Chroma", str]:
     """
     게임별 ChromaDB 벡터스토어 로드
     
+    통합 인덱스(shared)에 있는 게임은 공유 컬렉션의 게임 필터 뷰를 반환하고,
+    "auto"는 통합 인덱스 전체(모든 게임) 뷰를 반환함.
+
     Args:
-        game_key: 게임 식별자 (예: "sabotage")
-        available_games: 게임 설정 딕셔너리
+        game_key: 게임 식별자 (예: "sabotage", 또는 "auto")
+        available_games: 게임 설정 매핑 (db_path는 현재 버전 인덱스 경로)
         
     Returns:
-        tuple[Chroma, str]: (벡터스토어, 게임 이름)
+        tuple[Chroma, str]: (벡터스토어, 게임 이름; "auto"면 빈 문자열)
         
     Raises:
-        ValueError: 존재하지 않는 게임 키
+        ValueError: 존재하지 않는 게임 키 (또는 통합 인덱스 없이 "auto" 요청)
     """
+    if game_key == AUTO_GAME and game_key not in available_games:
+        config = next((c for c in available_games.values() if c.get("shared")), None)
+        if config is None:
+            raise ValueError("게임 자동 판별은 통합 인덱스에서만 사용할 수 있습니다")
+        return open_game_view(config["db_path"], config["collection"], get_embeddings(), None), ""
+
     if game_key not in available_games:
         raise ValueError(f"게임을 찾을 수 없습니다: {game_key}")
     
     game_config = available_games[game_key]
-    
-    embeddings = UpstageEmbeddings(model="solar-embedding-1-large-passage")
+    if game_config.get("shared"):
+        vectorstore = open_game_view(
+            game_config["db_path"], game_config["collection"], get_embeddings(), game_key
+        )
+        return vectorstore, game_config["name"]
+
+    # Deferred: chromadb imports take seconds and are not needed for /health
+    from langchain_chroma import Chroma
+
     vectorstore = Chroma(
         persist_directory=game_config["db_path"],
-        embedding_function=embeddings,
+        embedding_function=get_embeddings(),
         collection_name=game_config["collection"]
     )
     
     return vectorstore, game_config["name"]
+
+
+def embed_queries(embeddings: Embeddings, texts: list[str]) -> list[list[float]]:
+    """
+    여러 질문을 최소한의 배치 호출로 임베딩 (query 모델 사용)
+
+    Args:
+        embeddings: 임베딩 모델
+        texts: 임베딩할 질문 목록
+
+    Returns:
+        list[list[float]]: 질문별 임베딩 벡터 (입력 순서 유지)
+
+    Raises:
+        UpstreamUnavailable: 요청 예산 부족, 서킷 브레이커 open, 또는 임베딩 호출 실패
+    """
+    if not texts:
+        return []
+    remaining = remaining_budget()
+    if remaining is not None and remaining < EMBED_MIN_BUDGET_MS / 1000:
+        raise UpstreamUnavailable("embedding", "budget")
+    if not EMBEDDING_BREAKER.allow():
+        raise UpstreamUnavailable("embedding", "breaker_open")
+    try:
+        vectors = _embed(embeddings, texts, remaining)
+    except Exception as e:
+        timed_out = "timeout" in type(e).__name__.lower()
+        if timed_out and deadline_exceeded():
+            # The HTTP timeout was the request's remaining budget, not Upstage's own
+            EMBEDDING_BREAKER.release()
+            raise UpstreamUnavailable("embedding", "deadline") from e
+        EMBEDDING_BREAKER.record_failure()
+        raise UpstreamUnavailable("embedding", "timeout" if timed_out else "error") from e
+    except BaseException:
+        # Cancelled: no outcome to record
+        EMBEDDING_BREAKER.release()
+        raise
+    EMBEDDING_BREAKER.record_success()
+    return vectors
+
+
+def _embed(embeddings: Embeddings, texts: list[str], timeout: float | None) -> list[list[float]]:
+    from langchain_upstage import UpstageEmbeddings
+
+    if isinstance(embeddings, UpstageEmbeddings):
+        # embed_documents would use the passage model; batch the query model directly
+        params = embeddings._invocation_params
+        params["model"] = params["model"] + "-query"
+        if timeout is not None:
+            # The request budget caps the HTTP call (client retries included)
+            params["timeout"] = timeout
+        vectors: list[list[float]] = []
+        for i in range(0, len(texts), _MAX_EMBED_BATCH_SIZE):
+            batch = texts[i:i + _MAX_EMBED_BATCH_SIZE]
+            data = embeddings.client.create(input=batch, **params).data
+            vectors.extend(r.embedding for r in data)
+        return vectors
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def _lexical_search(vectorstore: "Chroma", questions: list[str], k: int) -> list[list[LexicalHit]] | None:
+    """Lexical hits per question, or None when hybrid retrieval is off/unavailable."""
+    if not HYBRID_LEXICAL:
+        return None
+    index = get_lexical_index(vectorstore)
+    if index is None:
+        return None
+    with span("lexical", batch_size=len(questions)):
+        return [index.search(question, k) for question in questions]
+
+
+def hybrid_search(vectorstore: "Chroma", questions: list[str], k: int) -> list[list[Document]]:
+    """
+    어휘(BM25) + 벡터 검색을 RRF로 합친 질문별 검색
+
+    어휘 검색 1위가 확실한 질문(질문 n-gram 대부분을 덮고 2위와 차이가 큼)은
+    임베딩 없이 어휘 결과만 사용하고, 나머지 질문만 한 번에 임베딩/검색함.
+    임베딩을 쓸 수 없으면(예산 부족, 브레이커 open, 호출 실패) 어휘 결과로 대체함.
+
+    Args:
+        vectorstore: ChromaDB 벡터스토어 (또는 SharedVectorIndex)
+        questions: 질문 목록
+        k: 질문별 검색 문서 수
+
+    Returns:
+        list[list[Document]]: 질문별 검색 결과 (관련도 순)
+    """
+    if not questions:
+        return []
+    lexical = _lexical_search(vectorstore, questions, k)
+    if lexical is None:
+        RETRIEVALS.inc(len(questions), path="vector")
+        return batch_similarity_search(vectorstore, questions, k)
+
+    results: list[list[Document] | None] = [None] * len(questions)
+    pending = []
+    for i, hits in enumerate(lexical):
+        if is_decisive(hits, LEXICAL_SHORTCUT_COVERAGE / 100):
+            results[i] = [hit.document for hit in hits]
+        else:
+            pending.append(i)
+    if len(questions) == 1:
+        annotate("lexical_shortcut", not pending)
+    RETRIEVALS.inc(len(questions) - len(pending), path="lexical")
+    RETRIEVALS.inc(len(pending), path="hybrid")
+
+    if pending:
+        try:
+            dense = batch_similarity_search(vectorstore, [questions[i] for i in pending], k)
+        except UpstreamUnavailable as e:
+            # Degrade to the lexical ranking rather than failing the request
+            logger.warning(f"vector search skipped, using lexical results: {e}")
+            DEGRADED.inc(upstream="embedding", reason=e.reason)
+            annotate("degraded_retrieval", e.reason)
+            for i in pending:
+                results[i] = [hit.document for hit in lexical[i]]
+            return results
+        for i, documents in zip(pending, dense):
+            results[i] = reciprocal_rank_fusion(
+                [documents, [hit.document for hit in lexical[i]]], k
+            )
+    return results
+
+
+def batch_similarity_search(
+    vectorstore: "Chroma",
+    questions: list[str],
+    k: int,
+) -> list[list[Document]]:
+    """
+    여러 질문을 한 번에 임베딩하고 단일 Chroma 쿼리로 검색 (벡터 검색만)
+
+    Args:
+        vectorstore: ChromaDB 벡터스토어
+        questions: 질문 목록
+        k: 질문별 검색 문서 수
+
+    Returns:
+        list[list[Document]]: 질문별 검색 결과 (similarity_search와 동일한 순서)
+    """
+    if not questions:
+        return []
+    with span("embed", batch_size=len(questions)):
+        vectors = embed_queries(vectorstore.embeddings, questions)
+    if isinstance(vectorstore, SharedVectorIndex):
+        # Pre-fork shared index: one matrix product for all questions
+        with span("retrieve", batch_size=len(questions)):
+            return vectorstore.search_many(vectors, k)
+    # Chroma evaluates all query embeddings in one vectorized call
+    # (consolidated index: restricted to the game's chunks)
+    collection, where = collection_scope(vectorstore)
+    with span("retrieve", batch_size=len(questions)):
+        results = collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas"],
+        )
+    return [
+        [
+            Document(page_content=text or "", metadata=meta or {})
+            for text, meta in zip(texts, metas)
+        ]
+        for texts, metas in zip(results["documents"], results["metadatas"])
+    ]
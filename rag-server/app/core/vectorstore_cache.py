@@ -0,0 +1,324 @@
+"""Memory-budgeted LRU of per-game vectorstores.
+
+Each loaded game keeps a Chroma client (with its HNSW index resident); games
+of the consolidated multi-game index share one client, and all games share
+one embeddings client. The cache tracks the approximate resident size of every
+store and evicts least-recently-used games once the total exceeds the budget.
+Pinned games are never evicted.
+
+Callers hold a lease while they use a store, so an evicted store is only
+closed once the last in-flight request using it is done. The same applies
+when a rebuilt index replaces a cached game (`refresh`).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from app.core.metrics import Counter, Gauge
+from app.core.multi_index import GameScopedIndex
+from app.core.shared_index import SharedVectorIndex
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+logger = logging.getLogger(__name__)
+
+# In-memory collections have no files to measure: ~4096-dim float32 vector + text
+_BYTES_PER_RECORD_ESTIMATE = 20_000
+
+VECTORSTORE_CACHE_REQUESTS = Counter(
+    "rag_vectorstore_cache_requests_total", "Vectorstore cache lookups", ("result",)
+)
+VECTORSTORE_CACHE_EVICTIONS = Counter(
+    "rag_vectorstore_cache_evictions_total", "Vectorstores evicted from the cache"
+)
+VECTORSTORE_CACHE_REFRESHES = Counter(
+    "rag_vectorstore_cache_refreshes_total", "Cached vectorstores swapped after an index update", ("result",)
+)
+
+
+@dataclass
+class _Entry:
+    vectorstore: "Chroma"
+    title: str
+    size: int
+    leases: int = 0
+    evicted: bool = False
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+def estimate_resident_size(vectorstore: "Chroma") -> int:
+    """
+    벡터스토어가 메모리에 차지하는 대략적인 크기 (bytes)
+
+    Args:
+        vectorstore: Chroma 벡터스토어
+
+    Returns:
+        int: 영속 저장소면 디렉터리 크기, 메모리 저장소면 레코드 수 기반 추정치,
+            공유 인덱스(SharedVectorIndex)면 행렬 크기,
+            통합 인덱스의 게임 뷰면 디렉터리 크기 중 해당 게임 청크 비율만큼
+    """
+    if isinstance(vectorstore, SharedVectorIndex):
+        return vectorstore.nbytes
+    if isinstance(vectorstore, GameScopedIndex):
+        whole = estimate_resident_size(vectorstore.store)
+        if vectorstore.where is None:
+            return whole
+        collection = vectorstore.store._collection
+        total = collection.count()
+        game = len(collection.get(where=vectorstore.where, include=[])["ids"])
+        return whole * game // total if total else 0
+    settings = vectorstore._client.get_settings()
+    if settings.is_persistent and settings.persist_directory:
+        return _directory_size(settings.persist_directory)
+    return vectorstore._collection.count() * _BYTES_PER_RECORD_ESTIMATE
+
+
+class VectorStoreCache:
+    """LRU of (vectorstore, game title) per game key under a memory budget."""
+
+    def __init__(
+        self,
+        loader: Callable[[str], tuple["Chroma", str]],
+        budget_bytes: int = 0,
+        pinned: Iterable[str] = (),
+        size_of: Callable[["Chroma"], int] = estimate_resident_size,
+    ):
+        self._loader = loader
+        self.budget_bytes = budget_bytes
+        self.pinned = set(pinned)
+        self._size_of = size_of
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        # Bumped by refresh() for games being loaded, so acquire() reloads them
+        self._generations: dict[str, int] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, game_key: str) -> bool:
+        return game_key in self._entries
+
+    @contextmanager
+    def lease(self, game_key: str) -> Iterator[tuple["Chroma", str]]:
+        """
+        게임 벡터스토어를 사용하는 동안 축출되어도 닫히지 않도록 보장
+
+        Args:
+            game_key: 게임 식별자
+
+        Yields:
+            tuple[Chroma, str]: (벡터스토어, 게임 이름)
+
+        Raises:
+            ValueError: 존재하지 않는 게임 키
+        """
+        entry = self.acquire(game_key)
+        try:
+            yield entry.vectorstore, entry.title
+        finally:
+            self.release(entry)
+
+    def acquire(self, game_key: str) -> _Entry:
+        """Return the entry for a game (loading it on a miss) with one lease taken."""
+        with self._lock:
+            entry = self._entries.get(game_key)
+            if entry is not None:
+                self._entries.move_to_end(game_key)
+                entry.leases += 1
+                VECTORSTORE_CACHE_REQUESTS.inc(result="hit")
+                return entry
+            load_lock = self._load_locks.setdefault(game_key, threading.Lock())
+
+        # Load outside the cache lock; concurrent misses of one game load it once
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(game_key)
+                if entry is not None:
+                    self._entries.move_to_end(game_key)
+                    entry.leases += 1
+                    VECTORSTORE_CACHE_REQUESTS.inc(result="hit")
+                    return entry
+            VECTORSTORE_CACHE_REQUESTS.inc(result="miss")
+            try:
+                while True:
+                    with self._lock:
+                        generation = self._generations.get(game_key, 0)
+                    vectorstore, title = self._loader(game_key)
+                    entry = _Entry(vectorstore, title, self._size_of(vectorstore), leases=1)
+                    with self._lock:
+                        cached = self._entries.get(game_key)
+                        if cached is not None:
+                            # Loaded concurrently under a newer load lock: use that one
+                            cached.leases += 1
+                            to_close = [entry]
+                            entry = cached
+                            break
+                        if self._generations.get(game_key, 0) == generation:
+                            self._entries[game_key] = entry
+                            to_close = self._evict_over_budget(keep=game_key)
+                            break
+                    # The catalog changed while loading: this may be the old version
+                    self._close(entry)
+                    VECTORSTORE_CACHE_REFRESHES.inc(result="reloaded")
+            finally:
+                # Waiters already hold the lock; later misses create a fresh one
+                with self._lock:
+                    if self._load_locks.get(game_key) is load_lock:
+                        del self._load_locks[game_key]
+                        self._generations.pop(game_key, None)
+        for evicted in to_close:
+            self._close(evicted)
+        logger.info(f"vectorstore loaded: {game_key} ({entry.size / 2**20:.1f} MiB)")
+        return entry
+
+    def release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.leases -= 1
+            closable = entry.evicted and entry.leases == 0
+        if closable:
+            self._close(entry)
+
+    def warm(self, game_keys: Iterable[str]) -> None:
+        """Load games ahead of traffic (failures are logged, not raised)."""
+        for game_key in game_keys:
+            try:
+                self.release(self.acquire(game_key))
+            except Exception as e:
+                logger.warning(f"vectorstore warm-up failed for {game_key}: {e}")
+
+    def seed(self, game_key: str, vectorstore: "Chroma | SharedVectorIndex", title: str) -> None:
+        """Insert a preloaded store as a pinned entry (pre-fork master, before forking)."""
+        with self._lock:
+            self._entries[game_key] = _Entry(vectorstore, title, self._size_of(vectorstore))
+            self.pinned.add(game_key)
+
+    def refresh(self, game_keys: Iterable[str]) -> None:
+        """
+        인덱스가 교체된 게임의 캐시 항목을 새 버전으로 바꿔 끼움
+
+        새 버전은 캐시 락 밖에서 로드하므로 진행 중인 요청은 멈추지 않고,
+        이전 버전은 마지막 임대가 반환될 때 닫힘. 캐시에 없는 게임은 무시하고,
+        로드 중인 게임은 로드가 끝난 뒤 새 버전으로 다시 로드되게 표시.
+
+        Args:
+            game_keys: 카탈로그에서 변경된 게임 키
+        """
+        for game_key in game_keys:
+            with self._lock:
+                if game_key in self._load_locks:
+                    self._generations[game_key] = self._generations.get(game_key, 0) + 1
+                if game_key not in self._entries:
+                    continue
+            try:
+                vectorstore, title = self._loader(game_key)
+            except ValueError:
+                # Removed from the catalog: drop it
+                new_entry = None
+            except Exception as e:
+                logger.warning(f"vectorstore refresh failed for {game_key}, keeping old version: {e}")
+                continue
+            else:
+                new_entry = _Entry(vectorstore, title, self._size_of(vectorstore))
+
+            with self._lock:
+                old = self._entries.pop(game_key, None)
+                if new_entry is not None:
+                    self._entries[game_key] = new_entry
+                    to_close = self._evict_over_budget(keep=game_key)
+                else:
+                    to_close = []
+                if old is not None:
+                    old.evicted = True
+                    if old.leases == 0:
+                        to_close.append(old)
+            for entry in to_close:
+                self._close(entry)
+            VECTORSTORE_CACHE_REFRESHES.inc(result="swapped" if new_entry else "removed")
+            logger.info(f"vectorstore refreshed: {game_key} ({'swapped' if new_entry else 'removed'})")
+
+    def _evict_over_budget(self, keep: str) -> list[_Entry]:
+        """Evict LRU unpinned games until within budget; returns entries to close now."""
+        if self.budget_bytes <= 0:
+            return []
+        to_close = []
+        total = sum(entry.size for entry in self._entries.values())
+        for game_key in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            if game_key == keep or game_key in self.pinned:
+                continue
+            entry = self._entries.pop(game_key)
+            entry.evicted = True
+            total -= entry.size
+            VECTORSTORE_CACHE_EVICTIONS.inc()
+            logger.info(f"vectorstore evicted: {game_key} ({entry.size / 2**20:.1f} MiB)")
+            if entry.leases == 0:
+                to_close.append(entry)
+        if total > self.budget_bytes:
+            logger.warning(
+                f"vectorstore cache over budget: {total / 2**20:.1f} MiB "
+                f"> {self.budget_bytes / 2**20:.1f} MiB (pinned or single game)"
+            )
+        return to_close
+
+    @staticmethod
+    def _close(entry: _Entry) -> None:
+        close_vectorstore(entry.vectorstore)
+
+
+def close_vectorstore(vectorstore) -> None:
+    """
+    벡터스토어가 잡고 있는 Chroma 클라이언트 해제
+
+    통합 인덱스의 게임 뷰는 참조만 반환하고, 마지막 뷰가 닫힐 때 공유 클라이언트를 닫음.
+
+    Args:
+        vectorstore: Chroma, SharedVectorIndex 또는 GameScopedIndex
+    """
+    if isinstance(vectorstore, GameScopedIndex):
+        vectorstore.close()
+        return
+    # Releases the Chroma system (and its HNSW segments) once no client uses it
+    client = getattr(vectorstore, "_client", None)
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning(f"failed to close vectorstore client: {e}")
+
+
+def register_cache_gauges(cache: VectorStoreCache) -> None:
+    """Export the cache's resident size and entry count on /metrics."""
+    Gauge(
+        "rag_vectorstore_cache_bytes", "Approximate resident size of cached vectorstores",
+        callback=lambda: {(): cache.total_bytes},
+    )
+    Gauge(
+        "rag_vectorstore_cache_entries", "Number of cached vectorstores",
+        callback=lambda: {(): len(cache)},
+    )
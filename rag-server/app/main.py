@@ -1,14 +1,63 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from app.routers import chat
+from app.config.games import AVAILABLE_GAMES
+from app.routers import admin, chat, metrics, usage
+from app.core.coldstart import log_import_summary, preload_heavy_modules
+from app.core.memory import flush_session_histories
+from app.core.llm import close_llm_clients, prewarm_llm_connections
+from app.core.tracing import REQUEST_DURATION, request_span, start_trace
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 load_dotenv()
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+
+async def _warm_up() -> None:
+    """Load deferred dependencies and warm clients after the server is already serving."""
+    try:
+        await run_in_threadpool(preload_heavy_modules)
+        # Open LLM connections so the first requests skip the TLS handshake
+        await prewarm_llm_connections()
+        # Load pinned games before they are asked about
+        await run_in_threadpool(chat.warm_pinned_vectorstores)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"background warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_import_summary(_IMPORT_SECONDS)
+    # Warm up in the background so /health answers as soon as the app is imported
+    warm_up = asyncio.create_task(_warm_up())
+    # Pick up rebuilt game indexes without a restart
+    AVAILABLE_GAMES.start_watching()
+    yield
+    AVAILABLE_GAMES.stop_watching()
+    warm_up.cancel()
+    # Persist write-behind chat history before the worker exits
+    flush_session_histories()
+    await close_llm_clients()
+
+
 app = FastAPI(
     title="보드게임 규칙 전문가 챗봇 API",
     description="RAG 기반 보드게임 룰북 질의응답 서비스",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -20,6 +69,35 @@ app.add_middleware(
 )
 
 app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
+app.include_router(usage.router, prefix="/api/v1", tags=["Usage"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"], include_in_schema=False)
+
+# Endpoints whose Server-Timing header is meaningful (streaming responses send
+# headers before any stage has run)
+_SERVER_TIMING_PATHS = {"/api/v1/chat"}
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Start a per-request trace, record request latency and add Server-Timing."""
+    trace = start_trace()
+    status = 500
+    try:
+        with request_span(f"{request.method} {request.url.path}"):
+            response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        REQUEST_DURATION.observe(
+            time.perf_counter() - trace.started_at,
+            endpoint=getattr(route, "path", "unmatched"),
+            game=trace.game,
+            status=str(status),
+        )
+    if request.url.path in _SERVER_TIMING_PATHS:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
 
 
 @app.get("/")
@@ -27,5 +105,7 @@ async def root():
     return {
         "message": "보드게임 규칙 전문가 챗봇 API",
         "docs": "/docs",
-        "health": "/api/v1/health"
+        "health": "/api/v1/health",
+        "metrics": "/metrics",
+        "usage": "/api/v1/usage"
     }
@@ -1,5 +1,5 @@
 """Data models and schemas."""
 
-from .schemas import OutputStructure
+from .schemas import OutputStructure, ReferencedOutputStructure
 
-__all__ = ["OutputStructure"]
+__all__ = ["OutputStructure", "ReferencedOutputStructure"]
@@ -2,6 +2,8 @@
 
 from pydantic import BaseModel, Field
 
+from app.config.settings import BATCH_MAX_ITEMS
+
 
 class OutputStructure(BaseModel):
     """RAG 챗봇의 출력 구조"""
@@ -11,10 +13,20 @@ class OutputStructure(BaseModel):
     page: int|None = Field(description="룰북 페이지 값 (예: 5 또는 null)")
 
 
+class ReferencedOutputStructure(BaseModel):
+    """근거 문장 대신 컨텍스트 블록 번호만 받는 출력 구조 (출처 문장은 서버에서 추출)"""
+    answer_type: str = Field(description="답변 유형")
+    description: str = Field(description="질문에 대한 간결하고 명확한 설명")
+    ref: int|None = Field(description="답변 근거가 된 컨텍스트 블록 번호 ([n]의 n, 없으면 null)")
+
+
 class ChatRequest(BaseModel):
     """채팅 요청 스키마"""
     question: str = Field(..., description="사용자 질문")
-    game_key: str = Field(default="sabotage", description="게임 식별자")
+    game_key: str = Field(
+        default="sabotage",
+        description="게임 식별자 (\"auto\"면 통합 인덱스 전체를 검색해 게임을 판별)"
+    )
     session_id: str = Field(default="default", description="세션 ID")
 
 
@@ -26,6 +38,93 @@ class ChatResponse(BaseModel):
     source: str = Field(..., description="출처 (룰북 원문)")
     page: int|None = Field(..., description="룰북 페이지 값 (예: 5 또는 null)")
     session_id: str = Field(..., description="세션 ID")
+    degraded: bool = Field(
+        default=False, description="True면 LLM 없이 검색 1위 문서로 만든 답변 (지연 예산 초과/장애)"
+    )
+    game_key: str | None = Field(
+        default=None, description="답변한 게임 식별자 (\"auto\" 요청이면 판별된 게임)"
+    )
+
+
+class BatchChatItem(BaseModel):
+    """배치 채팅의 개별 질문"""
+    question: str = Field(..., description="사용자 질문")
+    session_id: str | None = Field(
+        default=None,
+        description="세션 ID (생략 시 대화 기록을 저장하지 않는 일회성 세션)"
+    )
+
+
+class BatchChatRequest(BaseModel):
+    """배치 채팅 요청 스키마"""
+    game_key: str = Field(default="sabotage", description="게임 식별자")
+    items: list[BatchChatItem] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_ITEMS, description="질문 목록"
+    )
+    concurrency: int | None = Field(
+        default=None, ge=1, description="동시 LLM 호출 수 (서버 상한 이하로 제한)"
+    )
+    ordered: bool = Field(
+        default=False,
+        description="True면 입력 순서대로, False면 완료되는 순서대로 스트리밍"
+    )
+
+
+class BatchChatResult(BaseModel):
+    """배치 채팅 결과 (NDJSON 한 줄)"""
+    index: int = Field(..., description="요청 items 내 위치")
+    question: str = Field(..., description="사용자 질문")
+    answer_type: str | None = Field(default=None, description="답변 유형")
+    description: str | None = Field(default=None, description="답변 설명")
+    source: str | None = Field(default=None, description="출처 (룰북 원문)")
+    page: int | None = Field(default=None, description="룰북 페이지 값")
+    session_id: str | None = Field(default=None, description="세션 ID")
+    degraded: bool = Field(default=False, description="True면 LLM 없이 검색 1위 문서로 만든 답변")
+    error: str | None = Field(default=None, description="실패 시 오류 메시지")
+
+
+class PrefetchRequest(BaseModel):
+    """중간 전사문 prefetch 요청 스키마"""
+    partial_text: str = Field(..., description="말하는 중인 질문의 중간 전사문")
+    game_key: str = Field(default="sabotage", description="게임 식별자")
+    session_id: str = Field(default="default", description="세션 ID (최종 /chat 요청과 같아야 함)")
+
+
+class PrefetchResponse(BaseModel):
+    """prefetch 응답 스키마"""
+    status: str = Field(..., description="scheduled(검색 시작) / duplicate(이미 검색함) / skipped(너무 짧음)")
+
+
+class TokenUsageStats(BaseModel):
+    """토큰 사용량/추정 비용 합계"""
+    requests: int = Field(..., description="체인 실행 수")
+    prompt_tokens: int = Field(..., description="LLM 입력 토큰 (캐시 포함)")
+    cached_tokens: int = Field(..., description="프롬프트 캐시에서 읽은 입력 토큰")
+    completion_tokens: int = Field(..., description="LLM 출력 토큰")
+    context_tokens: int = Field(..., description="프롬프트에 넣은 검색 컨텍스트 토큰")
+    degraded: int = Field(..., description="LLM 없이 만든 답변 수")
+    cost_usd: float = Field(..., description="설정된 단가로 계산한 추정 비용 (USD)")
+
+
+class SessionUsageStats(TokenUsageStats):
+    """세션별 사용량"""
+    session_id: str = Field(..., description="세션 ID")
+    game: str = Field(..., description="마지막으로 질문한 게임 키")
+
+
+class UsageSummaryResponse(BaseModel):
+    """사용량 요약 응답"""
+    window: str = Field(..., description="집계 구간 (5m/1h/24h/total)")
+    totals: TokenUsageStats = Field(..., description="전체 합계")
+    games: dict[str, TokenUsageStats] = Field(..., description="게임 키별 합계")
+    top_sessions: list[SessionUsageStats] = Field(..., description="추정 비용 상위 세션")
+
+
+class SessionUsageResponse(BaseModel):
+    """세션 사용량 응답"""
+    session_id: str = Field(..., description="세션 ID")
+    game: str = Field(..., description="마지막으로 질문한 게임 키")
+    windows: dict[str, TokenUsageStats] = Field(..., description="구간(5m/1h/24h/total)별 사용량")
 
 
 class HealthCheckResponse(BaseModel):
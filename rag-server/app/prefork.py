@@ -0,0 +1,158 @@
+"""Pre-fork serving mode: warm once in a master, share memory with workers.
+
+    python -m app.prefork --workers 4 --port 8000
+
+The master imports the app and every deferred SDK, exports each game's index
+into a read-only matrix (`SharedVectorIndex`), freezes the GC-tracked heap and
+only then forks the uvicorn workers, which accept on one shared listening
+socket. Module code, LangChain objects and the index matrices therefore stay
+shared copy-on-write instead of being loaded once per worker.
+
+Caveats:
+- No Chroma client, thread or event loop may exist in the master when it
+  forks (Chroma's native runtime deadlocks in the child). The master closes
+  every Chroma client it opened; workers open their own when they need one.
+- A game whose index is hot-swapped (see `app/config/catalog.py`) is reloaded
+  per worker and stops being shared until the next restart.
+- Dead workers are restarted; SIGTERM/SIGINT shut all workers down gracefully.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+from app.config.settings import PREFORK_WORKERS
+
+logger = logging.getLogger("app.prefork")
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str) -> None:
+    import uvicorn
+
+    # Undo the master's signal handlers and GC settings in the child
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(app, sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(app, sock, log_level)
+        except BaseException:
+            logger.exception("worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info(f"worker started: pid={pid}")
+    return pid
+
+
+def _prepare() -> object:
+    """Import and warm everything that workers should share."""
+    from app.core.coldstart import preload_heavy_modules
+    from app.config.games import AVAILABLE_GAMES
+    from app.main import app
+    from app.routers import chat
+
+    preload_heavy_modules()
+    shared = chat.share_vectorstores(list(AVAILABLE_GAMES.keys()))
+    logger.info(f"shared indexes: {', '.join(shared) or 'none'}")
+    # Move everything allocated so far out of the collector's reach so GC passes
+    # in the workers do not write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def serve(host: str, port: int, workers: int, log_level: str = "info", backlog: int = 2048) -> None:
+    """
+    마스터에서 앱과 게임 인덱스를 미리 올린 뒤 워커를 fork해서 서비스
+
+    Args:
+        host: 바인드 주소
+        port: 바인드 포트
+        workers: fork할 uvicorn 워커 수
+        log_level: uvicorn 로그 레벨
+        backlog: listen backlog
+    """
+    # No collections between the preload and fork (they would dirty shared pages)
+    gc.disable()
+    app = _prepare()
+    sock = _bind(host, port, backlog)
+    logger.info(f"listening on {host}:{port} with {workers} workers")
+
+    stopping = False
+    children: set[int] = set()
+
+    def _stop(signum, frame):
+        # waitpid() is retried after signals, so wake it by stopping the workers
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    for _ in range(workers):
+        children.add(_spawn(app, sock, log_level))
+    while children and not stopping:
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning(f"worker {pid} exited (status {status}), restarting")
+            time.sleep(1)
+            children.add(_spawn(app, sock, log_level))
+
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in list(children):
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+    logger.info("all workers stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="rag-server pre-fork server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    serve(args.host, args.port, max(args.workers, 1), args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Admin profiling API router."""
+
+import hmac
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.config.settings import ADMIN_TOKEN, PROFILE_MAX_SECONDS
+from app.core.profiling import CPU_PROFILER, MEMORY_PROFILER, ProfilerBusy
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """X-Admin-Token 헤더 검사 (RAG_ADMIN_TOKEN이 비어 있으면 엔드포인트 비활성화)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(default=10, gt=0, description="프로파일 시간 (초)"),
+    interval_ms: int = Query(default=10, ge=1, le=1000, description="샘플 간격 (ms)"),
+):
+    """
+    이 워커의 모든 스레드 스택을 seconds 동안 샘플링해서 collapsed stack으로 반환
+
+    flamegraph.pl, speedscope, inferno에 그대로 넣을 수 있는 텍스트 파일.
+    """
+    if seconds > PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"최대 {PROFILE_MAX_SECONDS}초까지 가능합니다.")
+    try:
+        profile = await run_in_threadpool(CPU_PROFILER.run, seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="이미 CPU 프로파일이 실행 중입니다.")
+    filename = f"cpu-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(profile.samples),
+            "X-Profile-Seconds": f"{profile.seconds:.3f}",
+            "X-Worker-Pid": str(os.getpid()),
+        },
+    )
+
+
+@router.get("/profile/memory")
+async def memory_status():
+    """tracemalloc 상태 (추적 중인 메모리, 보관 중인 스냅샷 id)"""
+    return {"pid": os.getpid(), **MEMORY_PROFILER.status()}
+
+
+@router.post("/profile/memory/start")
+async def memory_start(
+    frames: int = Query(default=10, ge=1, le=100, description="할당 위치별 traceback 깊이"),
+):
+    """tracemalloc 시작 (끌 때까지 할당마다 추적 비용이 듦)"""
+    started = MEMORY_PROFILER.start(frames)
+    return {"pid": os.getpid(), "started": started, **MEMORY_PROFILER.status()}
+
+
+@router.post("/profile/memory/snapshot")
+async def memory_snapshot(top: int = Query(default=20, ge=1, le=500)):
+    """스냅샷을 찍고 할당 위치별 상위 항목 반환 (id는 diff에 사용)"""
+    try:
+        snapshot = await run_in_threadpool(MEMORY_PROFILER.snapshot, top)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"pid": os.getpid(), **snapshot}
+
+
+@router.get("/profile/memory/diff")
+async def memory_diff(
+    base: int = Query(..., description="기준 스냅샷 id"),
+    target: Optional[int] = Query(default=None, description="비교할 스냅샷 id (생략 시 가장 최근)"),
+    top: int = Query(default=20, ge=1, le=500),
+):
+    """두 스냅샷 사이에 늘어난/줄어든 할당 위치"""
+    try:
+        diff = await run_in_threadpool(MEMORY_PROFILER.diff, base, target, top)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"pid": os.getpid(), **diff}
+
+
+@router.post("/profile/memory/stop")
+async def memory_stop():
+    """tracemalloc 종료 (스냅샷도 삭제)"""
+    MEMORY_PROFILER.stop()
+    return {"pid": os.getpid(), **MEMORY_PROFILER.status()}
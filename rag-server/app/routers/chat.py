@@ -1,25 +1,138 @@
 """Chat API router."""
 
+import asyncio
+import json
+import logging
+import traceback
+import uuid
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
 from app.models.schemas import ChatRequest, ChatResponse, HealthCheckResponse
+from app.models.schemas import BatchChatItem, BatchChatRequest, BatchChatResult
+from app.models.schemas import PrefetchRequest, PrefetchResponse
 from app.config.games import AVAILABLE_GAMES
 from app.config.prompts import PromptTemplate
-from app.models.schemas import OutputStructure
-from app.core.vectorstore import load_vectorstore
-from app.core.chain import create_rag_chain, ask_question
+from app.config.settings import (
+    BATCH_MAX_CONCURRENCY,
+    CHAT_DEADLINE_MS,
+    CHAT_MAX_CONCURRENCY,
+    CHAT_MAX_QUEUE,
+    CHAT_QUEUE_TIMEOUT_SECONDS,
+    LLM_MIN_BUDGET_MS,
+    RETRIEVE_K,
+    VECTORSTORE_CACHE_MB,
+    VECTORSTORE_PINNED,
+    PREFETCH_MIN_SIMILARITY,
+    PREFETCH_TTL_SECONDS,
+    INTENT_MIN_SCORE,
+    TERM_NORMALIZATION,
+    SOURCE_EXTRACTION,
+)
+from app.models.schemas import OutputStructure, ReferencedOutputStructure
+from app.core.vectorstore import load_vectorstore, hybrid_search
+from app.core.chain import create_rag_chain, aask_question
+from app.core.vectorstore_cache import VectorStoreCache, close_vectorstore, register_cache_gauges
+from app.core.multi_index import AUTO_GAME, GAME_KEY_FIELD, infer_game
+from app.core.shared_index import SharedVectorIndex
+from app.core.lexical import get_lexical_index
 from app.core.memory import get_session_history, delete_session_history
+from app.core.admission import AdmissionController, AdmissionRejected
+from app.core.singleflight import SingleFlight, history_fingerprint, normalize_question
+from app.core.prefetch import PrefetchCache
+from app.core.intent import INTENT_SHORTCUTS, classify_intent, template_response
+from app.core.terms import TERM_REWRITES, TermNormalizer, load_term_normalizer
+from app.core.resilience import UpstreamUnavailable, remaining_budget, request_deadline
+from app.core.tracing import annotate, bind_game
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-_vectorstore_cache = {}
+def _load_game(game_key: str):
+    """Load a game's vectorstore and build its lexical index up front."""
+    vectorstore, game_title = load_vectorstore(game_key, AVAILABLE_GAMES)
+    get_lexical_index(vectorstore)
+    return vectorstore, game_title
 
 
-def get_or_load_vectorstore(game_key: str):
-    """벡터스토어 캐싱"""
-    if game_key not in _vectorstore_cache:
-        vectorstore, game_title = load_vectorstore(game_key, AVAILABLE_GAMES)
-        _vectorstore_cache[game_key] = (vectorstore, game_title)
-    return _vectorstore_cache[game_key]
+# Per-game vectorstores, LRU-evicted under a memory budget (pinned games stay loaded)
+_vectorstores = VectorStoreCache(
+    _load_game,
+    budget_bytes=VECTORSTORE_CACHE_MB * 2**20,
+    pinned=VECTORSTORE_PINNED,
+)
+register_cache_gauges(_vectorstores)
+
+
+def _refresh_vectorstores(changed: set[str]) -> None:
+    """Swap rebuilt games; the cross-game view follows the consolidated index."""
+    snapshot = AVAILABLE_GAMES.snapshot()
+    if any(snapshot.get(game_key, {}).get("shared") for game_key in changed):
+        changed = changed | {AUTO_GAME}
+    _vectorstores.refresh(changed)
+
+
+# Swap in rebuilt indexes as the catalog watcher notices them (runs off the event loop)
+AVAILABLE_GAMES.subscribe(_refresh_vectorstores)
+
+# Concurrent identical questions per game share one retrieval + LLM call
+_chat_flights = SingleFlight()
+
+# Retrievals started from interim transcripts, reused by the final /chat call
+_prefetches: PrefetchCache[list] = PrefetchCache(
+    PREFETCH_TTL_SECONDS, PREFETCH_MIN_SIMILARITY / 100
+)
+
+# The LLM cites a context block number; the source sentence is extracted locally
+_output_structure = ReferencedOutputStructure if SOURCE_EXTRACTION else OutputStructure
+
+# Shorter partials are too ambiguous to retrieve for
+_PREFETCH_MIN_CHARS = 4
+
+# Cross-game search depth for "auto" (x RETRIEVE_K), so the winning game keeps enough hits
+_AUTO_SEARCH_FACTOR = 3
+
+# Bounded, game/session-fair concurrency for chain executions
+_chat_admission = AdmissionController(
+    "chat", CHAT_MAX_CONCURRENCY, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS
+)
+
+
+def warm_pinned_vectorstores() -> None:
+    """고정(pinned) 게임 벡터스토어 미리 로드"""
+    _vectorstores.warm(VECTORSTORE_PINNED)
+
+
+def share_vectorstores(game_keys) -> list[str]:
+    """
+    pre-fork 마스터에서 게임 인덱스를 공유용 행렬로 올려 캐시에 고정
+
+    Chroma 클라이언트는 fork를 넘길 수 없으므로 읽어낸 뒤 바로 닫음.
+    fork 이후 워커들은 같은 행렬을 copy-on-write로 공유함.
+
+    Args:
+        game_keys: 공유할 게임 키 목록
+
+    Returns:
+        list[str]: 공유에 성공한 게임 키
+    """
+    shared = []
+    for game_key in game_keys:
+        try:
+            vectorstore, game_title = load_vectorstore(game_key, AVAILABLE_GAMES)
+            try:
+                index = SharedVectorIndex.from_chroma(vectorstore)
+            finally:
+                close_vectorstore(vectorstore)
+        except Exception as e:
+            logger.warning(f"shared index skipped for {game_key}: {e}")
+            continue
+        get_lexical_index(index)
+        _vectorstores.seed(game_key, index, game_title)
+        shared.append(game_key)
+    return shared
 
 
 @router.get("/health", response_model=HealthCheckResponse)
@@ -31,43 +144,333 @@ async def health_check():
     }
 
 
+async def _answer(
+    vectorstore, game_key: str, game_title: str, question: str, session_id: str, documents=None
+) -> tuple[dict, str]:
+    """Run the RAG chain once; returns the parsed answer and the session it was saved to."""
+    async with _chat_admission.slot(game_key, session_id, _max_queue_wait()):
+        return await _run_chain(vectorstore, game_key, game_title, question, session_id, documents)
+
+
+async def _run_chain(
+    vectorstore, game_key: str, game_title: str, question: str, session_id: str, documents=None
+) -> tuple[dict, str]:
+    chain_with_history, parser = create_rag_chain(
+        vectorstore,
+        _output_structure,
+        PromptTemplate,
+        get_session_history,
+        terms_normalized=_term_normalizer(game_key) is not None,
+    )
+    response = await aask_question(
+        chain_with_history,
+        parser,
+        question,
+        game_title,
+        session_id,
+        documents=documents,
+        game_key=game_key,
+    )
+    return response, session_id
+
+
+def _max_queue_wait() -> float | None:
+    """How long a request may queue and still leave the LLM its minimum budget (None without a deadline)."""
+    remaining = remaining_budget()
+    if remaining is None:
+        return None
+    # Waiting past this only buys a degraded answer: reject with 429 + Retry-After instead
+    return remaining - LLM_MIN_BUDGET_MS / 1000
+
+
+def _record_shared_answer(session_id: str, question: str, response: dict) -> None:
+    """Append a coalesced question/answer to the follower's own history."""
+    get_session_history(session_id).add_messages([
+        HumanMessage(content=question),
+        AIMessage(content=json.dumps(response, ensure_ascii=False)),
+    ])
+
+
+def _shortcut_answer(game_key: str, question: str) -> tuple[dict, str] | None:
+    """Template answer + game title for greetings/small talk (None for rule questions or unknown games)."""
+    if INTENT_MIN_SCORE <= 0:
+        return None
+    intent = classify_intent(question, INTENT_MIN_SCORE / 100)
+    config = AVAILABLE_GAMES.snapshot().get(game_key)
+    if not intent.is_shortcut or config is None:
+        return None
+    bind_game(game_key)
+    annotate("intent", intent.intent)
+    INTENT_SHORTCUTS.inc(intent=intent.intent)
+    return template_response(intent.intent, config["name"]), config["name"]
+
+
+def _term_normalizer(game_key: str) -> TermNormalizer | None:
+    """The game's term normalizer (None when disabled or its index version ships no aliases)."""
+    if not TERM_NORMALIZATION:
+        return None
+    config = AVAILABLE_GAMES.snapshot().get(game_key)
+    normalizer = load_term_normalizer(config["db_path"], game_key) if config else None
+    if normalizer is None or not normalizer.size:
+        return None
+    return normalizer
+
+
+def _normalize_terms(game_key: str, text: str) -> str:
+    """Rewrite player aliases to the game's rulebook terms (unchanged without a terms.json)."""
+    normalizer = _term_normalizer(game_key)
+    if normalizer is None:
+        return text
+    rewritten, count = normalizer.rewrite(text)
+    if count:
+        annotate("term_rewrites", count)
+        TERM_REWRITES.inc(count)
+    return rewritten
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """보드게임 규칙 질문-답변 엔드포인트"""
-    try:
-        vectorstore, game_title = get_or_load_vectorstore(request.game_key)
-        
-        chain_with_history, parser = create_rag_chain(
-            vectorstore,
-            OutputStructure,
-            PromptTemplate,
-            get_session_history
+    # Greetings and small talk never reach retrieval, history or the LLM
+    shortcut = _shortcut_answer(request.game_key, request.question)
+    if shortcut is not None:
+        response, game_title = shortcut
+        return ChatResponse(
+            game_title=game_title, **response, session_id=request.session_id, game_key=request.game_key
         )
-        
-        response = ask_question(
-            chain_with_history,
-            parser,
-            request.question,
-            game_title,
-            request.session_id
+
+    try:
+        # Latency budget for every stage below (admission wait included); the answer
+        # degrades instead of running past it
+        with request_deadline(CHAT_DEADLINE_MS / 1000):
+            game_key, documents = request.game_key, None
+            if game_key == AUTO_GAME:
+                # The cross-game hits pick the game and double as its retrieval
+                game_key, documents = await run_in_threadpool(_resolve_game, request.question)
+                annotate("auto_game", game_key)
+
+            # Rulebook terms before the prefetch match, the singleflight key and the chain
+            question = _normalize_terms(game_key, request.question)
+            with _vectorstores.lease(game_key) as (vectorstore, game_title):
+                bind_game(game_key)
+                if documents is None:
+                    # Retrieval already done from the interim transcript, if close enough
+                    documents = await _prefetches.take(
+                        (game_key, request.session_id), question
+                    )
+                    if documents is not None:
+                        annotate("prefetch_hit", True)
+
+                # Only sessions with the same history may share an answer ("그럼 그 다음엔?")
+                history = await run_in_threadpool(
+                    lambda: get_session_history(request.session_id).messages
+                )
+                (response, answered_session), _ = await _chat_flights.do(
+                    (game_key, normalize_question(question), history_fingerprint(history)),
+                    lambda: _answer(
+                        vectorstore, game_key, game_title, question,
+                        request.session_id, documents,
+                    ),
+                )
+                if answered_session != request.session_id:
+                    # Shared an answer computed for another session: keep this session's history complete
+                    annotate("coalesced", True)
+                    await run_in_threadpool(
+                        _record_shared_answer, request.session_id, question, response
+                    )
+
+                return ChatResponse(
+                    game_title=game_title,
+                    answer_type=response.get("answer_type", "OTHERS"),
+                    description=response.get("description", ""),
+                    source=response.get("source", ""),
+                    page=response.get("page"),
+                    session_id=request.session_id,
+                    degraded=response.get("degraded", False),
+                    game_key=game_key,
+                )
+
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 많아 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(e.retry_after)},
         )
-        
-        return ChatResponse(
-            game_title=game_title,
-            answer_type=response.get("answer_type", "OTHERS"),
-            description=response.get("description", ""),
-            source=response.get("source", ""),
-            page=response.get("page"),
-            session_id=request.session_id
+    except UpstreamUnavailable as e:
+        # Nothing to degrade to (vector-only retrieval without a lexical index)
+        raise HTTPException(status_code=503, detail=f"일시적으로 답변할 수 없습니다: {e}")
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
+
+
+def _resolve_game(question: str) -> tuple[str, list]:
+    """
+    통합 인덱스 전체를 검색해 질문의 게임을 판별 (워커 스레드에서 실행)
+
+    Args:
+        question: 게임을 지정하지 않은 사용자 질문
+
+    Returns:
+        tuple[str, list]: (게임 키, 그 게임의 검색 결과 상위 RETRIEVE_K개)
+
+    Raises:
+        ValueError: 통합 인덱스가 없거나 게임을 판별할 수 없음
+    """
+    with _vectorstores.lease(AUTO_GAME) as (vectorstore, _):
+        hits = hybrid_search(vectorstore, [question], RETRIEVE_K * _AUTO_SEARCH_FACTOR)[0]
+    game_key = infer_game(hits)
+    if game_key is None:
+        raise ValueError("질문에 해당하는 게임을 찾을 수 없습니다")
+    documents = [doc for doc in hits if doc.metadata.get(GAME_KEY_FIELD) == game_key]
+    return game_key, documents[:RETRIEVE_K]
+
+
+def _prefetch_documents(game_key: str, text: str) -> list:
+    """Embed an interim transcript and retrieve its documents (runs in a worker thread)."""
+    with _vectorstores.lease(game_key) as (vectorstore, _):
+        return hybrid_search(vectorstore, [text], RETRIEVE_K)[0]
+
+
+@router.post("/prefetch", response_model=PrefetchResponse)
+async def prefetch(request: PrefetchRequest):
+    """말하는 중인 질문의 중간 전사문으로 검색을 미리 시작 (최종 /chat에서 재사용)"""
+    if request.game_key not in AVAILABLE_GAMES:
+        raise HTTPException(status_code=404, detail=f"게임을 찾을 수 없습니다: {request.game_key}")
+    bind_game(request.game_key)
+    text = _normalize_terms(request.game_key, request.partial_text.strip())
+    if len(normalize_question(text)) < _PREFETCH_MIN_CHARS:
+        return PrefetchResponse(status="skipped")
+    status = _prefetches.schedule(
+        (request.game_key, request.session_id),
+        text,
+        lambda: run_in_threadpool(_prefetch_documents, request.game_key, text),
+    )
+    return PrefetchResponse(status=status)
+
+
+def _ephemeral_session_history(session_id: str) -> BaseChatMessageHistory:
+    """Throwaway history for batch items without a session (nothing is persisted)."""
+    return InMemoryChatMessageHistory()
+
+
+@router.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    배치 질문-답변 엔드포인트
+
+    모든 질문을 한 번에 임베딩/검색한 뒤 LLM 호출을 동시 실행하고,
+    결과를 NDJSON(한 줄에 BatchChatResult 하나)으로 스트리밍합니다.
+    """
+    if request.game_key == AUTO_GAME:
+        # One game per batch: the chains share its title, history and retrieval
+        raise HTTPException(status_code=400, detail="배치 요청은 게임을 지정해야 합니다")
+    try:
+        # Items share the /chat execution slots; refuse now while a 429 can still be sent
+        _chat_admission.ensure_capacity()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 많아 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(e.retry_after)},
         )
-        
+    # Sessionless items of one batch queue fairly as a single session
+    batch_session = f"batch-{uuid.uuid4().hex[:12]}"
+    try:
+        # Held until the stream ends so eviction cannot close the store mid-batch
+        lease = _vectorstores.acquire(request.game_key)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    vectorstore, game_title = lease.vectorstore, lease.title
+    bind_game(request.game_key)
+
+    try:
+        questions = [_normalize_terms(request.game_key, item.question) for item in request.items]
+        documents = await run_in_threadpool(
+            hybrid_search, vectorstore, questions, RETRIEVE_K
+        )
     except Exception as e:
-        import traceback
+        _vectorstores.release(lease)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
+    terms_normalized = _term_normalizer(request.game_key) is not None
+    session_chain, parser = create_rag_chain(
+        vectorstore, _output_structure, PromptTemplate, get_session_history,
+        terms_normalized=terms_normalized,
+    )
+    ephemeral_chain, _ = create_rag_chain(
+        vectorstore, _output_structure, PromptTemplate, _ephemeral_session_history,
+        terms_normalized=terms_normalized,
+    )
+    concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(index: int, item: BatchChatItem) -> BatchChatResult:
+        shortcut = _shortcut_answer(request.game_key, item.question)
+        if shortcut is not None:
+            return BatchChatResult(
+                index=index, question=item.question, session_id=item.session_id, **shortcut[0]
+            )
+        async with semaphore:
+            chain = session_chain if item.session_id else ephemeral_chain
+            try:
+                async with _chat_admission.slot(request.game_key, item.session_id or batch_session):
+                    response = await aask_question(
+                        chain,
+                        parser,
+                        questions[index],
+                        game_title,
+                        # Sessionless items count toward the game totals only, not a made-up session
+                        item.session_id,
+                        documents=documents[index],
+                        game_key=request.game_key,
+                    )
+                return BatchChatResult(
+                    index=index,
+                    question=item.question,
+                    answer_type=response.get("answer_type", "OTHERS"),
+                    description=response.get("description", ""),
+                    source=response.get("source", ""),
+                    page=response.get("page"),
+                    session_id=item.session_id,
+                    degraded=response.get("degraded", False),
+                )
+            except AdmissionRejected as e:
+                return BatchChatResult(
+                    index=index,
+                    question=item.question,
+                    session_id=item.session_id,
+                    error=f"요청이 많아 처리하지 못했습니다. {e.retry_after}초 뒤 다시 시도해주세요.",
+                )
+            except Exception as e:
+                return BatchChatResult(
+                    index=index,
+                    question=item.question,
+                    session_id=item.session_id,
+                    error=f"서버 오류: {str(e)}",
+                )
+
+    async def stream():
+        tasks = [
+            asyncio.create_task(answer(index, item))
+            for index, item in enumerate(request.items)
+        ]
+        try:
+            pending = tasks if request.ordered else asyncio.as_completed(tasks)
+            for next_result in pending:
+                result = await next_result
+                yield result.model_dump_json() + "\n"
+        finally:
+            # Stop outstanding LLM calls if the client disconnects early
+            for task in tasks:
+                task.cancel()
+            _vectorstores.release(lease)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 
 @router.delete("/session/{session_id}")
 async def clear_session(session_id: str):
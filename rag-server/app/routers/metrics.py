@@ -0,0 +1,13 @@
+"""Metrics API router."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 형식 메트릭 (단계별 지연 시간 히스토그램 등)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,35 @@
+"""Usage API router.
+
+Responses name session ids, so every route requires the admin token like
+/admin (404 while RAG_ADMIN_TOKEN is unset).
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.usage import USAGE_LEDGER
+from app.models.schemas import SessionUsageResponse, UsageSummaryResponse
+from app.routers.admin import require_admin
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/usage", response_model=UsageSummaryResponse)
+async def usage_summary(
+    window: Optional[str] = Query(default=None, description="5m / 1h / 24h (생략 시 누적)"),
+    top: int = Query(default=10, ge=0, le=100, description="반환할 상위 세션 수"),
+):
+    """게임별 토큰/비용 합계와 사용량 상위 세션 (워커 프로세스 단위)"""
+    try:
+        return USAGE_LEDGER.summary(window, top_sessions=top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/usage/session/{session_id}", response_model=SessionUsageResponse)
+async def session_usage(session_id: str):
+    """세션 하나의 구간별 토큰/비용"""
+    usage = USAGE_LEDGER.session(session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail=f"사용량 기록이 없는 세션입니다: {session_id}")
+    return usage
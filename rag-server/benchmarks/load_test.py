@@ -0,0 +1,665 @@
+"""Concurrent load test of the /chat API against local upstream stand-ins.
+
+Answers "how many tables can one rag-server instance serve before p99 latency
+breaks the SLO (3 s)?" and lets that number be compared before/after a change.
+
+The test starts, in separate processes:
+- `benchmarks.upstreams`: fake OpenAI (streamed chat completions), Upstage
+  (embeddings) and DynamoDB endpoints with log-normal latencies
+- rag-server itself (`uvicorn app.main:app`, or `app.prefork` with
+  `--prefork`), unmodified, pointed at the stand-ins through the SDKs'
+  base-URL environment variables and at a freshly built index of the
+  benchmarked games (embedded with the same hashing embeddings the fake
+  Upstage endpoint returns)
+
+History goes to DynamoDB Local when `--ddb-endpoint` is given (e.g.
+`docker run -p 8001:8000 amazon/dynamodb-local`), otherwise to the
+stand-in's DynamoDB endpoint. `--target` skips all of this and loads an
+already running server.
+
+Load is generated in steps, each held for `--step-seconds`:
+- `--tables N ...` (closed loop): N tables, each a session on one game that
+  asks a question, waits for the answer and thinks for an exponential
+  `--think-seconds` before the next one
+- `--rates R ...` (open loop): Poisson arrivals at R requests/s from a pool of
+  sessions, regardless of how fast the server answers
+
+Questions are drawn from the games' QA JSON (weighted by `--games
+rummikub=3 sabotage=1`), with a share of popular repeats (`--hot-share`) and
+of greetings/small talk (`--chit-chat-share`).
+
+Per step the report has throughput, client latency percentiles, error
+rates by kind, the degraded-answer rate and queueing: client-side requests
+in flight plus the server's admission queue depth, slots in use, admission
+wait percentiles and 429 rejections (scraped from /metrics; with several
+workers each scrape sees one worker). The capacity line is the largest step
+whose p99 and error rate stay within `--slo-ms` / `--max-error-rate`.
+
+Usage (from rag-server/):
+    python -m benchmarks.load_test --tables 5 10 20 40 --step-seconds 60
+    python -m benchmarks.load_test --rates 2 4 8 --server-env RAG_CHAT_MAX_CONCURRENCY=32
+    python -m benchmarks.load_test --tables 10 20 --baseline benchmarks/reports/load-before.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import httpx
+
+from benchmarks.stubs import RULEBOOK_JSON_DIR, HashingEmbeddings, load_rulebook_documents
+from benchmarks.upstreams import add_profile_arguments
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+REPORTS_DIR = Path(__file__).resolve().parent / "reports"
+INTENT_CASES = Path(__file__).resolve().parent / "intent_cases.json"
+
+# Popular questions per game that the hot share is drawn from
+_HOT_SET_SIZE = 5
+
+_METRIC_LINE = re.compile(r"^([a-zA-Z_:][\w:]*)(\{[^}]*\})?\s+(\S+)$")
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+@dataclass
+class Result:
+    """One /chat call as seen by the client."""
+    step: int
+    started: float
+    latency: float
+    kind: str
+    degraded: bool = False
+
+
+class QuestionMix:
+    """Weighted game choice and question sampling from the QA JSON files."""
+
+    def __init__(self, weights: dict[str, float], hot_share: float, chit_chat_share: float, seed: int):
+        self._rng = random.Random(seed)
+        self.weights = weights
+        self.hot_share = hot_share
+        self.chit_chat_share = chit_chat_share
+        self.questions: dict[str, list[str]] = {}
+        for game_key in weights:
+            path = RULEBOOK_JSON_DIR / "QA" / f"{game_key}_QA.json"
+            items = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+            questions = [item["question"] for item in items if item.get("question")]
+            if not questions:
+                raise ValueError(f"No QA questions found for game: {game_key} ({path})")
+            self.questions[game_key] = questions
+        cases = json.loads(INTENT_CASES.read_text(encoding="utf-8"))
+        self.chit_chat = [case["question"] for case in cases if case["intent"] != "question"]
+
+    def game(self) -> str:
+        games = list(self.weights)
+        return self._rng.choices(games, weights=[self.weights[g] for g in games])[0]
+
+    def question(self, game_key: str) -> str:
+        roll = self._rng.random()
+        if roll < self.chit_chat_share and self.chit_chat:
+            return self._rng.choice(self.chit_chat)
+        questions = self.questions[game_key]
+        if roll < self.chit_chat_share + self.hot_share:
+            return self._rng.choice(questions[:_HOT_SET_SIZE])
+        return self._rng.choice(questions)
+
+    def think(self, mean_seconds: float) -> float:
+        return self._rng.expovariate(1 / mean_seconds) if mean_seconds > 0 else 0.0
+
+    def arrival_gap(self, rate: float) -> float:
+        return self._rng.expovariate(rate)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # Same nearest-rank percentile as rag_benchmark (not imported: it loads the whole chain)
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_metrics(text: str) -> dict[str, list[tuple[dict[str, str], float]]]:
+    """Prometheus text -> {metric name: [(labels, value)]}."""
+    metrics: dict[str, list[tuple[dict[str, str], float]]] = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _METRIC_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        try:
+            number = float(value)
+        except ValueError:
+            continue
+        metrics.setdefault(name, []).append((dict(_LABEL.findall(labels or "")), number))
+    return metrics
+
+
+def _metric_sum(metrics: dict, name: str, **labels: str) -> float:
+    return sum(
+        value for found, value in metrics.get(name, [])
+        if all(found.get(key) == wanted for key, wanted in labels.items())
+    )
+
+
+def _wait_buckets(metrics: dict) -> dict[float, float]:
+    """Cumulative admission wait histogram summed over games: {upper bound: count}."""
+    buckets: dict[float, float] = {}
+    for labels, value in metrics.get("rag_admission_wait_seconds_bucket", []):
+        bound = math.inf if labels.get("le") == "+Inf" else float(labels.get("le", "inf"))
+        buckets[bound] = buckets.get(bound, 0.0) + value
+    return buckets
+
+
+def histogram_quantile(buckets: dict[float, float], q: float) -> Optional[float]:
+    """
+    누적 버킷 카운트로 분위수 추정 (Prometheus histogram_quantile과 같은 선형 보간)
+
+    Args:
+        buckets: {버킷 상한: 누적 카운트}
+        q: 분위수 (0~1)
+
+    Returns:
+        Optional[float]: 추정값 (초), 관측이 없으면 None
+    """
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return None
+    rank = q * buckets[bounds[-1]]
+    lower, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == math.inf:
+                return lower
+            if count == lower_count:
+                return bound
+            return lower + (bound - lower) * (rank - lower_count) / (count - lower_count)
+        lower, lower_count = bound, count
+    return lower
+
+
+class LoadRunner:
+    """Drives the load steps against one server and collects results and metric samples."""
+
+    def __init__(self, base_url: str, mix: QuestionMix, args: argparse.Namespace):
+        self.base_url = base_url.rstrip("/")
+        self.mix = mix
+        self.args = args
+        self.results: list[Result] = []
+        self.in_flight = 0
+        self._t0 = time.perf_counter()
+
+    def now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    async def ask(self, client: httpx.AsyncClient, step: int, game_key: str, session_id: str) -> None:
+        payload = {"question": self.mix.question(game_key), "game_key": game_key, "session_id": session_id}
+        started = self.now()
+        self.in_flight += 1
+        degraded = False
+        try:
+            response = await client.post(f"{self.base_url}/api/v1/chat", json=payload)
+            if response.status_code == 200:
+                kind = "ok"
+                degraded = bool(response.json().get("degraded"))
+            elif response.status_code == 429:
+                kind = "rejected"
+            elif response.status_code == 503:
+                kind = "unavailable"
+            else:
+                kind = f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            kind = "timeout"
+        except httpx.HTTPError:
+            kind = "connection"
+        finally:
+            self.in_flight -= 1
+        self.results.append(Result(step, started, self.now() - started, kind, degraded))
+
+    async def _table(self, client: httpx.AsyncClient, step: int, deadline: float) -> None:
+        game_key = self.mix.game()
+        session_id = f"load-{uuid.uuid4().hex[:12]}"
+        # Stagger the first question so tables do not start in lockstep
+        await asyncio.sleep(random.uniform(0, self.args.think_seconds))
+        while self.now() < deadline:
+            await self.ask(client, step, game_key, session_id)
+            await asyncio.sleep(self.mix.think(self.args.think_seconds))
+
+    async def _arrivals(self, client: httpx.AsyncClient, step: int, rate: float, deadline: float) -> None:
+        sessions = [(self.mix.game(), f"load-{uuid.uuid4().hex[:12]}") for _ in range(self.args.sessions)]
+        tasks = set()
+        while True:
+            await asyncio.sleep(self.mix.arrival_gap(rate))
+            if self.now() >= deadline:
+                break
+            game_key, session_id = random.choice(sessions)
+            task = asyncio.create_task(self.ask(client, step, game_key, session_id))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _scrape(self, client: httpx.AsyncClient) -> Optional[dict]:
+        try:
+            response = await client.get(f"{self.base_url}/metrics", timeout=5)
+            return parse_metrics(response.text)
+        except httpx.HTTPError:
+            return None
+
+    async def _sample_queue(self, client: httpx.AsyncClient, samples: list[dict], stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            metrics = await self._scrape(client)
+            sample = {"client_in_flight": self.in_flight}
+            if metrics is not None:
+                sample["queued"] = _metric_sum(metrics, "rag_admission_queued", pool="chat")
+                sample["executing"] = _metric_sum(metrics, "rag_admission_in_flight", pool="chat")
+            samples.append(sample)
+            try:
+                await asyncio.wait_for(stop.wait(), self.args.metrics_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_step(self, client: httpx.AsyncClient, step: int, level: float) -> dict[str, Any]:
+        """
+        부하 단계 하나 실행 (테이블 수 또는 초당 요청 수를 step_seconds 동안 유지)
+
+        Args:
+            client: 공유 HTTP 클라이언트
+            step: 단계 번호
+            level: 테이블 수 (closed loop) 또는 초당 요청 수 (open loop)
+
+        Returns:
+            dict: 단계 요약 (처리량, 지연 분위수, 오류율, 대기열)
+        """
+        before = await self._scrape(client) or {}
+        started = self.now()
+        deadline = started + self.args.step_seconds
+        samples: list[dict] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(self._sample_queue(client, samples, stop))
+        if self.args.rates:
+            await self._arrivals(client, step, level, deadline)
+        else:
+            await asyncio.gather(*(self._table(client, step, deadline) for _ in range(int(level))))
+        stop.set()
+        await sampler
+        after = await self._scrape(client) or {}
+        measured_from = started + self.args.warmup_seconds
+        results = [r for r in self.results if r.step == step and measured_from <= r.started < deadline]
+        return summarize_step(level, results, deadline - measured_from, samples, before, after, self.args)
+
+
+def summarize_step(
+    level: float,
+    results: list[Result],
+    seconds: float,
+    samples: list[dict],
+    before: dict,
+    after: dict,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    ok = [r for r in results if r.kind == "ok"]
+    latencies = [r.latency * 1000 for r in ok]
+    kinds: dict[str, int] = {}
+    for r in results:
+        kinds[r.kind] = kinds.get(r.kind, 0) + 1
+    errors = len(results) - len(ok)
+
+    wait_before, wait_after = _wait_buckets(before), _wait_buckets(after)
+    wait_delta = {bound: count - wait_before.get(bound, 0.0) for bound, count in wait_after.items()}
+    wait_p50 = histogram_quantile(wait_delta, 0.5)
+    wait_p99 = histogram_quantile(wait_delta, 0.99)
+    queued = [s["queued"] for s in samples if "queued" in s]
+    executing = [s["executing"] for s in samples if "executing" in s]
+    client_in_flight = [s["client_in_flight"] for s in samples]
+
+    summary = {
+        "level": level,
+        "requests": len(results),
+        "throughput_rps": len(ok) / seconds if seconds > 0 else 0.0,
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.50),
+            "p90": _percentile(latencies, 0.90),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        },
+        "error_rate": errors / len(results) if results else 0.0,
+        "results": kinds,
+        "degraded_rate": sum(r.degraded for r in ok) / len(ok) if ok else 0.0,
+        "queue": {
+            "client_in_flight_max": max(client_in_flight, default=0),
+            "server_queued_mean": sum(queued) / len(queued) if queued else None,
+            "server_queued_max": max(queued, default=None),
+            "server_executing_max": max(executing, default=None),
+            "admission_wait_ms_p50": None if wait_p50 is None else wait_p50 * 1000,
+            "admission_wait_ms_p99": None if wait_p99 is None else wait_p99 * 1000,
+            "rejected": _metric_sum(after, "rag_admission_rejected_total", pool="chat")
+            - _metric_sum(before, "rag_admission_rejected_total", pool="chat"),
+        },
+    }
+    summary["within_slo"] = bool(ok) and (
+        summary["latency_ms"]["p99"] <= args.slo_ms and summary["error_rate"] <= args.max_error_rate
+    )
+    return summary
+
+
+def capacity(steps: list[dict]) -> Optional[float]:
+    """Largest load level before the first step that misses the SLO."""
+    best = None
+    for step in steps:
+        if not step["within_slo"]:
+            break
+        best = step["level"]
+    return best
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_index(workdir: Path, games: Sequence[str], dimensions: int) -> Path:
+    """
+    벤치마크 게임의 인덱스와 catalog.json 생성 (가짜 Upstage와 같은 해싱 임베딩 사용)
+
+    Args:
+        workdir: 임시 작업 디렉터리
+        games: 게임 키 목록
+        dimensions: 임베딩 차원 (가짜 임베딩 엔드포인트와 같아야 함)
+
+    Returns:
+        Path: 생성된 catalog.json 경로
+    """
+    from langchain_chroma import Chroma
+
+    from app.config.games import DEFAULT_GAMES
+
+    root = workdir / "chroma_db"
+    embeddings = HashingEmbeddings(dimensions)
+    catalog = {"games": {}}
+    for game_key in games:
+        documents = load_rulebook_documents(game_key)
+        if not documents:
+            raise ValueError(f"No rulebook JSON found for game: {game_key}")
+        vectorstore = Chroma.from_documents(
+            documents,
+            embeddings,
+            persist_directory=str(root / game_key),
+            collection_name=f"{game_key}_rulebook",
+            collection_metadata={"hnsw:space": "cosine"},
+        )
+        vectorstore._client.close()
+        catalog["games"][game_key] = {
+            "name": DEFAULT_GAMES.get(game_key, {}).get("name", game_key),
+            "db_path": game_key,
+            "collection": f"{game_key}_rulebook",
+        }
+        print(f"📚 {game_key}: {len(documents)} chunks indexed")
+    path = root / "catalog.json"
+    path.write_text(json.dumps(catalog, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def ensure_history_table(endpoint: str, table: str, region: str) -> None:
+    """Create the history table on DynamoDB Local / the stand-in if it does not exist."""
+    import boto3
+
+    # DynamoDB Local accepts any credentials; these never reach AWS
+    client = boto3.client(
+        "dynamodb", endpoint_url=endpoint, region_name=region,
+        aws_access_key_id="local", aws_secret_access_key="local",
+    )
+    try:
+        client.describe_table(TableName=table)
+    except client.exceptions.ResourceNotFoundException:
+        client.create_table(
+            TableName=table,
+            KeySchema=[{"AttributeName": "SessionId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "SessionId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+def _start(cmd: list[str], env: dict, log_path: Path, ready_url: str, timeout: float) -> subprocess.Popen:
+    log = open(log_path, "w", encoding="utf-8")
+    process = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{cmd[2]} exited with {process.returncode}, see {log_path}")
+        try:
+            if httpx.get(ready_url, timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"{cmd[2]} not ready after {timeout:.0f}s, see {log_path}")
+
+
+def _stop(process: Optional[subprocess.Popen]) -> None:
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _profile_flags(args: argparse.Namespace) -> list[str]:
+    flags = []
+    for name in (
+        "llm_ttft_ms", "llm_ttft_p99_ms", "llm_ms_per_token", "llm_error_rate",
+        "embed_ms", "embed_p99_ms", "embed_error_rate", "embed_dimensions",
+        "ddb_ms", "ddb_p99_ms", "seed",
+    ):
+        flags += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    return flags
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict[str, Any], baseline: Optional[dict] = None) -> None:
+    unit = "rps" if report["config"]["rates"] else "tables"
+    previous = {step["level"]: step for step in (baseline or {}).get("steps", [])}
+    print("=" * 96)
+    print(f"{unit:>7}{'reqs':>7}{'ok/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+          f"{'err':>7}{'degr':>7}{'queue':>7}{'wait99':>8}  slo")
+    for step in report["steps"]:
+        latency, queue = step["latency_ms"], step["queue"]
+        queued = "-" if queue["server_queued_max"] is None else f"{queue['server_queued_max']:.0f}"
+        wait = "-" if queue["admission_wait_ms_p99"] is None else f"{queue['admission_wait_ms_p99']:.0f}"
+        line = (f"{step['level']:>7g}{step['requests']:>7}{step['throughput_rps']:>8.2f}"
+                f"{latency['p50']:>8.0f}{latency['p95']:>8.0f}{latency['p99']:>8.0f}{latency['max']:>8.0f}"
+                f"{step['error_rate']:>7.1%}{step['degraded_rate']:>7.1%}{queued:>7}{wait:>8}"
+                f"  {'✅' if step['within_slo'] else '❌'}")
+        before = previous.get(step["level"])
+        if before:
+            line += f"  (p99 {before['latency_ms']['p99']:.0f} → {latency['p99']:.0f} ms)"
+        print(line)
+        if step["results"].keys() - {"ok"}:
+            print(f"{'':>7}results: {step['results']}")
+    print("=" * 96)
+    limit = report["capacity"]
+    slo = report["config"]["slo_ms"]
+    print(f"🎯 capacity within p99 ≤ {slo:.0f} ms: "
+          f"{'none of the steps' if limit is None else f'{limit:g} {unit}'}", end="")
+    if baseline is not None:
+        print(f" (baseline: {baseline.get('capacity')} {unit}, {baseline.get('revision')})", end="")
+    print()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent /chat load test with local upstream stand-ins")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--tables", type=int, nargs="+", default=None,
+                      help="closed loop: concurrent tables per step (default: 5 10 20 40)")
+    load.add_argument("--rates", type=float, nargs="+", default=None,
+                      help="open loop: Poisson arrival rate (requests/s) per step")
+    parser.add_argument("--step-seconds", type=float, default=60.0)
+    parser.add_argument("--warmup-seconds", type=float, default=5.0,
+                        help="requests started in the first seconds of a step are not measured")
+    parser.add_argument("--think-seconds", type=float, default=10.0,
+                        help="mean pause between a table's answer and its next question")
+    parser.add_argument("--sessions", type=int, default=200, help="open loop: sessions the arrivals are spread over")
+    parser.add_argument("--games", nargs="+", default=["rummikub", "sabotage", "halligalli"],
+                        help="games with optional weights, e.g. rummikub=3 sabotage=1")
+    parser.add_argument("--hot-share", type=float, default=0.1,
+                        help="share of questions repeated from each game's popular set")
+    parser.add_argument("--chit-chat-share", type=float, default=0.05,
+                        help="share of greetings/small talk (answered without the chain)")
+    parser.add_argument("--slo-ms", type=float, default=3000.0, help="p99 latency objective")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout-seconds", type=float, default=30.0, help="client timeout per request")
+    parser.add_argument("--metrics-interval", type=float, default=1.0, help="seconds between /metrics scrapes")
+    parser.add_argument("--target", default=None,
+                        help="load an already running server instead of starting one with the stand-ins")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--prefork", action="store_true", help="serve with app.prefork instead of uvicorn")
+    parser.add_argument("--server-env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="extra server settings, e.g. RAG_CHAT_MAX_CONCURRENCY=32")
+    parser.add_argument("--ddb-endpoint", default=None,
+                        help="DynamoDB Local endpoint (default: the stand-in's DynamoDB endpoint)")
+    parser.add_argument("--ddb-table", default="rag-load-test")
+    parser.add_argument("--ddb-region", default="ap-northeast-2")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="report path (default: benchmarks/reports/load-<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier report to compare against")
+    parser.add_argument("--keep-workdir", action="store_true", help="keep the index and process logs")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.rates and not args.tables:
+        args.tables = [5, 10, 20, 40]
+    return args
+
+
+def _game_weights(specs: Sequence[str]) -> dict[str, float]:
+    weights = {}
+    for spec in specs:
+        game_key, _, weight = spec.partition("=")
+        weights[game_key] = float(weight) if weight else 1.0
+    return weights
+
+
+async def run_load(base_url: str, mix: QuestionMix, args: argparse.Namespace) -> list[dict]:
+    runner = LoadRunner(base_url, mix, args)
+    levels = args.rates or args.tables
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=1000)
+    steps = []
+    async with httpx.AsyncClient(timeout=args.timeout_seconds, limits=limits) as client:
+        for step, level in enumerate(levels):
+            print(f"🚦 step {step + 1}/{len(levels)}: {level:g} {'rps' if args.rates else 'tables'} "
+                  f"for {args.step_seconds:.0f}s")
+            summary = await runner.run_step(client, step, level)
+            print(f"   ok/s={summary['throughput_rps']:.2f} p99={summary['latency_ms']['p99']:.0f} ms "
+                  f"errors={summary['error_rate']:.1%}")
+            steps.append(summary)
+    return steps
+
+
+def main(argv: Optional[Sequence[str]] = None) -> dict[str, Any]:
+    args = parse_args(argv)
+    weights = _game_weights(args.games)
+    mix = QuestionMix(weights, args.hot_share, args.chit_chat_share, args.seed)
+    server_env = dict(item.split("=", 1) for item in args.server_env)
+
+    workdir = Path(tempfile.mkdtemp(prefix="rag-load-"))
+    upstreams = server = None
+    try:
+        base_url = args.target
+        if base_url is None:
+            catalog = build_index(workdir, list(weights), args.embed_dimensions)
+            upstream_port, server_port = _free_port(), _free_port()
+            upstream_url = f"http://127.0.0.1:{upstream_port}"
+            upstreams = _start(
+                [sys.executable, "-m", "benchmarks.upstreams", "--port", str(upstream_port), *_profile_flags(args)],
+                dict(os.environ), workdir / "upstreams.log", f"{upstream_url}/openai/v1/models", 60,
+            )
+            ddb_endpoint = args.ddb_endpoint or f"{upstream_url}/dynamodb"
+            ensure_history_table(ddb_endpoint, args.ddb_table, args.ddb_region)
+            env = {
+                **os.environ,
+                # Stand-ins accept any key; the real ones are never sent anywhere
+                "OPENAI_API_KEY": "local-stand-in",
+                "UPSTAGE_API_KEY": "local-stand-in",
+                "OPENAI_BASE_URL": f"{upstream_url}/openai/v1",
+                "OPENAI_API_BASE": f"{upstream_url}/openai/v1",
+                "UPSTAGE_API_BASE": f"{upstream_url}/upstage/v1/solar",
+                "DDB_ENDPOINT_URL": ddb_endpoint,
+                "DDB_TABLE_FOR_RAG": args.ddb_table,
+                "DDB_AWS_ACCESS_KEY": "local",
+                "DDB_AWS_SECRET_ACCESS_KEY": "local",
+                "DDB_AWS_REGION": args.ddb_region,
+                "RAG_GAME_CATALOG_PATH": str(catalog),
+                "RAG_VECTORSTORE_PINNED": ",".join(weights),
+                "LANGCHAIN_TRACING_V2": "false",
+                **server_env,
+            }
+            if args.prefork:
+                cmd = [sys.executable, "-m", "app.prefork", "--workers", str(args.workers),
+                       "--host", "127.0.0.1", "--port", str(server_port), "--log-level", "warning"]
+            else:
+                cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                       "--port", str(server_port), "--workers", str(args.workers), "--log-level", "warning"]
+            base_url = f"http://127.0.0.1:{server_port}"
+            server = _start(cmd, env, workdir / "server.log", f"{base_url}/api/v1/health", 180)
+            print(f"🧪 server {base_url} ↔ stand-ins {upstream_url} (history: {ddb_endpoint})")
+
+        steps = asyncio.run(run_load(base_url, mix, args))
+    finally:
+        _stop(server)
+        _stop(upstreams)
+        if args.keep_workdir:
+            print(f"📁 index and logs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "server_env": server_env,
+        "steps": steps,
+        "capacity": capacity(steps),
+    }
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    print_report(report, baseline)
+
+    output = args.output or REPORTS_DIR / f"load-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"📄 report saved: {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""Offline RAG evaluation and latency benchmark.
+
+Runs a question set per game through `create_rag_chain` / `ask_question` and
+reports a per-stage latency breakdown (embed, retrieve, history, LLM, parse),
+answer rate and context/prompt token counts, plus how often the lexical index
+answered without an embedding call and the QA source-chunk hit rate at small k
+for vector-only vs hybrid retrieval, both for the QA questions themselves and
+for reworded questions that share little wording with their source chunk
+(`benchmarks/paraphrase_cases.json`). `prepare` is the wall-clock time
+of the concurrent history load + embed + retrieve step; the report also shows
+how much the overlap saved compared to running them back to back. The lexical
+index is built before timing, as the server does at startup.
+
+`--retrieval` picks the retrieval path: `hybrid` (production default), `embed`
+(hybrid without the lexical-only shortcut, so every question is embedded) or
+`vector` (RAG_HYBRID_LEXICAL=0). QA questions appear verbatim in the corpus and
+almost always take the shortcut, so the history/retrieval overlap only shows
+up with `embed` or `vector`.
+
+Each upstream is pluggable: `real` uses the production backends (Upstage,
+persisted chroma_db, OpenAI, DynamoDB), `stub` uses the deterministic local
+stand-ins from `benchmarks.stubs` with configurable injected latency.
+
+`--output-mode` compares native structured output against the legacy
+format-instructions prompt (prompt tokens and parse failures).
+
+`--source-extraction 0|1` compares the LLM copying the source sentence
+against citing a context block number with local sentence extraction (output
+tokens; `--llm-ms-per-output-token` turns them into stub decode time).
+
+`--prompt-layout` compares the prefix-cache layout (static instructions first)
+against the legacy layout by the share of prompt tokens served from the
+provider's prompt cache: the real API's usage field with `--llm real`, or the
+stub's simulation of OpenAI's prefix caching.
+
+The local greeting/small-talk classifier runs in front of the chain as in
+production; its precision/recall and latency are reported over a labeled
+chit-chat set (`benchmarks/intent_cases.json`) plus every benchmarked game
+question (all of which must fall through to the chain).
+
+Usage (from rag-server/):
+    python -m benchmarks.rag_benchmark --games rummikub sabotage --limit 25
+    python -m benchmarks.rag_benchmark --output-mode json --malformed-rate 0.05
+    python -m benchmarks.rag_benchmark --prompt-layout legacy
+    python -m benchmarks.rag_benchmark --retrieval vector
+    python -m benchmarks.rag_benchmark --llm real --embeddings real --history stub
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import statistics
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.exceptions import OutputParserException
+
+from app.config.games import AVAILABLE_GAMES
+from app.config.prompts import PromptTemplate
+from app.config.settings import INTENT_MIN_SCORE, SOURCE_EXTRACTION
+from app.core import vectorstore as vectorstore_module
+from app.core.chain import ask_question, create_rag_chain
+from app.core.intent import QUESTION, classify_intent, template_response
+from app.core.lexical import get_lexical_index
+from app.core.vectorstore import batch_similarity_search, hybrid_search
+from app.core.tracing import RequestTrace, start_trace
+from app.core.usage import TokenUsage
+from app.models.schemas import OutputStructure, ReferencedOutputStructure
+from benchmarks.stubs import (
+    RULEBOOK_JSON_DIR,
+    HashingEmbeddings,
+    LatencyModel,
+    StubChatMessageHistory,
+    StubChatModel,
+    build_stub_vectorstore,
+)
+
+STAGES = ("lexical", "embed", "retrieve", "history", "prepare", "llm_ttft", "llm", "parse", "total")
+
+INTENT_CASES = Path(__file__).resolve().parent / "intent_cases.json"
+PARAPHRASE_CASES = Path(__file__).resolve().parent / "paraphrase_cases.json"
+
+# Trace stage names folded into report columns
+STAGE_ALIASES = {"history_load": "history", "history_save": "history"}
+
+
+class Sample:
+    """Measurements of a single question."""
+
+    def __init__(self, game_key: str, question: str):
+        self.game_key = game_key
+        self.question = question
+        self.stages = {stage: 0.0 for stage in STAGES}
+        self.history_load = 0.0
+        self.lexical_shortcut = False
+        self.context_tokens = 0
+        self.prompt_tokens = 0
+        self.llm_input_tokens = 0
+        self.llm_cached_tokens = 0
+        self.output_tokens = 0
+        self.answer_type: Optional[str] = None
+        self.intent = QUESTION
+        self.expect_answer: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.parse_failed = False
+
+    def load_trace(self, trace: RequestTrace) -> None:
+        """Copy stage timings and token counts recorded by app.core.tracing."""
+        totals = trace.totals()
+        for stage, seconds in totals.items():
+            key = STAGE_ALIASES.get(stage, stage)
+            if key in self.stages:
+                self.stages[key] += seconds
+        self.history_load = totals.get("history_load", 0.0)
+        self.lexical_shortcut = bool(trace.attributes.get("lexical_shortcut"))
+        self.context_tokens = trace.attributes.get("context_tokens", 0)
+        self.prompt_tokens = trace.attributes.get("prompt_tokens", 0)
+        self.llm_input_tokens = trace.attributes.get("llm_input_tokens", 0)
+        self.llm_cached_tokens = trace.attributes.get("llm_cached_tokens", 0)
+        self.output_tokens = trace.attributes.get("llm_output_tokens", 0)
+
+
+def load_questions(game_key: str, path: Optional[Path], limit: int, seed: int) -> list[dict]:
+    """
+    게임별 질문 세트 로드
+
+    Args:
+        game_key: 게임 식별자
+        path: 질문 JSON 파일 ([{"question": ..., "expect_answer": true}], 게임별 dict도 허용)
+        limit: 최대 질문 수 (0이면 전체)
+        seed: QA JSON에서 샘플링할 때 사용할 시드
+
+    Returns:
+        list[dict]: {"question", "expect_answer"} 목록
+    """
+    if path is not None:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            data = data.get(game_key, [])
+        questions = [q if isinstance(q, dict) else {"question": q} for q in data]
+    else:
+        # Default: questions from the game's QA dataset (all answerable)
+        qa_path = RULEBOOK_JSON_DIR / "QA" / f"{game_key}_QA.json"
+        items = json.loads(qa_path.read_text(encoding="utf-8")) if qa_path.exists() else []
+        questions = [{"question": item["question"], "expect_answer": True} for item in items]
+        random.Random(seed).shuffle(questions)
+    return questions[:limit] if limit else questions
+
+
+def build_backends(game_key: str, args: argparse.Namespace):
+    """Create vectorstore, model and history factory for a game per the CLI flags."""
+    if args.embeddings == "stub":
+        embeddings = HashingEmbeddings(
+            latency=LatencyModel(args.embed_latency_ms, args.embed_jitter_ms, args.seed)
+        )
+        vectorstore = build_stub_vectorstore(game_key, embeddings)
+        game_title = AVAILABLE_GAMES.get(game_key, {}).get("name", game_key)
+    else:
+        from app.core.vectorstore import load_vectorstore
+
+        vectorstore, game_title = load_vectorstore(game_key, AVAILABLE_GAMES)
+
+    if args.llm == "stub":
+        model = StubChatModel(
+            latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed,
+            malformed_rate=args.malformed_rate, cite_by_ref=bool(args.source_extraction),
+            ms_per_output_token=args.llm_ms_per_output_token,
+        )
+    else:
+        model = None  # create_rag_chain builds the production ChatOpenAI
+
+    history_latency = LatencyModel(args.history_latency_ms, args.history_jitter_ms, args.seed)
+
+    def history_factory(session_id: str) -> BaseChatMessageHistory:
+        if args.history == "stub":
+            return StubChatMessageHistory(session_id, latency=history_latency)
+        from app.core.memory import get_session_history
+
+        return get_session_history(session_id)
+
+    return vectorstore, game_title, model, history_factory
+
+
+def evaluate_retrieval(
+    vectorstore, questions: list[str], ks: Sequence[int], sources: Optional[list[str]] = None
+) -> dict[str, dict[int, float]]:
+    """
+    질문의 원문 QA 청크가 상위 k개에 들어오는 비율 (벡터 검색만 vs 하이브리드)
+
+    Args:
+        vectorstore: 게임 벡터스토어
+        questions: 검색할 질문
+        ks: 측정할 k 목록
+        sources: 질문별 원문 QA 질문 (정답 청크 본문에 그대로 들어 있음), None이면 질문 자체
+
+    Returns:
+        dict: {"vector": {k: hit rate}, "hybrid": {k: hit rate}}
+    """
+    if not questions or not ks:
+        return {}
+    k_max = max(ks)
+    sources = sources or questions
+    rankings = {
+        "vector": batch_similarity_search(vectorstore, questions, k_max),
+        "hybrid": hybrid_search(vectorstore, questions, k_max),
+    }
+    return {
+        path: {
+            k: sum(
+                any(source in doc.page_content for doc in documents[:k])
+                for source, documents in zip(sources, results)
+            ) / len(questions)
+            for k in ks
+        }
+        for path, results in rankings.items()
+    }
+
+
+@contextlib.contextmanager
+def retrieval_mode(mode: str):
+    """Switch the retrieval path for the duration of a run (settings are read at import time)."""
+    saved = vectorstore_module.HYBRID_LEXICAL, vectorstore_module.LEXICAL_SHORTCUT_COVERAGE
+    if mode == "vector":
+        vectorstore_module.HYBRID_LEXICAL = 0
+    elif mode == "embed":
+        vectorstore_module.LEXICAL_SHORTCUT_COVERAGE = 0
+    try:
+        yield
+    finally:
+        vectorstore_module.HYBRID_LEXICAL, vectorstore_module.LEXICAL_SHORTCUT_COVERAGE = saved
+
+
+def run_game(game_key: str, args: argparse.Namespace) -> tuple[list[Sample], dict, dict]:
+    """Run the question set of one game; returns samples and verbatim/paraphrased retrieval hit rates."""
+    vectorstore, game_title, model, history_factory = build_backends(game_key, args)
+    # Built once per worker at startup in production; not part of any question's `prepare`
+    get_lexical_index(vectorstore)
+    chain, parser = create_rag_chain(
+        vectorstore, ReferencedOutputStructure if args.source_extraction else OutputStructure,
+        PromptTemplate, history_factory,
+        model=model, output_mode=args.output_mode, prompt_layout=args.prompt_layout,
+    )
+
+    samples = []
+    for item in load_questions(game_key, args.questions, args.limit, args.seed):
+        sample = Sample(game_key, item["question"])
+        sample.expect_answer = item.get("expect_answer")
+        trace = start_trace(game=game_key)
+        start = time.perf_counter()
+        if args.intent_min_score > 0:
+            sample.intent = classify_intent(item["question"], args.intent_min_score / 100).intent
+        if sample.intent != QUESTION:
+            # Answered from a template, like /chat does
+            sample.answer_type = template_response(sample.intent, game_title)["answer_type"]
+            sample.stages["total"] = time.perf_counter() - start
+            samples.append(sample)
+            continue
+        try:
+            response = ask_question(
+                chain, parser, item["question"], game_title,
+                session_id=f"bench-{uuid.uuid4().hex[:8]}", game_key=game_key,
+            )
+            sample.answer_type = response.get("answer_type")
+        except Exception as e:
+            sample.error = str(e)
+            sample.parse_failed = isinstance(e, OutputParserException)
+        sample.stages["total"] = time.perf_counter() - start
+        sample.load_trace(trace)
+        samples.append(sample)
+    # Default QA questions have a known source chunk to check recall against
+    retrieval = evaluate_retrieval(
+        vectorstore, [s.question for s in samples if s.intent == QUESTION] if args.questions is None else [],
+        args.retrieval_ks,
+    )
+    # Reworded questions: recall that the verbatim QA questions cannot show
+    cases = json.loads(args.paraphrase_cases.read_text(encoding="utf-8")).get(game_key, [])
+    paraphrased = evaluate_retrieval(
+        vectorstore, [case["question"] for case in cases], args.retrieval_ks,
+        [case["source"] for case in cases],
+    )
+    return samples, retrieval, paraphrased
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[Sample]) -> dict[str, Any]:
+    """Aggregate samples into latency/answer-rate/token statistics."""
+    ok = [s for s in samples if s.error is None]
+    chained = [s for s in ok if s.stages["prepare"] > 0]
+    answered = [s for s in ok if s.answer_type and s.answer_type != "CANNOT_ANSWER"]
+    expected = [s for s in ok if s.expect_answer is not None]
+    summary: dict[str, Any] = {
+        "questions": len(samples),
+        "errors": len(samples) - len(ok),
+        "parse_failures": sum(s.parse_failed for s in samples),
+        "answer_rate": len(answered) / len(ok) if ok else 0.0,
+        "lexical_shortcut_rate": sum(s.lexical_shortcut for s in chained) / len(chained) if chained else 0.0,
+        "expectation_match_rate": (
+            sum((s.answer_type != "CANNOT_ANSWER") == s.expect_answer for s in expected) / len(expected)
+            if expected else None
+        ),
+        "context_tokens_avg": statistics.fmean(s.context_tokens for s in ok) if ok else 0.0,
+        "prompt_tokens_avg": statistics.fmean(s.prompt_tokens for s in ok) if ok else 0.0,
+        "output_tokens_avg": statistics.fmean(s.output_tokens for s in ok) if ok else 0.0,
+        "cached_prompt_token_share": (
+            sum(s.llm_cached_tokens for s in ok) / billed
+            if (billed := sum(s.llm_input_tokens for s in ok)) else 0.0
+        ),
+        # Estimated from billed tokens with the server's configured prices (RAG_LLM_*_PRICE_PER_MTOK)
+        "cost_usd_per_1k_questions": (
+            TokenUsage(
+                prompt_tokens=sum(s.llm_input_tokens for s in ok),
+                cached_tokens=sum(s.llm_cached_tokens for s in ok),
+                completion_tokens=sum(s.output_tokens for s in ok),
+            ).cost_usd * 1000 / len(ok)
+            if ok else 0.0
+        ),
+        # History load runs concurrently with retrieval (lexical, embed, vector search) inside `prepare`
+        "overlap_saved_ms_avg": statistics.fmean(
+            (s.history_load + s.stages["lexical"] + s.stages["embed"] + s.stages["retrieve"]
+             - s.stages["prepare"]) * 1000
+            for s in chained
+        ) if chained else 0.0,
+        "stages_ms": {},
+    }
+    for stage in STAGES:
+        values = [s.stages[stage] * 1000 for s in ok]
+        summary["stages_ms"][stage] = {
+            "avg": statistics.fmean(values) if values else 0.0,
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+        }
+    return summary
+
+
+def evaluate_intents(cases: list[dict], min_score: float) -> dict[str, Any]:
+    """
+    인사/잡담 분류기의 의도별 정밀도/재현율과 분류 지연 시간 측정
+
+    Args:
+        cases: {"question", "intent"} 목록 (게임 질문은 intent="question")
+        min_score: 분류 임계값 (0~1)
+
+    Returns:
+        dict: 바로 답한 질문의 정밀도, 의도별 precision/recall, 잘못 가로챈 게임 질문, 지연 시간(µs)
+    """
+    predictions, latencies = [], []
+    for case in cases:
+        start = time.perf_counter()
+        predictions.append(classify_intent(case["question"], min_score).intent)
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    labels = sorted({case["intent"] for case in cases} | set(predictions))
+    per_intent = {}
+    for label in labels:
+        predicted = sum(p == label for p in predictions)
+        actual = sum(case["intent"] == label for case in cases)
+        correct = sum(p == label == case["intent"] for p, case in zip(predictions, cases))
+        per_intent[label] = {
+            "precision": correct / predicted if predicted else None,
+            "recall": correct / actual if actual else None,
+            "support": actual,
+        }
+    shortcuts = [(p, case) for p, case in zip(predictions, cases) if p != QUESTION]
+    return {
+        "cases": len(cases),
+        "shortcuts": len(shortcuts),
+        "shortcut_precision": (
+            sum(p == case["intent"] for p, case in shortcuts) / len(shortcuts) if shortcuts else None
+        ),
+        "false_shortcuts": [case["question"] for p, case in shortcuts if case["intent"] == QUESTION],
+        "intents": per_intent,
+        "latency_us": {
+            "avg": statistics.fmean(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "max": max(latencies, default=0.0),
+        },
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    for game_key, summary in report["games"].items():
+        print("=" * 72)
+        print(f"🎲 {game_key}: {summary['questions']} questions, errors={summary['errors']} "
+              f"(parse failures={summary['parse_failures']})")
+        print(f"   answer rate: {summary['answer_rate']:.1%}", end="")
+        if summary["expectation_match_rate"] is not None:
+            print(f" | expectation match: {summary['expectation_match_rate']:.1%}", end="")
+        print()
+        print(f"   tokens avg: context={summary['context_tokens_avg']:.0f}, "
+              f"prompt={summary['prompt_tokens_avg']:.0f}, output={summary['output_tokens_avg']:.0f}, "
+              f"served from prompt cache={summary['cached_prompt_token_share']:.1%}")
+        print(f"   estimated LLM cost: ${summary['cost_usd_per_1k_questions']:.4f} per 1k questions")
+        print(f"   lexical-only retrieval (no embedding): {summary['lexical_shortcut_rate']:.1%}")
+        for path, rates in summary.get("retrieval_hit_rate", {}).items():
+            print(f"   {path} hit@k: " + ", ".join(f"@{k}={rate:.1%}" for k, rate in rates.items()))
+        for path, rates in summary.get("paraphrase_hit_rate", {}).items():
+            print(f"   {path} hit@k (paraphrased): "
+                  + ", ".join(f"@{k}={rate:.1%}" for k, rate in rates.items()))
+        print(f"   history load ∥ embed+retrieve: {summary['overlap_saved_ms_avg']:.1f} ms saved per question")
+        print(f"   {'stage':<10}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for stage, stats in summary["stages_ms"].items():
+            print(f"   {stage:<10}{stats['avg']:>10.1f}{stats['p50']:>10.1f}{stats['p95']:>10.1f}")
+    intent = report.get("intent")
+    if intent:
+        print("=" * 72)
+        precision = intent["shortcut_precision"]
+        print(f"💬 intent classifier: {intent['cases']} cases, {intent['shortcuts']} answered locally, "
+              f"precision={'n/a' if precision is None else f'{precision:.1%}'}")
+        for label, stats in intent["intents"].items():
+            p = "n/a" if stats["precision"] is None else f"{stats['precision']:.1%}"
+            r = "n/a" if stats["recall"] is None else f"{stats['recall']:.1%}"
+            print(f"   {label:<10} precision={p:>7} recall={r:>7} (n={stats['support']})")
+        latency = intent["latency_us"]
+        print(f"   latency µs: avg={latency['avg']:.0f} p50={latency['p50']:.0f} "
+              f"p95={latency['p95']:.0f} max={latency['max']:.0f}")
+        for question in intent["false_shortcuts"]:
+            print(f"   ⚠️ rule question answered as chit-chat: {question}")
+    print("=" * 72)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline RAG evaluation / latency benchmark")
+    parser.add_argument("--games", nargs="+", default=list(AVAILABLE_GAMES.keys()))
+    parser.add_argument("--questions", type=Path, default=None,
+                        help="question set JSON (default: each game's QA JSON)")
+    parser.add_argument("--limit", type=int, default=25, help="questions per game (0 = all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embeddings", choices=("stub", "real"), default="stub")
+    parser.add_argument("--llm", choices=("stub", "real"), default="stub")
+    parser.add_argument("--history", choices=("stub", "real"), default="stub")
+    parser.add_argument("--output-mode", choices=("structured", "json"), default=None,
+                        help="LLM output mode (default: RAG_OUTPUT_MODE)")
+    parser.add_argument("--source-extraction", type=int, choices=(0, 1), default=SOURCE_EXTRACTION,
+                        help="1 = LLM cites a block number and the source is extracted locally")
+    parser.add_argument("--prompt-layout", choices=("prefix", "legacy"), default=None,
+                        help="prompt message order (default: RAG_PROMPT_LAYOUT)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="stub LLM: share of malformed replies in json mode")
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0)
+    parser.add_argument("--embed-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=900.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=250.0)
+    parser.add_argument("--llm-ms-per-output-token", type=float, default=0.0,
+                        help="stub LLM: extra decode time per output token")
+    parser.add_argument("--history-latency-ms", type=float, default=15.0)
+    parser.add_argument("--history-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--retrieval", choices=("hybrid", "embed", "vector"), default="hybrid",
+                        help="hybrid = production path, embed = no lexical-only shortcut, "
+                             "vector = RAG_HYBRID_LEXICAL=0")
+    parser.add_argument("--retrieval-ks", type=int, nargs="*", default=[2, 3, 5],
+                        help="k values for the QA source-chunk hit rate (vector vs hybrid)")
+    parser.add_argument("--paraphrase-cases", type=Path, default=PARAPHRASE_CASES,
+                        help="reworded questions per game with the QA question they paraphrase")
+    parser.add_argument("--intent-cases", type=Path, default=INTENT_CASES,
+                        help="labeled chit-chat/rule question set for the intent classifier")
+    parser.add_argument("--intent-min-score", type=int, default=INTENT_MIN_SCORE,
+                        help="intent classifier threshold 0-100 (0 = send everything to the chain)")
+    parser.add_argument("--output", type=Path, default=None, help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> dict[str, Any]:
+    args = parse_args(argv)
+    report: dict[str, Any] = {
+        "config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "games": {},
+    }
+    intent_cases = json.loads(args.intent_cases.read_text(encoding="utf-8"))
+    for game_key in args.games:
+        with retrieval_mode(args.retrieval):
+            samples, retrieval, paraphrased = run_game(game_key, args)
+        report["games"][game_key] = {
+            **summarize(samples), "retrieval_hit_rate": retrieval, "paraphrase_hit_rate": paraphrased,
+        }
+        intent_cases += [{"question": s.question, "intent": QUESTION} for s in samples]
+    if args.intent_min_score > 0:
+        report["intent"] = evaluate_intents(intent_cases, args.intent_min_score / 100)
+
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"📄 report saved: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
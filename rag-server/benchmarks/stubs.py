@@ -0,0 +1,338 @@
+"""Deterministic local stand-ins for the RAG upstreams.
+
+These replace Upstage embeddings, the OpenAI chat model and DynamoDB history
+so the chain can be benchmarked offline. Each stand-in can inject latency
+drawn from a seeded distribution to mimic the real service.
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+RULEBOOK_JSON_DIR = (
+    Path(__file__).resolve().parents[2]
+    / "rag-vector-db-generator" / "rulebooks" / "rulebook_json"
+)
+
+
+class LatencyModel:
+    """Seeded latency sampler: `mean_ms` with gaussian `jitter_ms`, never negative."""
+
+    def __init__(self, mean_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_seconds(self) -> float:
+        if self.mean_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        with self._lock:
+            value = self._rng.gauss(self.mean_ms, self.jitter_ms) if self.jitter_ms else self.mean_ms
+        return max(value, 0.0) / 1000
+
+    def sleep(self) -> None:
+        delay = self.sample_seconds()
+        if delay:
+            time.sleep(delay)
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> list[str]:
+    """Character n-grams of whitespace-collapsed text (works for Korean without a tokenizer)."""
+    compact = re.sub(r"\s+", " ", text.strip().lower())
+    grams = []
+    for n in sizes:
+        grams.extend(compact[i:i + n] for i in range(len(compact) - n + 1))
+    return grams
+
+
+def jaccard(a: str, b: str) -> float:
+    """Jaccard similarity of character bigram sets."""
+    set_a, set_b = set(char_ngrams(a, (2,))), set(char_ngrams(b, (2,)))
+    if not set_a or not set_b:
+        return 0.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic embeddings from hashed character n-grams.
+
+    Similar strings share n-grams, so retrieval quality is meaningful enough
+    to exercise the pipeline without calling Upstage.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: Optional[LatencyModel] = None):
+        self.dimensions = dimensions
+        self.latency = latency or LatencyModel()
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for gram in char_ngrams(text):
+            digest = hashlib.md5(gram.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # One simulated round trip per batch, like a real embeddings API
+        self.latency.sleep()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency.sleep()
+        return self._embed(text)
+
+
+def load_rulebook_documents(game_key: str, json_dir: Path = RULEBOOK_JSON_DIR) -> list[Document]:
+    """Build Documents from the QA/rulebook JSON the same way the vector DB generator does."""
+    documents = []
+    for path in (json_dir / "QA" / f"{game_key}_QA.json", json_dir / "rulebook" / f"{game_key}_rulebook.json"):
+        if not path.exists():
+            continue
+        for item in json.loads(path.read_text(encoding="utf-8")):
+            metadata = {
+                key: str(value) if isinstance(value, (list, dict)) else value
+                for key, value in item.items()
+                if value is not None
+            }
+            metadata["source_file"] = path.name
+            if item.get("type") == "QA":
+                content = f"Q: {item.get('question', '')}\nA: {item.get('answer', '')}"
+            elif item.get("type") == "rulebook":
+                title = item.get("section_title", "")
+                body = item.get("content", "")
+                content = f"{title}\n{body}" if title else body
+            else:
+                content = item.get("content", "")
+            documents.append(Document(page_content=content, metadata=metadata))
+    return documents
+
+
+def build_stub_vectorstore(game_key: str, embeddings: Embeddings) -> Chroma:
+    """In-memory Chroma collection for a game, embedded with the given embeddings."""
+    documents = load_rulebook_documents(game_key)
+    if not documents:
+        raise ValueError(f"No rulebook JSON found for game: {game_key}")
+    vectorstore = Chroma(
+        collection_name=f"{game_key}_bench_{uuid.uuid4().hex[:8]}",
+        embedding_function=embeddings,
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+    vectorstore.add_documents(documents)
+    return vectorstore
+
+
+class StubChatMessageHistory(BaseChatMessageHistory):
+    """In-memory history with injected per-operation latency (stands in for DynamoDB)."""
+
+    _store: dict[str, list[BaseMessage]] = {}
+
+    def __init__(self, session_id: str, latency: Optional[LatencyModel] = None, history_size: int = 2):
+        self.session_id = session_id
+        self.latency = latency or LatencyModel()
+        self.history_size = history_size
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        self.latency.sleep()
+        return list(self._store.get(self.session_id, []))
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.latency.sleep()
+        existing = self._store.get(self.session_id, [])
+        self._store[self.session_id] = (existing + list(messages))[-self.history_size:]
+
+    def clear(self) -> None:
+        self._store.pop(self.session_id, None)
+
+
+_BLOCK_HEADER = re.compile(r"^\[(\d+)\][^\n]*$", re.MULTILINE)
+_PAGE = re.compile(r"p\.(\d+)")
+
+
+def parse_context_blocks(text: str) -> list[dict[str, Any]]:
+    """Parse the compact context blocks rendered by app.core.context."""
+    blocks = []
+    headers = list(_BLOCK_HEADER.finditer(text))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[header.end():end]
+        page = _PAGE.search(header.group(0))
+        source = re.search(r"^Source: (.*)$", body, re.MULTILINE)
+        blocks.append({
+            "index": int(header.group(1)),
+            "page": int(page.group(1)) if page else None,
+            "source": source.group(1).strip() if source else "",
+            "qa": re.findall(r"^Q: (.*)\nA: (.*)$", body, re.MULTILINE),
+        })
+    return blocks
+
+
+class PromptCacheSimulator:
+    """Mimics OpenAI automatic prompt caching for the stub LLM.
+
+    A prompt reuses the longest token prefix it shares with a recent prompt,
+    counted in 128-token steps from a 1024-token minimum (shorter shared
+    prefixes are not cached).
+    """
+
+    MIN_TOKENS = 1024
+    STEP = 128
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._prompts: list[list[int]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tokenize(text: str) -> list[int]:
+        from app.core.tokenizer import _get_encoding
+
+        encoding = _get_encoding()
+        if encoding is None:
+            # Same estimate as count_tokens: one token per 4 UTF-8 bytes
+            data = text.encode("utf-8")
+            return [int.from_bytes(data[i:i + 4], "big") for i in range(0, len(data), 4)]
+        return encoding.encode(text, disallowed_special=())
+
+    def lookup(self, tokens: list[int]) -> int:
+        """Return the number of cached prompt tokens and remember the prompt."""
+        with self._lock:
+            shared = 0
+            for previous in self._prompts:
+                n = 0
+                for a, b in zip(previous, tokens):
+                    if a != b:
+                        break
+                    n += 1
+                shared = max(shared, n)
+            self._prompts.append(tokens)
+            del self._prompts[:-self.capacity]
+        if shared < self.MIN_TOKENS:
+            return 0
+        return self.MIN_TOKENS + (shared - self.MIN_TOKENS) // self.STEP * self.STEP
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic chat model that answers from the prompt's context blocks.
+
+    Picks the QA pair whose question best matches the user question; falls
+    back to the best matching rulebook source, otherwise CANNOT_ANSWER.
+
+    With a `response_format` (native structured output) the reply is always
+    schema-exact JSON. Without one it mimics free-text JSON and, with
+    probability `malformed_rate`, wraps it in prose the JSON parser rejects.
+
+    Replies carry `usage_metadata` like the OpenAI API, with cached prompt
+    tokens from a `PromptCacheSimulator` over the messages (the schema is
+    billed but never counted toward the cached prefix).
+    With `cite_by_ref` the reply names the supporting block number (`ref`)
+    instead of copying its source; `ms_per_output_token` adds decode time.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+    qa_threshold: float = 0.2
+    source_threshold: float = 0.1
+    malformed_rate: float = 0.0
+    cite_by_ref: bool = False
+    ms_per_output_token: float = 0.0
+
+    _latency: Optional[LatencyModel] = None
+    _rng: Optional[random.Random] = None
+    _cache: Optional[PromptCacheSimulator] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _sleep(self) -> None:
+        if self._latency is None:
+            self._latency = LatencyModel(self.latency_ms, self.jitter_ms, self.seed)
+        self._latency.sleep()
+
+    def usage(self, messages: List[BaseMessage], content: str, **kwargs: Any) -> dict[str, Any]:
+        """OpenAI-style usage metadata, including simulated prompt-cache reads."""
+        if self._cache is None:
+            self._cache = PromptCacheSimulator()
+        tokens = PromptCacheSimulator.tokenize("".join(f"<|{m.type}|>{m.content}" for m in messages))
+        # The schema is billed but not part of the cacheable message prefix
+        schema = kwargs.get("response_format")
+        schema_tokens = len(PromptCacheSimulator.tokenize(json.dumps(schema, ensure_ascii=False))) if schema else 0
+        input_tokens = schema_tokens + len(tokens)
+        output_tokens = len(PromptCacheSimulator.tokenize(content))
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": self._cache.lookup(tokens)},
+        }
+
+    def answer(self, messages: List[BaseMessage]) -> dict[str, Any]:
+        """Build the structured answer for a prompt."""
+        prompt = "\n".join(str(m.content) for m in messages)
+        question = prompt.rsplit("#Question:", 1)[-1].strip()
+        blocks = parse_context_blocks(prompt)
+
+        best_qa, best_qa_score = None, 0.0
+        best_source, best_source_score = None, 0.0
+        for block in blocks:
+            for q, a in block["qa"]:
+                score = jaccard(question, q)
+                if score > best_qa_score:
+                    best_qa, best_qa_score = (block, a), score
+            score = jaccard(question, block["source"])
+            if score > best_source_score:
+                best_source, best_source_score = block, score
+
+        if best_qa and best_qa_score >= self.qa_threshold:
+            block, answer = best_qa
+            return self._cite({"answer_type": "EXPLAIN", "description": answer}, block)
+        if best_source and best_source_score >= self.source_threshold:
+            return self._cite({"answer_type": "EXPLAIN", "description": best_source["source"]}, best_source)
+        return self._cite(
+            {"answer_type": "CANNOT_ANSWER", "description": "관련 규칙을 찾을 수 없습니다."}, None
+        )
+
+    def _cite(self, answer: dict[str, Any], block: Optional[dict[str, Any]]) -> dict[str, Any]:
+        if self.cite_by_ref:
+            return {**answer, "ref": block["index"] if block else None}
+        return {**answer, "source": block["source"] if block else "", "page": block["page"] if block else None}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._sleep()
+        content = json.dumps(self.answer(messages), ensure_ascii=False)
+        if "response_format" not in kwargs and self.malformed_rate > 0:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            if self._rng.random() < self.malformed_rate:
+                content = f"다음은 규칙에 따른 답변입니다.\n{content}"
+        usage = self.usage(messages, content, **kwargs)
+        if self.ms_per_output_token > 0:
+            time.sleep(usage["output_tokens"] * self.ms_per_output_token / 1000)
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
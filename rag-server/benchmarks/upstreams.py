@@ -0,0 +1,414 @@
+"""Local HTTP stand-ins for OpenAI, Upstage and DynamoDB used by the load test.
+
+One small FastAPI app serves the three upstreams under path prefixes, so an
+unmodified rag-server process can be pointed at it through the SDKs' own
+base-URL settings:
+
+    /openai/v1        OPENAI_BASE_URL / OPENAI_API_BASE  (chat completions, models)
+    /upstage/v1/solar UPSTAGE_API_BASE                   (embeddings)
+    /dynamodb         DDB_ENDPOINT_URL                   (GetItem, PutItem, BatchWriteItem, ...)
+
+Answers and usage come from `benchmarks.stubs.StubChatModel` (answers from the
+prompt's context blocks, simulated prompt-cache reads) and embeddings from
+`HashingEmbeddings`, so retrieval over an index built with the same
+embeddings behaves sensibly. Chat completions are streamed (SSE) like the
+real API, including the final usage chunk the server asks for.
+
+Latencies are log-normal, given as median and p99 (the long right tail of
+real API latencies), plus a per-output-token decode time for the LLM. Error
+rates inject 500s (LLM, embeddings) to exercise retries, breakers and the
+degraded path. The DynamoDB stand-in is for machines without DynamoDB Local;
+the load test uses a real DynamoDB Local when `--ddb-endpoint` is given.
+
+Usage (from rag-server/):
+    python -m benchmarks.upstreams --port 9100 --llm-ttft-ms 700 --llm-ttft-p99-ms 2500
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import re
+import struct
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from benchmarks.stubs import HashingEmbeddings, PromptCacheSimulator, StubChatModel
+
+# z-score of the 99th percentile of a standard normal
+_Z99 = 2.3263
+
+# Characters per streamed content chunk (roughly a few tokens, like the real API)
+_STREAM_CHUNK_CHARS = 8
+
+_DDB_PREFIX = "DynamoDB_20120810."
+
+
+@dataclass
+class LogNormalLatency:
+    """Log-normal latency from its median and p99 (p99 <= median means constant)."""
+
+    median_ms: float
+    p99_ms: float
+    seed: int = 0
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        if self.median_ms > 0 and self.p99_ms > self.median_ms:
+            self._sigma = math.log(self.p99_ms / self.median_ms) / _Z99
+        else:
+            self._sigma = 0.0
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(self._rng.gauss(0.0, self._sigma)) / 1000
+
+    async def sleep(self) -> None:
+        delay = self.sample_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class UpstreamProfile:
+    """Latency and failure behaviour of the stand-ins."""
+
+    llm_ttft: LogNormalLatency
+    llm_ms_per_token: float
+    llm_error_rate: float
+    embed: LogNormalLatency
+    embed_error_rate: float
+    embed_dimensions: int
+    ddb: LogNormalLatency
+    seed: int = 0
+
+
+def _to_messages(messages: list[dict]) -> list[BaseMessage]:
+    converted: list[BaseMessage] = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        role = message.get("role")
+        if role == "system":
+            converted.append(SystemMessage(content=content))
+        elif role == "assistant":
+            converted.append(AIMessage(content=content))
+        else:
+            converted.append(HumanMessage(content=content))
+    return converted
+
+
+def _schema_properties(response_format: Optional[dict]) -> dict:
+    if not response_format:
+        return {}
+    return ((response_format.get("json_schema") or {}).get("schema") or {}).get("properties") or {}
+
+
+def _error(status: int, message: str, kind: str = "server_error") -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status)
+
+
+def _ddb_error(kind: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        {"__type": f"com.amazonaws.dynamodb.v20120810#{kind}", "message": message},
+        status_code=400,
+        media_type="application/x-amz-json-1.0",
+    )
+
+
+def create_app(profile: UpstreamProfile) -> FastAPI:
+    """
+    세 업스트림 대역을 하나의 앱으로 생성
+
+    Args:
+        profile: 지연 시간/오류율 설정
+
+    Returns:
+        FastAPI: /openai, /upstage, /dynamodb 경로를 제공하는 앱
+    """
+    app = FastAPI(title="rag-server upstream stand-ins")
+    rng = random.Random(profile.seed)
+    embeddings = HashingEmbeddings(profile.embed_dimensions)
+    models = {
+        cite_by_ref: StubChatModel(cite_by_ref=cite_by_ref, seed=profile.seed)
+        for cite_by_ref in (False, True)
+    }
+    for model in models.values():
+        # Keep the prefix comparison cheap under load
+        model._cache = PromptCacheSimulator(capacity=32)
+    # DynamoDB tables: name -> {"key": attribute name, "items": {key value: item}}
+    tables: dict[str, dict[str, Any]] = {}
+
+    @app.get("/openai/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "local"}]}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await profile.llm_ttft.sleep()
+        if rng.random() < profile.llm_error_rate:
+            return _error(500, "injected upstream error")
+
+        messages = _to_messages(body.get("messages", []))
+        properties = _schema_properties(body.get("response_format"))
+        model = models["ref" in properties]
+        answer = model.answer(messages)
+        if properties:
+            # Strict schema: exactly the requested fields
+            answer = {key: answer.get(key) for key in properties}
+        content = json.dumps(answer, ensure_ascii=False)
+        kwargs = {"response_format": body["response_format"]} if "response_format" in body else {}
+        usage = model.usage(messages, content, **kwargs)
+        openai_usage = {
+            "prompt_tokens": usage["input_tokens"],
+            "completion_tokens": usage["output_tokens"],
+            "total_tokens": usage["total_tokens"],
+            "prompt_tokens_details": {"cached_tokens": usage["input_token_details"]["cache_read"]},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model_name = body.get("model", "gpt-4o-mini")
+        decode_seconds = usage["output_tokens"] * profile.llm_ms_per_token / 1000
+
+        if not body.get("stream"):
+            await asyncio.sleep(decode_seconds)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model_name,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": openai_usage,
+            }
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None, **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model_name,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            pieces = [content[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(content), _STREAM_CHUNK_CHARS)]
+            per_piece = decode_seconds / max(len(pieces), 1)
+            for piece in pieces:
+                if per_piece:
+                    await asyncio.sleep(per_piece)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model_name,
+                    "choices": [],
+                    "usage": openai_usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/upstage/v1/solar/embeddings")
+    async def create_embeddings(request: Request):
+        body = await request.json()
+        await profile.embed.sleep()
+        if rng.random() < profile.embed_error_rate:
+            return _error(500, "injected upstream error")
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        base64_encoded = body.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(texts):
+            vector = embeddings._embed(text)
+            if base64_encoded:
+                vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        tokens = sum(len(text) for text in texts)
+        return {
+            "object": "list",
+            "model": body.get("model", ""),
+            "data": data,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/dynamodb")
+    @app.post("/dynamodb/")
+    async def dynamodb(request: Request):
+        target = request.headers.get("x-amz-target", "")
+        operation = target.removeprefix(_DDB_PREFIX)
+        body = json.loads(await request.body() or b"{}")
+        await profile.ddb.sleep()
+
+        if operation == "CreateTable":
+            name = body["TableName"]
+            if name not in tables:
+                key = next(k["AttributeName"] for k in body["KeySchema"] if k["KeyType"] == "HASH")
+                tables[name] = {"key": key, "items": {}}
+            return _ddb_json({"TableDescription": _table_description(name, tables[name])})
+
+        name = body.get("TableName")
+        if operation == "BatchWriteItem":
+            for name, requests in body.get("RequestItems", {}).items():
+                table = tables.get(name)
+                if table is None:
+                    return _ddb_error("ResourceNotFoundException", f"Requested resource not found: {name}")
+                for write in requests:
+                    if "PutRequest" in write:
+                        item = write["PutRequest"]["Item"]
+                        table["items"][_key_value(item, table["key"])] = item
+                    elif "DeleteRequest" in write:
+                        table["items"].pop(_key_value(write["DeleteRequest"]["Key"], table["key"]), None)
+            return _ddb_json({"UnprocessedItems": {}})
+
+        table = tables.get(name)
+        if table is None:
+            return _ddb_error("ResourceNotFoundException", f"Requested resource not found: {name}")
+        if operation == "DescribeTable":
+            return _ddb_json({"Table": _table_description(name, table)})
+        if operation == "GetItem":
+            item = table["items"].get(_key_value(body["Key"], table["key"]))
+            return _ddb_json({"Item": item} if item is not None else {})
+        if operation == "PutItem":
+            key = _key_value(body["Item"], table["key"])
+            if not _condition_holds(body, table["items"].get(key)):
+                return _ddb_error("ConditionalCheckFailedException", "The conditional request failed")
+            table["items"][key] = body["Item"]
+            return _ddb_json({})
+        if operation == "UpdateItem":
+            key = _key_value(body["Key"], table["key"])
+            table["items"][key] = _apply_update(body, table["items"].get(key) or dict(body["Key"]))
+            return _ddb_json({})
+        if operation == "DeleteItem":
+            table["items"].pop(_key_value(body["Key"], table["key"]), None)
+            return _ddb_json({})
+        if operation == "Query":
+            # Only the hash-key equality the history layer uses
+            values = list(body.get("ExpressionAttributeValues", {}).values())
+            item = table["items"].get(json.dumps(values[0], sort_keys=True)) if values else None
+            items = [item] if item is not None else []
+            return _ddb_json({"Items": items, "Count": len(items), "ScannedCount": len(items)})
+        return _ddb_error("UnknownOperationException", f"Unsupported operation: {operation}")
+
+    return app
+
+
+def _condition_holds(body: dict, item: Optional[dict]) -> bool:
+    """The history layer's version checks: `attribute_not_exists(#a)` or `#a = :v`."""
+    condition = body.get("ConditionExpression")
+    if not condition:
+        return True
+    names = body.get("ExpressionAttributeNames", {})
+    values = body.get("ExpressionAttributeValues", {})
+    for clause in condition.split(" OR "):
+        missing = re.fullmatch(r"\(?\s*attribute_not_exists\((\S+)\)\s*\)?", clause.strip())
+        equal = re.fullmatch(r"\(?\s*(\S+)\s*=\s*(\S+?)\s*\)?", clause.strip())
+        if missing:
+            if item is None or names.get(missing[1], missing[1]) not in item:
+                return True
+        elif equal:
+            if item is not None and item.get(names.get(equal[1], equal[1])) == values.get(equal[2]):
+                return True
+    return False
+
+
+def _apply_update(body: dict, item: dict) -> dict:
+    """`SET #a = :v` and numeric `ADD #a :n` actions, as used to clear a history."""
+    names = body.get("ExpressionAttributeNames", {})
+    values = body.get("ExpressionAttributeValues", {})
+    for action, assignments in re.findall(r"(SET|ADD)\s+(.*?)(?=\s+(?:SET|ADD)\s|$)", body["UpdateExpression"]):
+        for assignment in assignments.split(","):
+            if action == "SET":
+                name, value = (part.strip() for part in assignment.split("=", 1))
+                item[names.get(name, name)] = values[value]
+            else:
+                name, value = assignment.split()
+                attribute = names.get(name, name)
+                current = float(item.get(attribute, {"N": "0"})["N"])
+                item[attribute] = {"N": f"{current + float(values[value]['N']):g}"}
+    return item
+
+
+def _key_value(item: dict, key: str) -> str:
+    return json.dumps(item[key], sort_keys=True)
+
+
+def _table_description(name: str, table: dict) -> dict:
+    return {
+        "TableName": name,
+        "TableStatus": "ACTIVE",
+        "KeySchema": [{"AttributeName": table["key"], "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": table["key"], "AttributeType": "S"}],
+        "ItemCount": len(table["items"]),
+        "BillingModeSummary": {"BillingMode": "PAY_PER_REQUEST"},
+    }
+
+
+def _ddb_json(payload: dict) -> JSONResponse:
+    return JSONResponse(payload, media_type="application/x-amz-json-1.0")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Latency/failure flags shared with the load test (which forwards them)."""
+    parser.add_argument("--llm-ttft-ms", type=float, default=700.0, help="Median time to first token")
+    parser.add_argument("--llm-ttft-p99-ms", type=float, default=2000.0, help="p99 time to first token")
+    parser.add_argument("--llm-ms-per-token", type=float, default=15.0, help="Decode time per output token")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of LLM calls failing with 500")
+    parser.add_argument("--embed-ms", type=float, default=120.0, help="Median embeddings call latency")
+    parser.add_argument("--embed-p99-ms", type=float, default=450.0, help="p99 embeddings call latency")
+    parser.add_argument("--embed-error-rate", type=float, default=0.0, help="Share of embeddings calls failing with 500")
+    parser.add_argument("--embed-dimensions", type=int, default=256, help="Embedding size (must match the index)")
+    parser.add_argument("--ddb-ms", type=float, default=6.0, help="Median DynamoDB stand-in latency")
+    parser.add_argument("--ddb-p99-ms", type=float, default=35.0, help="p99 DynamoDB stand-in latency")
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def profile_from_args(args: argparse.Namespace) -> UpstreamProfile:
+    return UpstreamProfile(
+        llm_ttft=LogNormalLatency(args.llm_ttft_ms, args.llm_ttft_p99_ms, args.seed),
+        llm_ms_per_token=args.llm_ms_per_token,
+        llm_error_rate=args.llm_error_rate,
+        embed=LogNormalLatency(args.embed_ms, args.embed_p99_ms, args.seed + 1),
+        embed_error_rate=args.embed_error_rate,
+        embed_dimensions=args.embed_dimensions,
+        ddb=LogNormalLatency(args.ddb_ms, args.ddb_p99_ms, args.seed + 2),
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve local OpenAI/Upstage/DynamoDB stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(profile_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ from langchain_chroma import Chroma
 import os
 from pathlib import Path
 
+from index_versions import new_version_dir, publish_version
+from term_index import build_term_aliases, write_term_index
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -84,7 +87,7 @@ def process_single_rulebook(game_name: str, file_path: Path):
     
     # 4. ChromaDB에 저장
     print("\n5️⃣ ChromaDB에 저장 중...")
-    persist_directory = f"./chroma_db/{game_name}"
+    persist_directory = new_version_dir(game_name)
     
     vectorstore = Chroma.from_documents(
         documents=splits,
@@ -94,6 +97,8 @@ def process_single_rulebook(game_name: str, file_path: Path):
         collection_metadata={"hnsw:space": "cosine"}
     )
     print(f"✅ ChromaDB 저장 완료 (코사인 유사도): {persist_directory}")
+    write_term_index(persist_directory, build_term_aliases(game_name, [documents[0].page_content]))
+    publish_version(game_name, persist_directory, f"{game_name}_rulebook")
     
     # 5. 테스트 검색
     print("\n6️⃣ 테스트 검색 수행 중...")
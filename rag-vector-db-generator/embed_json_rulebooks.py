@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 from pathlib import Path
@@ -7,6 +8,15 @@ from langchain_chroma import Chroma
 from langchain.schema import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from index_versions import (
+    SHARED_COLLECTION,
+    SHARED_INDEX,
+    new_version_dir,
+    publish_shared_version,
+    publish_version,
+)
+from term_index import build_term_aliases, write_shared_term_index, write_term_index
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -51,7 +61,105 @@ def load_json_documents(file_path: Path):
     
     return documents
 
-def main():
+def reference_texts(docs):
+    """룰북 용어로 쓰인 텍스트 (QA 질문은 사용자 표현이라 제외)"""
+    texts = []
+    for doc in docs:
+        if doc.metadata.get('type') == 'QA':
+            texts.append(doc.metadata.get('answer', ''))
+        else:
+            texts.append(doc.page_content)
+    return texts
+
+def split_game_documents(game_name: str, docs):
+    """게임 문서를 청크로 분할하고 game_key 메타데이터 추가"""
+    print(f"\n🚀 '{game_name}' 처리 시작 (총 문서: {len(docs)}개)")
+
+    # 텍스트 분할 (JSON 항목이 너무 길 경우를 대비)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=100
+    )
+    splits = text_splitter.split_documents(docs)
+    for split in splits:
+        # 통합 인덱스에서 게임별로 걸러내는 키 (게임별 인덱스에도 동일하게 기록)
+        split.metadata["game_key"] = game_name
+    print(f"   - 청크 분할 완료: {len(splits)}개")
+
+    # 분할 결과 미리보기
+    print(f"   📋 청크 미리보기 (처음 3개):")
+    for i, split in enumerate(splits[:3]):
+        print(f"     [Chunk {i+1}]")
+        # 보기 좋게 줄바꿈 제거 후 출력
+        preview_content = split.page_content[:200].replace('\n', ' ')
+        print(f"     Content: {preview_content}...") 
+        print(f"     Metadata: {split.metadata}")
+        print("     " + "-" * 40)
+    return splits
+
+def embed_game(game_name: str, docs, embeddings):
+    """게임 하나를 자체 버전 디렉터리/컬렉션에 저장하고 게시"""
+    splits = split_game_documents(game_name, docs)
+
+    # ChromaDB 저장 경로 및 컬렉션 이름
+    persist_directory = new_version_dir(game_name)
+    collection_name = f"{game_name}_rulebook" 
+
+    print(f"   - 저장 경로: {persist_directory}")
+    print(f"   - 컬렉션명: {collection_name}")
+
+    # 벡터 스토어 생성 및 저장
+    vectorstore = Chroma.from_documents(
+        documents=splits,
+        embedding=embeddings,
+        persist_directory=persist_directory,
+        collection_name=collection_name,
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    print(f"✅ '{game_name}' 저장 완료!")
+    write_term_index(persist_directory, build_term_aliases(game_name, reference_texts(docs)))
+    publish_version(game_name, persist_directory, collection_name)
+
+    # 간단한 검색 테스트
+    print("   🔍 검색 테스트: '게임 준비는 어떻게 해?'")
+    results = vectorstore.similarity_search("게임 준비는 어떻게 해?", k=1)
+    if results:
+        print(f"   👉 결과: {results[0].page_content[:100]}...")
+
+def embed_shared(games, embeddings):
+    """모든 게임을 하나의 통합 컬렉션에 저장하고 게시 (game_key 메타데이터로 구분)"""
+    splits = []
+    for game_name, docs in games.items():
+        splits.extend(split_game_documents(game_name, docs))
+
+    persist_directory = new_version_dir(SHARED_INDEX)
+    print(f"\n🗂️  통합 인덱스 저장 (게임 {len(games)}개, 청크 {len(splits)}개)")
+    print(f"   - 저장 경로: {persist_directory}")
+    print(f"   - 컬렉션명: {SHARED_COLLECTION}")
+
+    vectorstore = Chroma.from_documents(
+        documents=splits,
+        embedding=embeddings,
+        persist_directory=persist_directory,
+        collection_name=SHARED_COLLECTION,
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    print("✅ 통합 인덱스 저장 완료!")
+    write_shared_term_index(persist_directory, {
+        game_name: build_term_aliases(game_name, reference_texts(docs))
+        for game_name, docs in games.items()
+    })
+    publish_shared_version(list(games), persist_directory)
+
+    # 게임 필터 검색 테스트
+    for game_name in games:
+        results = vectorstore.similarity_search(
+            "게임 준비는 어떻게 해?", k=1, filter={"game_key": game_name}
+        )
+        if results:
+            print(f"   🔍 [{game_name}] {results[0].page_content[:80]}...")
+
+def main(shared: bool = False):
     print("=" * 80)
     print("📚 JSON 룰북/QA 임베딩 시스템")
     print("=" * 80)
@@ -97,55 +205,23 @@ def main():
     # 임베딩 모델 설정
     print("\n🤖 임베딩 모델(Upstage Solar) 준비 중...")
     embeddings = UpstageEmbeddings(model="solar-embedding-1-large-passage")
-    
-    # 게임별로 벡터 DB 저장
-    for game_name, docs in games.items():
-        print(f"\n🚀 '{game_name}' 처리 시작 (총 문서: {len(docs)}개)")
-        
-        # 텍스트 분할 (JSON 항목이 너무 길 경우를 대비)
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100
-        )
-        splits = text_splitter.split_documents(docs)
-        print(f"   - 청크 분할 완료: {len(splits)}개")
-
-        # 분할 결과 미리보기
-        print(f"   📋 청크 미리보기 (처음 3개):")
-        for i, split in enumerate(splits[:3]):
-            print(f"     [Chunk {i+1}]")
-            # 보기 좋게 줄바꿈 제거 후 출력
-            preview_content = split.page_content[:200].replace('\n', ' ')
-            print(f"     Content: {preview_content}...") 
-            print(f"     Metadata: {split.metadata}")
-            print("     " + "-" * 40)
-        
-        # ChromaDB 저장 경로 및 컬렉션 이름
-        persist_directory = f"./chroma_db/{game_name}"
-        collection_name = f"{game_name}_rulebook" 
-        
-        print(f"   - 저장 경로: {persist_directory}")
-        print(f"   - 컬렉션명: {collection_name}")
-        
-        # 벡터 스토어 생성 및 저장
-        vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=embeddings,
-            persist_directory=persist_directory,
-            collection_name=collection_name,
-            collection_metadata={"hnsw:space": "cosine"}
-        )
-        print(f"✅ '{game_name}' 저장 완료!")
-        
-        # 간단한 검색 테스트
-        print("   🔍 검색 테스트: '게임 준비는 어떻게 해?'")
-        results = vectorstore.similarity_search("게임 준비는 어떻게 해?", k=1)
-        if results:
-            print(f"   👉 결과: {results[0].page_content[:100]}...")
+
+    if shared:
+        embed_shared(games, embeddings)
+    else:
+        # 게임별로 벡터 DB 저장
+        for game_name, docs in games.items():
+            embed_game(game_name, docs, embeddings)
 
     print("\n" + "=" * 80)
     print("✨ 모든 작업 완료!")
     print("=" * 80)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="JSON 룰북/QA를 임베딩해 벡터 DB 생성")
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="모든 게임을 하나의 통합 인덱스(chroma_db/_shared)에 저장",
+    )
+    main(shared=parser.parse_args().shared)
@@ -0,0 +1,120 @@
+"""Versioned index directories and the game catalog read by rag-server.
+
+Layout under `chroma_db/`:
+
+    catalog.json                 # game key -> name / db_path / collection
+    rummikub/CURRENT             # name of the active version
+    rummikub/20250101T000000Z/   # one Chroma persist directory per build
+
+A new build is written to a fresh version directory, then published by
+atomically replacing `CURRENT` and `catalog.json`. The server polls both and
+swaps indexes without a restart, so a half-written build is never served.
+
+Consolidated builds (`embed_json_rulebooks.py --shared`) put every game into
+one collection under `_shared/`, each chunk tagged with `game_key`; the
+catalog entries of those games point at the same directory with
+`"shared": true` and the server filters by game at query time.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+CHROMA_ROOT = "./chroma_db"
+CATALOG_FILE = "catalog.json"
+CURRENT_POINTER = "CURRENT"
+KEEP_VERSIONS = 3
+
+# Consolidated multi-game index: directory under CHROMA_ROOT and collection name
+SHARED_INDEX = "_shared"
+SHARED_COLLECTION = "rulebooks"
+
+# Display names for the catalog (game key -> name)
+GAME_NAMES_FILE = Path(__file__).parent / "game_names.json"
+
+
+def _write_atomic(path: Path, content: str):
+    """Write via a temp file + rename so readers never see a partial file"""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def new_version_dir(game_name: str, chroma_root: str = CHROMA_ROOT) -> str:
+    """Return a fresh (not yet existing) version directory for a game build"""
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = Path(chroma_root) / game_name / version
+    suffix = 1
+    while path.exists():
+        path = Path(chroma_root) / game_name / f"{version}-{suffix}"
+        suffix += 1
+    return str(path)
+
+
+def _load_game_names() -> dict:
+    try:
+        with open(GAME_NAMES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _register_games(root: Path, entries: dict):
+    """Merge game entries into catalog.json (other games are kept as they are)"""
+    catalog_path = root / CATALOG_FILE
+    try:
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        catalog = {"games": {}}
+    catalog.setdefault("games", {}).update(entries)
+    _write_atomic(catalog_path, json.dumps(catalog, ensure_ascii=False, indent=2) + "\n")
+    return catalog_path
+
+
+def _activate(index_dir: Path, version: str):
+    """Point CURRENT at a finished build and prune old builds"""
+    _write_atomic(index_dir / CURRENT_POINTER, version + "\n")
+    # Keep a few previous builds for rollback (edit CURRENT to switch back)
+    versions = sorted(p for p in index_dir.iterdir() if p.is_dir())
+    for old in versions[:-KEEP_VERSIONS]:
+        if old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def publish_version(game_name: str, version_dir: str, collection_name: str, chroma_root: str = CHROMA_ROOT):
+    """Point the game at a finished build, register it in the catalog and prune old builds"""
+    root = Path(chroma_root)
+    version = Path(version_dir).name
+    _activate(root / game_name, version)
+    catalog_path = _register_games(root, {
+        game_name: {
+            "name": _load_game_names().get(game_name, game_name),
+            "db_path": game_name,
+            "collection": collection_name,
+        }
+    })
+    print(f"📌 {game_name}: 활성 버전 {version} (catalog: {catalog_path})")
+
+
+def publish_shared_version(game_names: list[str], version_dir: str, chroma_root: str = CHROMA_ROOT):
+    """Point the consolidated index at a finished build and register its games as shared"""
+    root = Path(chroma_root)
+    version = Path(version_dir).name
+    _activate(root / SHARED_INDEX, version)
+    names = _load_game_names()
+    catalog_path = _register_games(root, {
+        game_name: {
+            "name": names.get(game_name, game_name),
+            "db_path": SHARED_INDEX,
+            "collection": SHARED_COLLECTION,
+            "shared": True,
+        }
+        for game_name in game_names
+    })
+    print(f"📌 통합 인덱스: 활성 버전 {version}, 게임 {len(game_names)}개 (catalog: {catalog_path})")
@@ -0,0 +1,156 @@
+"""Per-game term alias dictionary written into each index build.
+
+Players rarely use the rulebook's own words ("블록" for 루미큐브 "타일",
+"길카드" for "길 카드"). rag-server rewrites questions to the rulebook terms
+before embedding and caching, using the `terms.json` stored next to the
+Chroma files of the active version (so it is swapped together with the index).
+A consolidated multi-game build stores one section per game instead
+(`{"games": {game_key: {"aliases": ...}}}`).
+
+Aliases come from two sources:
+- `term_aliases.json`: hand-maintained synonyms per game (+ "common")
+- spacing variants mined from the rulebook/QA text: noun phrases ending in a
+  component noun ("길 카드", "조커 타일") are also matched without spaces
+
+The rulebook text and QA answers are the reference vocabulary: a seed whose
+canonical term never appears there is skipped, and an alias that the
+reference text itself uses is never rewritten.
+"""
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+TERMS_FILE = "terms.json"
+ALIASES_FILE = Path(__file__).parent / "term_aliases.json"
+
+# Multi-word terms must occur at least this often to get a no-space variant
+MIN_PHRASE_COUNT = 2
+
+# Mined phrases must end in one of these (game component nouns)
+HEAD_NOUNS = {"카드", "타일", "더미", "세트", "토큰", "칩", "보드", "말", "주사위", "받침대", "도구"}
+
+# Modifiers that do not form a term with the following noun
+_NON_TERM_MODIFIERS = {
+    "모든", "그", "이", "각", "한", "두", "세", "네", "다른", "새", "어떤", "맨", "위", "중", "전체",
+    "다시", "내", "각자", "자기", "처음", "이전", "후", "다음",
+}
+# Verb endings: adnominal ("펼쳐진 카드", "가진 타일", "낼 타일") and connective ("쌓아 더미")
+_VERB_ENDINGS = (
+    "진", "된", "는", "한", "던", "인", "운", "은", "을", "른", "간", "온", "쓴", "친", "난", "할", "린",
+    "낼", "둔", "다", "서", "고", "아", "어",
+)
+
+_WORD = re.compile(r"[가-힣A-Za-z0-9]+")
+# Phrases never span punctuation or line breaks
+_CLAUSE_BREAK = re.compile(r"[^\w ]+")
+_HANGUL = re.compile(r"[가-힣]+")
+
+# Common Korean particles/endings attached to nouns (longest first)
+PARTICLES = sorted([
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "한테", "으로", "로",
+    "도", "만", "과", "와", "랑", "이랑", "하고", "까지", "부터", "보다", "처럼", "이나", "나",
+    "이야", "야", "이에요", "예요", "이요", "요", "인가요", "인가", "이면", "면", "들", "으로는",
+    "로는", "에는", "에도", "은요", "는요",
+], key=len, reverse=True)
+
+
+def _strip_particle(word: str) -> str:
+    for particle in PARTICLES:
+        if word.endswith(particle) and len(word) > len(particle):
+            return word[:-len(particle)]
+    return word
+
+
+def reference_vocabulary(texts: list[str]) -> tuple[Counter, Counter]:
+    """참조 텍스트의 단어(조사 제거) 빈도와 연속 두 단어 구문 빈도"""
+    words, phrases = Counter(), Counter()
+    for text in texts:
+        words.update(_strip_particle(token) for token in _WORD.findall(text))
+        for clause in _CLAUSE_BREAK.split(text):
+            tokens = _WORD.findall(clause)
+            # Only "bare first word + word(+particle)" pairs form a noun phrase candidate
+            for first, second in zip(tokens, tokens[1:]):
+                if _strip_particle(first) == first:
+                    phrases[f"{first} {_strip_particle(second)}"] += 1
+    return words, phrases
+
+
+def _load_seed_aliases(game_name: str) -> dict[str, list[str]]:
+    try:
+        with open(ALIASES_FILE, "r", encoding="utf-8") as f:
+            seeds = json.load(f)
+    except FileNotFoundError:
+        return {}
+    merged: dict[str, list[str]] = {}
+    for group in ("common", game_name):
+        for canonical, aliases in seeds.get(group, {}).items():
+            merged.setdefault(canonical, []).extend(aliases)
+    return merged
+
+
+def build_term_aliases(game_name: str, reference_texts: list[str]) -> dict[str, str]:
+    """
+    게임의 별칭 → 룰북 용어 사전 생성
+
+    Args:
+        game_name: 게임 키
+        reference_texts: 룰북 본문, QA 답변 등 룰북 용어로 쓰인 텍스트
+
+    Returns:
+        dict[str, str]: 별칭 -> 표준 용어
+    """
+    words, phrases = reference_vocabulary(reference_texts)
+    joined = "\n".join(reference_texts)
+    aliases: dict[str, str] = {}
+
+    for canonical, candidates in _load_seed_aliases(game_name).items():
+        if canonical not in joined:
+            print(f"   ⚠️ [{game_name}] 룰북에 없는 용어라 건너뜀: {canonical}")
+            continue
+        for alias in candidates:
+            if words[alias] or phrases[alias]:
+                continue  # the rulebook uses it itself
+            aliases[alias] = canonical
+            if " " in alias:
+                aliases.setdefault(alias.replace(" ", ""), canonical)
+        if " " in canonical and not words[canonical.replace(" ", "")]:
+            aliases.setdefault(canonical.replace(" ", ""), canonical)
+
+    for phrase, count in phrases.items():
+        modifier, head = phrase.split(" ")
+        if (
+            count < MIN_PHRASE_COUNT
+            or head not in HEAD_NOUNS
+            or not _HANGUL.fullmatch(modifier)
+            or modifier in _NON_TERM_MODIFIERS
+            or modifier.endswith(_VERB_ENDINGS)
+        ):
+            continue
+        compact = modifier + head
+        if not words[compact]:
+            aliases.setdefault(compact, phrase)
+    return aliases
+
+
+def write_term_index(version_dir: str, aliases: dict[str, str]):
+    """빌드 디렉터리에 terms.json 저장 (CURRENT 게시 전에 호출)"""
+    path = Path(version_dir) / TERMS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"aliases": aliases}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"   - 용어 별칭 {len(aliases)}개 저장: {path}")
+
+
+def write_shared_term_index(version_dir: str, aliases_by_game: dict[str, dict[str, str]]):
+    """통합 인덱스 빌드 디렉터리에 게임별 섹션으로 terms.json 저장"""
+    path = Path(version_dir) / TERMS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    games = {game_name: {"aliases": aliases} for game_name, aliases in aliases_by_game.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"games": games}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    total = sum(len(aliases) for aliases in aliases_by_game.values())
+    print(f"   - 용어 별칭 {total}개 저장 (게임 {len(games)}개): {path}")
@@ -19,6 +19,24 @@ export class ChatInput {
   gameKey?: string;
 }
 
+@InputType()
+export class PrefetchInput {
+  @Field(() => String)
+  @IsString()
+  @IsNotEmpty()
+  partialText: string;
+
+  @Field(() => String, { nullable: true })
+  @IsString()
+  @IsOptional()
+  sessionId?: string;
+
+  @Field(() => String, { nullable: true, defaultValue: 'rummikub' })
+  @IsString()
+  @IsOptional()
+  gameKey?: string;
+}
+
 @InputType()
 export class FileSearchInput {
   @Field(() => String)
@@ -1,7 +1,7 @@
 import { Resolver, Mutation, Query, Args } from '@nestjs/graphql';
 import { Logger } from '@nestjs/common';
 import { OpenAIService } from './openai.service';
-import { ChatInput, FileSearchInput } from './dto/openai.input';
+import { ChatInput, FileSearchInput, PrefetchInput } from './dto/openai.input';
 import { ChatResponse, FileSearchResponse } from './dto/openai.response';
 import { ChatSession, ChatMessage } from './entities/chat.entity';
 
@@ -29,6 +29,11 @@ export class OpenAIResolver {
     }
   }
 
+  @Mutation(() => Boolean)
+  async prefetchChat(@Args('input') input: PrefetchInput): Promise<boolean> {
+    return this.openaiService.prefetch(input);
+  }
+
   @Query(() => ChatSession, { nullable: true })
   async getChatSession(
     @Args('sessionId') sessionId: string,
@@ -3,7 +3,7 @@ import { ConfigService } from '@nestjs/config';
 import { HttpService } from '@nestjs/axios';
 import { firstValueFrom } from 'rxjs';
 import { AxiosResponse } from 'axios';
-import { ChatInput, FileSearchInput } from './dto/openai.input';
+import { ChatInput, FileSearchInput, PrefetchInput } from './dto/openai.input';
 import { ChatResponse, FileSearchResponse } from './dto/openai.response';
 
 @Injectable()
@@ -56,6 +56,29 @@ export class OpenAIService {
     }
   }
 
+  // 말하는 중인 질문의 중간 전사문으로 RAG 검색을 미리 시작 (실패해도 채팅에는 영향 없음)
+  async prefetch(input: PrefetchInput): Promise<boolean> {
+    try {
+      const requestBody = {
+        partial_text: input.partialText,
+        game_key: input.gameKey || 'rummikub',
+        session_id: input.sessionId || 'default',
+      };
+
+      await firstValueFrom(
+        this.httpService.post(
+          `${this.ragServerUrl}/api/v1/prefetch`,
+          requestBody,
+          { timeout: 2000 },
+        ),
+      );
+      return true;
+    } catch (error) {
+      this.logger.warn(`Prefetch skipped: ${error.message}`);
+      return false;
+    }
+  }
+
   async healthCheck(): Promise<{ status: string; available_games: string[] }> {
     try {
       const response = await firstValueFrom(
@@ -0,0 +1,119 @@
+"""
+Admin profiling endpoints for the Silero VAD service
+
+Enabled only when VAD_ADMIN_TOKEN is set; requests must send the same value
+in the X-Admin-Token header.
+"""
+
+import hmac
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from app.profiling import CPU_PROFILER, MEMORY_PROFILER, ProfilerBusy
+
+ADMIN_TOKEN = os.getenv("VAD_ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = int(os.getenv("VAD_PROFILE_MAX_SECONDS") or 60)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Check the X-Admin-Token header (endpoints are hidden while no token is configured)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(default=10, gt=0),
+    interval_ms: int = Query(default=10, ge=1, le=1000),
+):
+    """
+    Sample all thread stacks for `seconds` and return them as collapsed stacks
+
+    Args:
+        seconds: Profile duration in seconds
+        interval_ms: Sampling interval in milliseconds
+
+    Returns:
+        Collapsed stack file for flamegraph.pl / speedscope / inferno
+    """
+    if seconds > PROFILE_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400, detail=f"seconds must be <= {PROFILE_MAX_SECONDS}"
+        )
+    try:
+        profile = await run_in_threadpool(CPU_PROFILER.run, seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="CPU profile already running")
+    filename = f"vad-cpu-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(profile.samples),
+            "X-Profile-Seconds": f"{profile.seconds:.3f}",
+        },
+    )
+
+
+@router.get("/profile/memory")
+async def memory_status():
+    """tracemalloc status (traced bytes, kept snapshot ids)"""
+    return MEMORY_PROFILER.status()
+
+
+@router.post("/profile/memory/start")
+async def memory_start(frames: int = Query(default=10, ge=1, le=100)):
+    """
+    Start tracemalloc (every allocation is traced until it is stopped)
+
+    Args:
+        frames: Traceback depth stored per allocation
+    """
+    started = MEMORY_PROFILER.start(frames)
+    return {"started": started, **MEMORY_PROFILER.status()}
+
+
+@router.post("/profile/memory/snapshot")
+async def memory_snapshot(top: int = Query(default=20, ge=1, le=500)):
+    """Take a snapshot and return its top allocation sites (the id is used for diffs)"""
+    try:
+        return await run_in_threadpool(MEMORY_PROFILER.snapshot, top)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/profile/memory/diff")
+async def memory_diff(
+    base: int = Query(...),
+    target: Optional[int] = Query(default=None),
+    top: int = Query(default=20, ge=1, le=500),
+):
+    """
+    Allocation growth per site between two snapshots
+
+    Args:
+        base: Base snapshot id
+        target: Snapshot id to compare (default: the latest)
+        top: Number of allocation sites to return
+    """
+    try:
+        return await run_in_threadpool(MEMORY_PROFILER.diff, base, target, top)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/profile/memory/stop")
+async def memory_stop():
+    """Stop tracemalloc and drop the snapshots"""
+    MEMORY_PROFILER.stop()
+    return MEMORY_PROFILER.status()
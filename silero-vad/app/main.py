@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import logging
 from app.vad_service import SileroVAD
+from app import admin
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 
@@ -32,6 +33,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Token-guarded profiling endpoints (disabled unless VAD_ADMIN_TOKEN is set)
+app.include_router(admin.router, prefix="/admin", include_in_schema=False)
+
 
 # Session-based VAD management
 class VADSessionManager: